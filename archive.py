@@ -0,0 +1,218 @@
+from utils import *
+import BaseHTTPServer
+import SocketServer
+import hashlib
+import sys
+import threading
+import urlparse
+import zipfile
+
+class Archive(object):
+    """
+    Compressed archive of fetched pages for network-free runs
+
+    Each page is one deflated member of a zip file, named by the sha1 of
+    its url, with the url kept in the member comment. The zip central
+    directory is the index.
+
+
+    Example
+
+    from archive import Archive
+    from getdata import GetData
+
+    # record every page fetched while crawling
+    archive = Archive('legis2017.zip').record()
+    GetData().getlegislators()
+    archive.close()
+
+    # crawl again from the archive only
+    archive = Archive('legis2017.zip').replay()
+    GetData().getlegislators()
+    archive.close()
+
+    # serve the archive at the same paths
+    python archive.py serve legis2017.zip 8000
+
+    """
+
+    def __init__(self, path):
+        """
+        Open the archive, reading its index if it exists
+
+        INPUT
+        path, str zip file
+
+        """
+
+        self.path = path
+        self.lock = threading.Lock()
+        self.zf = None
+        # the loader under ours, restored by close() if record() or
+        # replay() installed ours
+        self.previous = None
+        self.installed = False
+
+        # url: member name, and path?query: member name for the server
+        self.urls = {}
+        self.paths = {}
+        try:
+            zf = zipfile.ZipFile(path, 'r')
+        except IOError:
+            return
+        for zi in zf.infolist():
+            self._add_index(zi.comment, zi.filename)
+        zf.close()
+
+    def _add_index(self, url, name):
+        """Add a member to the url and path indexes"""
+
+        self.urls[url] = name
+        self.paths.setdefault(url_path(url), name)
+
+    def __len__(self):
+        return len(self.urls)
+
+    def __contains__(self, url):
+        return url in self.urls or url_path(url) in self.paths
+
+    def get(self, url):
+        """
+        Text of a page, matching by url then by path
+
+        INPUT
+        url, str url, or path?query
+
+        OUTPUT
+        text, str, None if not archived
+
+        """
+
+        name = self.urls.get(url) or self.paths.get(url_path(url))
+        if name is None:
+            return None
+
+        with self.lock:
+            if self.zf is None:
+                self.zf = zipfile.ZipFile(self.path, 'r')
+            return self.zf.read(name)
+
+    def put(self, url, text):
+        """Add a page to the archive, keeping the first copy of a url"""
+
+        with self.lock:
+            if url in self.urls:
+                return
+
+            if self.zf is None or self.zf.mode == 'r':
+                if self.zf is not None:
+                    self.zf.close()
+                self.zf = zipfile.ZipFile(self.path, 'a', zipfile.ZIP_DEFLATED)
+
+            zi = zipfile.ZipInfo(hashlib.sha1(url).hexdigest())
+            zi.compress_type = zipfile.ZIP_DEFLATED
+            zi.comment = url
+            self.zf.writestr(zi, text)
+            self._add_index(url, zi.filename)
+
+    def record(self):
+        """Archive every page fetched by load_txt, see utils.install_loader"""
+
+        def loader(url):
+            text = (self.previous or fetch_txt)(url)
+            self.put(url, text)
+            return text
+
+        # remember the loader under us, eg a cache, and fetch through it
+        self.previous = install_loader(loader)
+        self.installed = True
+        return self
+
+    def replay(self):
+        """Serve every load_txt from the archive, missing pages raise IOError"""
+
+        def loader(url):
+            text = self.get(url)
+            if text is None:
+                raise IOError('Not in archive: ' + url)
+            return text
+
+        self.previous = install_loader(loader)
+        self.installed = True
+        return self
+
+    def close(self):
+        """Stop recording/replaying and close the zip file"""
+
+        if self.installed:
+            install_loader(self.previous)
+            self.previous = None
+            self.installed = False
+        with self.lock:
+            if self.zf is not None:
+                self.zf.close()
+                self.zf = None
+
+    def serve(self, port = 8000, host = 'localhost'):
+        """
+        Serve archived pages over http at their original path?query
+        Blocks until interrupted.
+
+        INPUT
+        port, int
+        host, str interface
+
+        """
+
+        archive = self
+
+        class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+            def do_GET(self):
+                text = archive.get(self.path)
+                if text is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(text)))
+                self.end_headers()
+                self.wfile.write(text)
+
+            def log_message(self, *args):
+                pass
+
+        class Server(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+            daemon_threads = True
+
+        server = Server((host, port), Handler)
+        print 'Serving', len(self), 'pages at http://%s:%d' % (host, port)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        server.server_close()
+
+def url_path(url):
+    """path?query of a url, the key pages are served at"""
+
+    parts = urlparse.urlsplit(url)
+    path = parts.path or '/'
+    if parts.query:
+        path += '?' + parts.query
+
+    return path
+
+if __name__ == '__main__':
+    # python archive.py serve ARCHIVE [PORT]
+    # python archive.py list ARCHIVE
+    if len(sys.argv) < 3 or sys.argv[1] not in ['serve', 'list']:
+        print 'usage: python archive.py serve|list ARCHIVE [PORT]'
+        sys.exit(1)
+
+    archive = Archive(sys.argv[2])
+    if sys.argv[1] == 'serve':
+        port = int(sys.argv[3]) if len(sys.argv) > 3 else 8000
+        archive.serve(port)
+    else:
+        for url in sorted(archive.urls):
+            print url
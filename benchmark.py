@@ -0,0 +1,511 @@
+"""
+Benchmarks for the scraping pipelines, run against recorded pages
+Record an archive first, see archive.py
+
+
+Example
+
+python benchmark.py crawl legis2017.zip
+python benchmark.py crawl legis2017.zip --processes 4
+python benchmark.py crawl legis2017.zip --save baseline.json
+python benchmark.py crawl legis2017.zip --check baseline.json --threshold 0.25
+python benchmark.py regex
+python benchmark.py parse legis2017.zip
+python benchmark.py feed --items 20000
+python benchmark.py unicode
+
+"""
+
+from utils import *
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PIPELINES = ['getdata', 'gethouse', 'getcommittee']
+
+# the legislator regex replaced by legisparser.parse_left
+# https://regex101.com/r/6er3zh/2
+LEGACY_LEFT_REGEX = re.compile(
+    r'^\n+\w+? (.+?) (\w+?)\n+((.+?)|)\n+\w+ District ' + \
+    r'(\d+?) \((R|D) - (.+?)\)(\s|\S)+?Madison Office:' + \
+    r'\s+(.+?)\s+Telephone:\n\s+(.+)\s*(Fax:\n\s+(.+)|)' + \
+    r'\s+(District Phone:\s+(.+)|)\s+Email:\n(.+)\s+' + \
+    r'(District Address:\s+(.+)|)\s+(Voting Address:\s+' + \
+    r'(.+)|)\s*(Staff:\n((\s|\S)+?)|)\n(Current Committees' + \
+    r'\n((\s|\S)+?)|)\n\s+(Biography\n((.| |\n)+)|)$')
+
+def legacy_rm_unicode(text):
+    """utils.rm_unicode before the translation table, five regex passes"""
+
+    a = re.sub(u"(\u2018|\u2019)", "'", text)
+    b = re.sub(u"(\u201c|\u201d)", '"', a)
+    c = re.sub(u"(\u2013)", '-', b)
+    d = re.sub(u"(\u2014)", '--', c)
+    e = re.sub(u"\xe9", 'e', d)
+
+    try:
+        e = str(e)
+    except UnicodeEncodeError:
+        warning("Unicode in utils.py", e)
+
+    return e
+
+# malformed left sides of a legislator page, of size n
+HEADER = '\n\nRepresentative Scott Allen\n\nAssembly District 97 (R - Waukesha)\n'
+CONTACT = HEADER + '\nMadison Office:\n  Room 8\n  Telephone:\n  (608) 266-8580\n'
+ADVERSARIAL = {
+    # whitespace after Telephone and no Email, cubic in the regex
+    'no email': lambda n: CONTACT + ' ' * n + 'x',
+    # repeated labels that never complete
+    'no telephone': lambda n: HEADER + 'Madison Office: \n' * n,
+    # long staff section with no committees or biography
+    'staff only': lambda n: CONTACT + '  Email:\nRep.Allen\nStaff:\n' + 'A\n' * n,
+}
+
+def _crawl(name, year, processes = 1):
+    """
+    Run one pipeline in the current directory, parsing in processes
+
+    OUTPUT
+    rows, int number of rows written
+
+    """
+
+    if name == 'getdata':
+        from getdata import GetData
+        obj = GetData(processes = processes)
+        obj.year = str(year)
+        obj.getlegislators()
+        fn = 'legislators.txt'
+    elif name == 'gethouse':
+        from gethouse2015 import GetHouse
+        GetHouse('assembly', year)
+        fn = 'assembly_list.txt'
+    else:
+        from getcommittee import GetCommittee
+        GetCommittee(processes = processes)
+        fn = 'committee_list.txt'
+
+    with open(fn, 'r') as f:
+        return sum(1 for line in f)
+
+def _run_pipeline(name, archive_path, year, processes, results):
+    """
+    Child process: replay archive_path through one pipeline
+    Puts a dict of measurements on the results queue
+    """
+
+    from archive import Archive
+
+    # write outputs somewhere harmless
+    workdir = tempfile.mkdtemp()
+    shutil.copy(os.path.join(HERE, 'committee_topics.txt'), workdir)
+    os.chdir(workdir)
+
+    # count pages on top of the replay
+    archive = Archive(archive_path).replay()
+    replay = install_loader(None)
+    lock = threading.Lock()
+    pages = {'pages': 0, 'bytes': 0}
+    def counted(url):
+        text = replay(url)
+        with lock:
+            pages['pages'] += 1
+            pages['bytes'] += len(text)
+        return text
+    install_loader(counted)
+
+    reset_timed()
+    start = time.time()
+    try:
+        rows = _crawl(name, year, processes)
+    finally:
+        wall = time.time() - start
+        archive.close()
+        shutil.rmtree(workdir, ignore_errors = True)
+
+    stages = dict(stage_times)
+    stages['other'] = max(0.0, wall - sum(stages.values()))
+    results.put({'pipeline': name,
+                 'wall': wall,
+                 'stages': stages,
+                 'calls': dict(stage_calls),
+                 'pages': pages['pages'],
+                 'bytes': pages['bytes'],
+                 'rows': rows,
+                 # KB on linux
+                 'peak_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.})
+
+def run(archive_path, pipelines = PIPELINES, year = 2017, processes = 1):
+    """
+    Benchmark pipelines, each in a fresh process so peak memory is its own
+
+    INPUT
+    archive_path, str archive recorded with archive.Archive
+    pipelines, list of names from PIPELINES
+    year, int session of the recorded pages
+    processes, int processes parsing pages, see parsepool.py, stage times
+        are then summed over the processes
+
+    OUTPUT
+    results, dict of pipeline: measurements
+
+    """
+
+    results = {}
+    for name in pipelines:
+        queue = multiprocessing.Queue()
+        p = multiprocessing.Process(target = _run_pipeline,
+                                    args = (name, archive_path, year, processes,
+                                            queue))
+        p.start()
+        p.join()
+        if p.exitcode != 0 or queue.empty():
+            warning('Benchmark failed', name, 'exit code %s' % p.exitcode)
+            continue
+        results[name] = queue.get()
+
+    return results
+
+def report(results):
+    """Print per-stage wall time and throughput of each pipeline"""
+
+    for name in sorted(results):
+        r = results[name]
+        wall = r['wall'] or 1e-9
+        print '%s: %.3fs wall, %d pages (%.1f pages/s, %.1f KB), ' \
+              '%d rows (%.1f rows/s), peak %.1f MB' % \
+              (name, r['wall'], r['pages'], r['pages'] / wall,
+               r['bytes'] / 1024., r['rows'], r['rows'] / wall, r['peak_mb'])
+        stages = sorted(r['stages'].items(), key = lambda x: -x[1])
+        for stage, seconds in stages:
+            print '    %-12s %8.3fs %5.1f%% %6d calls' % \
+                  (stage, seconds, 100 * seconds / wall,
+                   r['calls'].get(stage, 0))
+
+def check(results, baseline, threshold = 0.25, min_seconds = 0.05):
+    """
+    Compare results against a saved baseline
+
+    INPUT
+    results, baseline, dicts from run()
+    threshold, float allowed fractional slowdown of a stage
+    min_seconds, float slowdowns smaller than this are noise
+
+    OUTPUT
+    regressions, list of str, empty if none
+
+    """
+
+    regressions = []
+    for name, r in results.items():
+        if name not in baseline:
+            continue
+        base = baseline[name]
+        measured = dict(r['stages'], wall = r['wall'])
+        expected = dict(base['stages'], wall = base['wall'])
+        for stage, seconds in sorted(measured.items()):
+            if stage not in expected:
+                continue
+            limit = expected[stage] * (1 + threshold)
+            if seconds > limit and seconds - expected[stage] > min_seconds:
+                regressions.append('%s %s: %.3fs, baseline %.3fs' %
+                                   (name, stage, seconds, expected[stage]))
+
+    return regressions
+
+def bench_regex(sizes = (100, 200, 400, 800, 1600), limit = 10.):
+    """
+    Time the legacy regex against legisparser.parse_left on malformed pages
+    Sizes are skipped for the regex once one run takes longer than limit.
+
+    OUTPUT
+    results, list of (case, size, regex seconds or None, parser seconds)
+
+    """
+
+    from legisparser import parse_left
+
+    results = []
+    for case in sorted(ADVERSARIAL):
+        slow = False
+        for n in sizes:
+            text = ADVERSARIAL[case](n)
+
+            legacy = None
+            if not slow:
+                start = time.time()
+                LEGACY_LEFT_REGEX.search(text)
+                legacy = time.time() - start
+                slow = legacy > limit
+
+            start = time.time()
+            parse_left(text)
+            parser = time.time() - start
+
+            results.append((case, n, legacy, parser))
+
+    return results
+
+# url pattern: the div class parsed out of those pages
+PARSE_TARGETS = [(re.compile(r'/legislators/\w+/?$'), 'rounded'),
+                 (re.compile(r'/legislators/\w+/\d+$'), 'span6'),
+                 (re.compile(r'/author_index/'), 'authorindex'),
+                 (re.compile(r'/committees/\w+/\d+'), 'span5')]
+
+def bench_parse(archive_path, repeat = 3):
+    """
+    Time full BeautifulSoup trees against utils.find_divs on archived pages
+
+    INPUT
+    archive_path, str archive recorded with archive.Archive
+    repeat, int times each page is parsed
+
+    OUTPUT
+    results, dict of div class: [pages, full seconds, strained seconds,
+                                 full nodes, strained nodes, mismatches]
+
+    """
+
+    from archive import Archive
+    from bs4 import BeautifulSoup
+
+    archive = Archive(archive_path)
+    results = {}
+    for url in sorted(archive.urls):
+        cls = None
+        for pattern, c in PARSE_TARGETS:
+            if pattern.search(url):
+                cls = c
+                break
+        if cls is None:
+            continue
+
+        text = archive.get(url)
+        r = results.setdefault(cls, [0, 0., 0., 0, 0, 0])
+        r[0] += 1
+
+        start = time.time()
+        for i in xrange(repeat):
+            full = BeautifulSoup(text, 'lxml')
+            divs = full.body.find_all('div', attrs = {'class': cls})
+        r[1] += (time.time() - start) / repeat
+
+        start = time.time()
+        for i in xrange(repeat):
+            strained = find_divs(text, cls)
+        r[2] += (time.time() - start) / repeat
+
+        # tree size stands in for memory per page
+        r[3] += sum(1 for node in full.descendants)
+        r[4] += sum(1 for div in strained for node in div.descendants)
+        if [d.get_text() for d in divs] != [d.get_text() for d in strained]:
+            r[5] += 1
+            warning('Strained parse differs', url)
+
+    archive.close()
+    return results
+
+# a legislator page as text, with the quotes and dashes of the site
+LEFT_TEXT = u'\n\nRepresentative Scott Allen\n\nAssembly District 97 ' + \
+            u'(R \u2013 Waukesha)\nMadison Office:\n  Room 8 North\n' + \
+            u'Biography\n\u201cScott\u201d was born in Ren\xe9\u2019s ' + \
+            u'town \u2014 Waukesha, and serves on the Committee on ' + \
+            u'Ways and Means.\n'
+
+def bench_unicode(sizes = (1, 10, 100, 1000), repeat = 20):
+    """
+    Time the five regex rm_unicode against the translation table
+
+    INPUT
+    sizes, int copies of a legislator page in the text
+    repeat, int times each text is folded
+
+    OUTPUT
+    list of (size in KB, regex seconds, table seconds, batch seconds, 
+             same bool)
+        batch is rm_unicode_all of the copies as a list of pages
+
+    """
+
+    results = []
+    for n in sizes:
+        text = LEFT_TEXT * n
+        pages = [LEFT_TEXT] * n
+
+        start = time.time()
+        for i in xrange(repeat):
+            legacy = legacy_rm_unicode(text)
+        regex = (time.time() - start) / repeat
+
+        start = time.time()
+        for i in xrange(repeat):
+            folded = rm_unicode(text)
+        table = (time.time() - start) / repeat
+
+        start = time.time()
+        for i in xrange(repeat):
+            batch = rm_unicode_all(pages)
+        batched = (time.time() - start) / repeat
+
+        same = legacy == folded and ''.join(batch) == folded
+        results.append((len(text) / 1024., regex, table, batched, same))
+
+    return results
+
+# a Joint committee feed item, most are reports, minutes, agendas, ...
+FEED_ITEM = '<item><guid isPermaLink="false">%d</guid>' + \
+            '<link>http://docs.legis.wisconsin.gov/2015/committees/joint/%d</link>' + \
+            '<title>Joint Committee on Finance%s - 2016-12-17</title>' + \
+            '<description>Joint Committee on Finance</description>' + \
+            '<pubDate>Sat, 17 Dec 2016 07:35:58 -0600</pubDate>' + \
+            '<a10:updated>2016-12-17T07:35:58-06:00</a10:updated></item>'
+FEED_KINDS = ['', ' Report', ' Minutes', ' Agenda', ' Audio', ' Proposed']
+
+def joint_feed(n):
+    """Joint committee feed of n items"""
+
+    items = ''.join([FEED_ITEM % (i, i, FEED_KINDS[i % len(FEED_KINDS)])
+                     for i in xrange(n)])
+    return '<?xml version="1.0"?><rss xmlns:a10="http://www.w3.org/2005/Atom"' + \
+           ' version="2.0"><channel><title>Joint</title>' + items + \
+           '</channel></rss>'
+
+def _run_feed(method, n, results):
+    """
+    Child process: parse a Joint feed of n items with method
+    Puts (seconds, committees, peak MB added by parsing) on results
+    """
+
+    from getcommittee import GetCommittee
+
+    text = joint_feed(n)
+    committee = GetCommittee.__new__(GetCommittee)
+    committee.stamps = {}
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    start = time.time()
+    if method == 'xmltodict':
+        import xmltodict
+        items = xmltodict.parse(text)['rss']['channel']['item']
+        kept = [i for i in items if committee.edit_Joint_Committee(i)]
+    else:
+        kept = committee.get_committee_metadata(text, 'Joint')
+    seconds = time.time() - start
+
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results.put((seconds, len(kept), (after - before) / 1024.))
+
+def bench_feed(n = 20000):
+    """
+    Time and peak memory of parsing a Joint feed of n items, the old
+    xmltodict tree against the streaming utils.iter_feed, each in a fresh
+    process. xmltodict is skipped if it is not installed.
+
+    OUTPUT
+    results, dict of method: (seconds, committees kept, peak MB)
+
+    """
+
+    results = {}
+    for method in ['xmltodict', 'iter_feed']:
+        queue = multiprocessing.Queue()
+        p = multiprocessing.Process(target = _run_feed,
+                                    args = (method, n, queue))
+        p.start()
+        p.join()
+        if p.exitcode != 0 or queue.empty():
+            warning('Feed benchmark failed', method)
+            continue
+        results[method] = queue.get()
+
+    return results
+
+def main(argv):
+    """Command line, see module docstring"""
+
+    parser = argparse.ArgumentParser(description = 'Benchmark the scrapers')
+    commands = parser.add_subparsers(dest = 'command')
+
+    crawl = commands.add_parser('crawl', help = 'replay an archive')
+    crawl.add_argument('archive')
+    crawl.add_argument('--only', default = ','.join(PIPELINES))
+    crawl.add_argument('--year', type = int, default = 2017)
+    crawl.add_argument('--save', help = 'write results as a baseline')
+    crawl.add_argument('--check', help = 'fail on regression from baseline')
+    crawl.add_argument('--threshold', type = float, default = 0.25)
+    crawl.add_argument('--processes', type = int, default = 1)
+
+    regex = commands.add_parser('regex', help = 'legislator page parsing '
+                                'on adversarial input')
+    regex.add_argument('--limit', type = float, default = 10.)
+
+    parse = commands.add_parser('parse', help = 'full against strained '
+                                'html parsing of archived pages')
+    parse.add_argument('archive')
+    parse.add_argument('--repeat', type = int, default = 3)
+
+    feed = commands.add_parser('feed', help = 'xmltodict against streaming '
+                               'parsing of a large Joint committee feed')
+    feed.add_argument('--items', type = int, default = 20000)
+
+    uni = commands.add_parser('unicode', help = 'five regex against '
+                              'translation table rm_unicode')
+    uni.add_argument('--repeat', type = int, default = 20)
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'crawl':
+        results = run(args.archive, args.only.split(','), args.year,
+                      args.processes)
+        report(results)
+
+        if args.save:
+            with open(args.save, 'w') as f:
+                json.dump(results, f, indent = 1, sort_keys = True)
+
+        if args.check:
+            with open(args.check, 'r') as f:
+                baseline = json.load(f)
+            regressions = check(results, baseline, args.threshold)
+            if regressions:
+                warning('Regressions beyond %d%%' % (100 * args.threshold),
+                        *regressions)
+                return 1
+
+    elif args.command == 'regex':
+        print '%-14s %6s %10s %10s' % ('case', 'size', 'regex', 'parser')
+        for case, n, legacy, parser in bench_regex(limit = args.limit):
+            legacy = '%9.4fs' % legacy if legacy is not None else 'skipped'
+            print '%-14s %6d %10s %9.5fs' % (case, n, legacy, parser)
+
+    elif args.command == 'parse':
+        print '%-12s %6s %10s %10s %10s %10s %5s' % \
+              ('div', 'pages', 'full', 'strained', 'full n', 'strained n', 'diff')
+        for cls, r in sorted(bench_parse(args.archive, args.repeat).items()):
+            print '%-12s %6d %9.3fs %9.3fs %10d %10d %5d' % tuple([cls] + r)
+
+    elif args.command == 'feed':
+        print '%-10s %9s %6s %9s' % ('parser', 'time', 'kept', 'peak')
+        for method, r in sorted(bench_feed(args.items).items()):
+            print '%-10s %8.3fs %6d %7.1fMB' % ((method,) + r)
+
+    elif args.command == 'unicode':
+        print '%9s %10s %10s %10s %5s' % ('size', 'regex', 'table', 'batch',
+                                          'same')
+        for r in bench_unicode(repeat = args.repeat):
+            print '%7.1fKB %9.5fs %9.5fs %9.5fs %5s' % r
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,291 @@
+from utils import *
+from cStringIO import StringIO
+import collections
+import httplib
+import socket
+import threading
+import urllib2
+import urlparse
+import zlib
+
+# statuses followed to their Location
+REDIRECTS = set([301, 302, 303, 307, 308])
+# redirects for good, the only ones a scheme is learned from
+PERMANENT = set([301, 308])
+
+class Client(object):
+    """
+    Shared http client, keeping connections alive in a pool per host
+
+    Every request asks for gzip or deflate and the body is decoded here.
+    Urls are normalized so each host has one pool: the host is lowercased,
+    default ports dropped, and the scheme is the one set for the host, or
+    learned from a permanent redirect (301, 308) of the host to itself, eg
+    http to https, so later pages skip the redirect.
+
+
+    Example
+
+    from client import Client
+    from getdata import GetData
+    client = Client().install()
+    GetData().getlegislators()
+    client.report()
+
+    """
+
+    def __init__(self, schemes = None, max_idle = 8, max_redirects = 5,
+                 timeout = None):
+        """
+        Setup
+
+        INPUT
+        schemes, dict of host: 'http' or 'https' to always use for it
+        max_idle, int connections kept open per host
+        max_redirects, int redirects followed per request
+        timeout, seconds to wait on a connection, None for no limit
+
+        """
+
+        self.schemes = dict(schemes or {})
+        self.max_idle = max_idle
+        self.max_redirects = max_redirects
+        self.timeout = timeout
+
+        # (scheme, host): deque of idle connections
+        self.idle = collections.defaultdict(collections.deque)
+        # host: dict of statistics
+        self.counts = collections.defaultdict(Client.new_stats)
+        self.lock = threading.Lock()
+        # the client under ours while installed, see install()
+        self.previous = None
+        self.installed = False
+
+    @staticmethod
+    def new_stats():
+        return dict.fromkeys(['requests', 'connections', 'reused', 'stale',
+                              'redirects', 'bytes', 'wire bytes'], 0)
+
+    def install(self):
+        """Send every network request through this client"""
+
+        self.previous = install_client(self)
+        self.installed = True
+        return self
+
+    def uninstall(self):
+        """Close the pools and request through the previous client again"""
+
+        if self.installed:
+            install_client(self.previous)
+            self.previous = None
+            self.installed = False
+        self.close()
+
+    def normalize(self, url):
+        """
+        One form of url per host
+
+        OUTPUT
+        scheme, host, str url
+
+        """
+
+        parts = urlparse.urlsplit(url)
+        host = parts.hostname.lower() if parts.hostname else ''
+        port = parts.port
+        scheme = self.schemes.get(host, parts.scheme.lower() or 'http')
+        if port and port != {'http': 80, 'https': 443}.get(scheme):
+            host += ':%d' % port
+        url = urlparse.urlunsplit((scheme, host, parts.path or '/',
+                                   parts.query, ''))
+
+        return scheme, host, url
+
+    def _connection(self, scheme, host, timeout):
+        """
+        An idle connection to host, else a new one
+
+        OUTPUT
+        conn, reused bool
+
+        """
+
+        with self.lock:
+            idle = self.idle[scheme, host]
+            if idle:
+                conn = idle.pop()
+                self.counts[host]['reused'] += 1
+                reused = True
+            else:
+                conn = None
+                self.counts[host]['connections'] += 1
+                reused = False
+
+        if conn is None:
+            if scheme == 'https':
+                conn = httplib.HTTPSConnection(host, timeout = timeout)
+            else:
+                conn = httplib.HTTPConnection(host, timeout = timeout)
+        else:
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+
+        return conn, reused
+
+    def _put_back(self, scheme, host, conn):
+        """Keep an open connection for the next request to host"""
+
+        with self.lock:
+            idle = self.idle[scheme, host]
+            if len(idle) < self.max_idle:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def _send(self, scheme, host, path, headers, timeout):
+        """
+        One request over a pooled connection, retried once on a fresh
+        connection if the server closed a kept-alive one
+
+        OUTPUT
+        status, reason, msg, dict of lowercased headers, str raw body
+
+        """
+
+        while True:
+            conn, reused = self._connection(scheme, host, timeout)
+            try:
+                conn.request('GET', path, headers = headers)
+                response = conn.getresponse()
+                body = response.read()
+            except socket.timeout:
+                conn.close()
+                raise
+            except (httplib.HTTPException, socket.error):
+                conn.close()
+                if not reused:
+                    raise
+                with self.lock:
+                    self.counts[host]['stale'] += 1
+                continue
+
+            if response.will_close:
+                conn.close()
+            else:
+                self._put_back(scheme, host, conn)
+
+            return response.status, response.reason, response.msg, \
+                   dict(response.getheaders()), body
+
+    def get(self, url, headers = None, timeout = None):
+        """
+        Request url, following redirects
+        Used by utils.http_request() and utils.fetch_txt() once installed
+
+        INPUT
+        url, str
+        headers, dict of request headers
+        timeout, seconds, None for self.timeout
+
+        OUTPUT
+        status, info, text, see utils.http_get(), text decoded
+
+        """
+
+        headers = dict(headers or {})
+        headers.setdefault('Accept-Encoding', 'gzip, deflate')
+        if timeout is None:
+            timeout = self.timeout
+
+        for i in xrange(self.max_redirects + 1):
+            scheme, host, url = self.normalize(url)
+            parts = urlparse.urlsplit(url)
+            path = parts.path + ('?' + parts.query if parts.query else '')
+
+            status, reason, msg, info, body = self._send(scheme, host, path,
+                                                         headers, timeout)
+            with self.lock:
+                self.counts[host]['requests'] += 1
+                self.counts[host]['wire bytes'] += len(body)
+
+            if status in REDIRECTS and 'location' in info:
+                new = urlparse.urljoin(url, info['location'])
+                new_scheme, new_host, _ = self.normalize(new)
+                # the host moved itself for good, eg to https, go there
+                # directly
+                if status in PERMANENT and new_host == host and \
+                   new_scheme != scheme:
+                    with self.lock:
+                        self.schemes[parts.hostname] = new_scheme
+                with self.lock:
+                    self.counts[host]['redirects'] += 1
+                url = new
+                continue
+            break
+
+        text = decode(body, info.get('content-encoding'))
+        with self.lock:
+            self.counts[host]['bytes'] += len(text)
+
+        if status == 304:
+            return 304, info, ''
+        if status >= 400 or status in REDIRECTS:
+            # as urllib2 raises it
+            raise urllib2.HTTPError(url, status, reason, msg, StringIO(text))
+
+        return status, info, text
+
+    def stats(self):
+        """
+        Statistics of the client so far
+
+        OUTPUT
+        dict of host: dict of
+            requests, int sent, redirects included
+            connections, int opened
+            reused, int requests over a kept-alive connection
+            stale, int kept-alive connections found closed
+            redirects, int followed
+            bytes, wire bytes, int of the bodies decoded and as received
+
+        """
+
+        with self.lock:
+            return dict((host, dict(s)) for host, s in self.counts.items())
+
+    def report(self):
+        """Print the connection reuse and compression of each host"""
+
+        for host, s in sorted(self.stats().items()):
+            reuse = 100. * s['reused'] / max(s['reused'] + s['connections'], 1)
+            saved = 100. * (1 - s['wire bytes'] / float(max(s['bytes'], 1)))
+            print '%s: %d requests, %d connections, %.0f%% reused, ' \
+                  '%d stale, %d redirects' % (host, s['requests'],
+                  s['connections'], reuse, s['stale'], s['redirects'])
+            print '    %.1f KB received for %.1f KB, %.0f%% saved' % \
+                  (s['wire bytes'] / 1024., s['bytes'] / 1024., saved)
+
+    def close(self):
+        """Close every idle connection"""
+
+        with self.lock:
+            for idle in self.idle.values():
+                while idle:
+                    idle.pop().close()
+
+def decode(body, encoding):
+    """Body of a response in its content-encoding, gzip or deflate"""
+
+    encoding = (encoding or '').strip().lower()
+    if encoding in ('gzip', 'x-gzip'):
+        return zlib.decompress(body, 16 + zlib.MAX_WBITS)
+    if encoding == 'deflate':
+        # zlib wrapped as the rfc says, or raw as some servers send it
+        try:
+            return zlib.decompress(body)
+        except zlib.error:
+            return zlib.decompress(body, -zlib.MAX_WBITS)
+
+    return body
@@ -0,0 +1,230 @@
+"""
+Sparse legislator x bill and co-authorship matrices
+
+BillIndex of legislators.csv, the bills of the author index and the
+cosponsored proposals of each legislator, is read once into a legislator
+x bill incidence matrix in CSR arrays: the bills of the legislator of row
+i are indices[indptr[i]:indptr[i + 1]]. Its product with its transpose is
+the legislator x legislator co-authorship matrix, the number of bills two
+legislators share, with each legislator's own number of bills on the
+diagonal. Both are saved to one .npz, with the PIDs and bills of the rows
+and columns, see npz.py, so a row of either is a slice.
+
+In sessions.csv a bill number is reused each session, so its bills are
+'session:bill', eg '2015:ab47'.
+
+
+Example
+
+from cosponsor import Cosponsorship
+co = Cosponsorship.load('legislators.csv')
+co.coauthors('1533')[:5]        # [('1638', 12), ...]
+co.save('cosponsor.npz')
+
+import numpy as np, scipy.sparse  # if installed
+f = np.load('cosponsor.npz')
+A = scipy.sparse.csr_matrix((f['data'], f['indices'], f['indptr']))
+
+"""
+
+from utils import *
+from records import read_legislators
+from npz import load_npz, save_npz
+import array
+
+class Matrix(object):
+    """
+    Sparse matrix in CSR arrays, sorted column indices in each row
+
+    INPUT
+    indptr, array.array('i') of nrows + 1 row starts in indices and data
+    indices, array.array('i') column of each item
+    data, array.array of the items
+    ncols, int
+
+    """
+
+    def __init__(self, indptr, indices, data, ncols):
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.shape = (len(indptr) - 1, ncols)
+
+    def row(self, i):
+        """(column, value) of the items of row i"""
+
+        lo, hi = self.indptr[i], self.indptr[i + 1]
+        return zip(self.indices[lo:hi], self.data[lo:hi])
+
+    def transpose(self):
+        """The transpose, in CSR, by a counting sort on the columns"""
+
+        nrows, ncols = self.shape
+        counts = array.array('i', [0]) * (ncols + 1)
+        for j in self.indices:
+            counts[j + 1] += 1
+        for j in xrange(ncols):
+            counts[j + 1] += counts[j]
+
+        indptr = array.array('i', counts)
+        fill = array.array('i', counts)
+        indices = array.array('i', [0]) * len(self.indices)
+        data = array.array(self.data.typecode, [0]) * len(self.data)
+        for i in xrange(nrows):
+            for k in xrange(self.indptr[i], self.indptr[i + 1]):
+                j = self.indices[k]
+                indices[fill[j]] = i
+                data[fill[j]] = self.data[k]
+                fill[j] += 1
+
+        return Matrix(indptr, indices, data, nrows)
+
+    def dot(self, other):
+        """
+        Product with other, row by row, each row summed in a dict
+        Values are int32
+        """
+
+        indptr, indices, data = array.array('i', [0]), array.array('i'), \
+                                array.array('i')
+        for i in xrange(self.shape[0]):
+            acc = {}
+            for k in xrange(self.indptr[i], self.indptr[i + 1]):
+                a = self.data[k]
+                o = self.indices[k]
+                for m in xrange(other.indptr[o], other.indptr[o + 1]):
+                    j = other.indices[m]
+                    acc[j] = acc.get(j, 0) + a * other.data[m]
+            for j in sorted(acc):
+                indices.append(j)
+                data.append(acc[j])
+            indptr.append(len(indices))
+
+        return Matrix(indptr, indices, data, other.shape[1])
+
+class Cosponsorship(object):
+    """
+    Incidence and co-authorship matrices of legislators and bills
+
+    INPUT
+    pids, list of str PID of the rows
+    bills, list of str bill of the columns of incidence
+    incidence, Matrix legislator x bill, int8 1 for a bill of the
+        legislator
+    coauthorship, Matrix legislator x legislator, None to compute it
+
+    """
+
+    def __init__(self, pids, bills, incidence, coauthorship = None):
+        self.pids = pids
+        self.bills = bills
+        self.incidence = incidence
+        if coauthorship is None:
+            with timed('coauthorship'):
+                coauthorship = incidence.dot(incidence.transpose())
+        self.coauthorship = coauthorship
+        self.rows = dict((p, i) for i, p in enumerate(pids))
+
+    @classmethod
+    def load(cls, fn = 'legislators.csv'):
+        """
+        Matrices of the BillIndex of legislators.csv or sessions.csv
+        A legislator of several sessions is one row
+        """
+
+        pids, rows = [], {}
+        bills, columns = [], {}
+        # row: set of columns
+        incidence = defaultdict(set)
+        for leg in read_legislators(fn):
+            if leg.PID not in rows:
+                rows[leg.PID] = len(pids)
+                pids.append(leg.PID)
+            for bill in leg.BillIndex or ():
+                if leg.Session:
+                    bill = '%s:%s' % (leg.Session, bill)
+                if bill not in columns:
+                    columns[bill] = len(bills)
+                    bills.append(bill)
+                incidence[rows[leg.PID]].add(columns[bill])
+
+        indptr, indices = array.array('i', [0]), array.array('i')
+        for i in xrange(len(pids)):
+            indices.extend(sorted(incidence[i]))
+            indptr.append(len(indices))
+        data = array.array('b', [1]) * len(indices)
+
+        return cls(pids, bills, Matrix(indptr, indices, data, len(bills)))
+
+    @classmethod
+    def open(cls, fn = 'cosponsor.npz'):
+        """Matrices saved by save()"""
+
+        arrays = dict((name, items) for name, (items, shape)
+                      in load_npz(fn).items())
+        pids, bills = arrays['pids'], arrays['bills']
+        incidence = Matrix(arrays['indptr'], arrays['indices'],
+                           arrays['data'], len(bills))
+        coauthorship = Matrix(arrays['co_indptr'], arrays['co_indices'],
+                              arrays['co_data'], len(pids))
+
+        return cls(pids, bills, incidence, coauthorship)
+
+    def save(self, fn = 'cosponsor.npz'):
+        """
+        Save both matrices and their PIDs and bills
+
+        SAVE TO FILE cosponsor.npz
+        indptr, indices, data, the legislator x bill CSR arrays
+        co_indptr, co_indices, co_data, the legislator x legislator ones
+        pids, bills, of the rows and columns
+
+        """
+
+        save_npz(fn, {'indptr': self.incidence.indptr,
+                      'indices': self.incidence.indices,
+                      'data': self.incidence.data,
+                      'co_indptr': self.coauthorship.indptr,
+                      'co_indices': self.coauthorship.indices,
+                      'co_data': self.coauthorship.data,
+                      'pids': self.pids, 'bills': self.bills})
+
+    def bills_of(self, pid):
+        """Bills of a PID"""
+
+        if pid not in self.rows:
+            return []
+        return [self.bills[j] for j, x in self.incidence.row(self.rows[pid])]
+
+    def coauthors(self, pid):
+        """
+        Legislators sharing bills with a PID, most shared first
+
+        OUTPUT
+        list of (str PID, int bills shared)
+
+        """
+
+        if pid not in self.rows:
+            return []
+        i = self.rows[pid]
+        shared = [(self.pids[j], n) for j, n in self.coauthorship.row(i)
+                  if j != i]
+
+        return sorted(shared, key = lambda x: (-x[1], x[0]))
+
+    def pairs(self, n = None):
+        """
+        Pairs of legislators by bills shared, most first
+
+        OUTPUT
+        list of (str PID, str PID, int bills shared)
+
+        """
+
+        pairs = [(self.pids[i], self.pids[j], x)
+                 for i in xrange(len(self.pids))
+                 for j, x in self.coauthorship.row(i) if j > i]
+        pairs.sort(key = lambda x: (-x[2], x[0], x[1]))
+
+        return pairs[:n] if n else pairs
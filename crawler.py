@@ -0,0 +1,161 @@
+from utils import *
+from getdata import GetData
+from httpcache import HTTPCache
+from sinks import CSVSink
+from sqlsink import LegislatorSQLSink
+import csv
+import threading
+import Queue
+
+# end of the rows of one (year, house)
+DONE = None
+
+class Crawler(object):
+    """
+    Crawl the legislators of many (session year, house) pairs in one job
+
+    Pairs are crawled in parallel over one fetcher, so per-host limits
+    hold across the whole job. The pairs also share the parse pool, parse
+    cache, crawl state and journal of one GetData, each of which locks
+    its own updates, so one pair waiting on its pages does not hold up
+    the others. Rows are written in the order the pairs are given to one
+    session-keyed 'sessions.csv': the columns of legislators.csv after a
+    Session column.
+
+
+    Example
+
+    from crawler import Crawler
+    pairs = [(year, house) for year in xrange(2009, 2019, 2)
+                           for house in ['assembly', 'senate']]
+    Crawler(pairs, cache = '.httpcache').crawl(db = 'legis.db')
+
+    """
+
+    def __init__(self, pairs, parallel = 2, workers = 8, per_host = 4,
+                 window = 32, cache = None, incremental = False,
+                 state = 'crawl_state.json', 
+                 journal = 'sessions_journal.jsonl', processes = 1,
+                 parse_cache = None, resume = False):
+        """
+        Setup
+
+        INPUT
+        pairs, list of (int year, str house 'assembly' or 'senate')
+        parallel, int pairs crawled at once
+        workers, per_host, window, incremental, state, journal, processes,
+            parse_cache, resume, see GetData, the pairs share the parsing
+            processes and the parse cache
+        cache, str directory of an HTTPCache shared by the job, installed
+            while crawling, None for whatever loader is installed
+
+        """
+
+        self.pairs = [(str(year), house) for year, house in pairs]
+        self.parallel = max(1, parallel)
+        self.data = GetData(workers, per_host, window, incremental, state,
+                            journal = journal, processes = processes,
+                            parse_cache = parse_cache, resume = resume)
+        self.failed = []
+        self.cache = HTTPCache(cache) if cache else None
+
+        # rows buffered per pair ahead of the writer
+        self.buffer = 4 * window
+
+    def _crawl_pair(self, year, house, rows):
+        """Thread: put the rows of one pair on rows, then DONE"""
+
+        try:
+            for legis in self.data._getlegislators_rows(house, year):
+                rows.put(legis)
+        except Exception as e:
+            warning('Crawl failed, rows after this are missing', year, house,
+                    repr(e))
+            self.failed.append((year, house))
+        finally:
+            rows.put(DONE)
+
+    def rows(self):
+        """
+        Rows of every pair, in the order of the pairs, loaded through the
+        cache if any
+
+        OUTPUT
+        generator of (year, legis), legis the fields in legislators.csv
+
+        """
+
+        queues = []
+        if self.cache:
+            self.cache.install()
+
+        def start(i):
+            year, house = self.pairs[i]
+            rows = Queue.Queue(self.buffer)
+            t = threading.Thread(target = self._crawl_pair,
+                                 args = (year, house, rows))
+            t.daemon = True
+            t.start()
+            queues.append(rows)
+
+        # the pair being written and the next parallel-1 pairs are running
+        try:
+            for i, (year, house) in enumerate(self.pairs):
+                while len(queues) < min(i + self.parallel, len(self.pairs)):
+                    start(len(queues))
+
+                while True:
+                    legis = queues[i].get()
+                    if legis is DONE:
+                        break
+                    yield year, legis
+                queues[i] = None
+        finally:
+            # and the index saved
+            if self.cache:
+                self.cache.uninstall()
+
+    def crawl(self, fn = 'sessions.csv', flush = 1, fsync = False,
+              db = None):
+        """
+        Crawl every pair to one file
+
+        INPUT
+        fn, str csv file, the columns of legislators.csv after Session
+        flush, fsync, db, see GetData.getlegislators()
+
+        OUTPUT
+        int number of rows written
+
+        """
+
+        header = ['Session'] + GetData.header
+        rows = CSVSink(fn, header, flush = flush, fsync = fsync,
+                       delimiter='|', quoting = csv.QUOTE_NONE,
+                       escapechar = '\\')
+
+        # one database sink per session
+        dbs = {}
+
+        try:
+            for year, legis in self.rows():
+                rows.write([year] + legis)
+                if db is not None:
+                    if year not in dbs:
+                        dbs[year] = LegislatorSQLSink(db, year)
+                    dbs[year].write(legis)
+        finally:
+            rows.close()
+            for out in dbs.values():
+                out.close()
+            self.data.parsers.close()
+
+        if self.data.state:
+            self.data.state.save()
+        if self.data.parse_cache:
+            self.data.parse_cache.save()
+        # keep the journal of failed pairs to resume them
+        if self.data.journal and not self.failed:
+            self.data.journal.finish()
+
+        return rows.rows
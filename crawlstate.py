@@ -0,0 +1,120 @@
+from utils import *
+import hashlib
+import json
+import os
+import threading
+
+class CrawlState(object):
+    """
+    Rows of the last crawl with the update stamp and content hash they
+    were made from, so an incremental crawl only redoes what changed
+
+
+    Example
+
+    from getcommittee import GetCommittee
+    GetCommittee(incremental = True)
+
+    """
+
+    def __init__(self, path = 'crawl_state.json'):
+        """
+        Load the state of the last crawl, if any
+
+        INPUT
+        path, str json file
+
+        """
+
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        # the pairs of a crawler.Crawler share one state
+        self.lock = threading.Lock()
+
+        # key: {stamp, hash, row}
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                self.entries = json.load(f)
+
+        # json gives unicode, the csv writers want str
+        for entry in self.entries.values():
+            entry['row'] = [encode(x) for x in entry['row']]
+
+    def fresh(self, key, stamp):
+        """
+        Row of key if it was made from the same update stamp
+
+        INPUT
+        key, str eg committee url
+        stamp, str eg a10:updated of the feed item
+
+        OUTPUT
+        row, list, None if stale or unknown
+
+        """
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if stamp and entry and entry['stamp'] == stamp:
+                self.hits += 1
+                return entry['row']
+
+            self.misses += 1
+            return None
+
+    def unchanged(self, key, *texts):
+        """
+        Row of key if it was made from the same page texts
+
+        INPUT
+        key, str eg legislator official url
+        texts, str page bodies the row is parsed from
+
+        OUTPUT
+        row, list, None if changed or unknown
+
+        """
+
+        digest = content_hash(*texts)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry['hash'] == digest:
+                self.hits += 1
+                return entry['row']
+
+            self.misses += 1
+            return None
+
+    def update(self, key, row, stamp = None, texts = ()):
+        """Remember the row of key, with its stamp and page texts"""
+
+        entry = {'stamp': stamp,
+                 'hash': content_hash(*texts) if texts else None,
+                 'row': row}
+        with self.lock:
+            self.entries[key] = entry
+
+    def save(self):
+        """Write the state to disk"""
+
+        tmp = self.path + '.tmp'
+        with self.lock, open(tmp, 'w') as f:
+            json.dump(self.entries, f)
+        os.rename(tmp, self.path)
+
+def encode(x):
+    """utf8 str of unicode x"""
+
+    return x.encode('utf8') if isinstance(x, unicode) else x
+
+def content_hash(*texts):
+    """sha1 of page texts"""
+
+    sha = hashlib.sha1()
+    for text in texts:
+        sha.update(encode(text) or '')
+        sha.update('\0')
+
+    return sha.hexdigest()
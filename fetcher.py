@@ -0,0 +1,208 @@
+from utils import *
+import utils
+import collections
+import threading
+import time
+import Queue
+import urlparse
+
+class Fetcher(object):
+    """
+    Bounded-concurrency page fetcher
+    Pages are loaded with load_txt on a pool of worker threads, a failed
+    load is retried a few times before the page is given up as None,
+    unless a scheduler is installed, which does the retrying itself
+
+
+    Example
+
+    from fetcher import Fetcher
+    fetcher = Fetcher(workers = 16, per_host = 8)
+    for url, text in fetcher.fetch(urls):
+        ...
+    pages = fetcher.fetch_all(urls)
+    for item, pages in fetcher.imap(items, urls_of, window = 32):
+        ...
+
+    """
+
+    def __init__(self, workers = 8, per_host = 4, retries = 2, backoff = .5):
+        """
+        Setup
+
+        INPUT
+        workers, int number of worker threads
+        per_host, int max requests in flight to any one host
+        retries, int loads of a failed page after the first
+        backoff, seconds before the first retry, doubled on each retry
+
+        """
+
+        self.workers = workers
+        self.per_host = per_host
+        self.retries = retries
+        self.backoff = backoff
+
+        # one semaphore per host, created on demand
+        self._hosts = {}
+        self._hosts_lock = threading.Lock()
+
+    def _host_slot(self, url):
+        """Semaphore limiting concurrent requests to the host of url"""
+
+        host = urlparse.urlparse(url).netloc
+        with self._hosts_lock:
+            if host not in self._hosts:
+                self._hosts[host] = threading.BoundedSemaphore(self.per_host)
+            return self._hosts[host]
+
+    def _worker(self, todo, done):
+        """Take (tag, url) from todo, put (tag, url, text, error) on done"""
+
+        while True:
+            task = todo.get()
+            if task is None:
+                return
+
+            tag, url = task
+            done.put((tag, url) + self._load(url))
+
+    def _load(self, url):
+        """(text, None) of url, or (None, the last error) once retries fail"""
+
+        # the scheduler retries each request, see scheduler.py
+        retries = 0 if utils._scheduler is not None else self.retries
+        for i in xrange(retries + 1):
+            if i:
+                # not holding the slot of the host
+                time.sleep(self.backoff * 2 ** (i - 1))
+            with self._host_slot(url):
+                try:
+                    return load_txt(url), None
+                except Exception as e:
+                    error = e
+
+        return None, error
+
+    def _start(self, nthreads, todo, done):
+        """Start nthreads workers on todo"""
+
+        threads = []
+        for i in xrange(nthreads):
+            t = threading.Thread(target = self._worker, args = (todo, done))
+            t.daemon = True
+            t.start()
+            threads.append(t)
+
+        return threads
+
+    def fetch(self, urls):
+        """
+        Fetch all urls, yielding results as they complete
+        Duplicate urls are fetched once.
+
+        INPUT
+        urls, iterable of str url
+
+        OUTPUT
+        generator of (url, text), text is None if the fetch failed
+
+        """
+
+        # dedupe, keep order of submission
+        seen = set()
+        urls = [u for u in urls if not (u in seen or seen.add(u))]
+        if not urls:
+            return
+
+        todo, done = Queue.Queue(), Queue.Queue()
+        for url in urls:
+            todo.put((None, url))
+
+        nthreads = min(self.workers, len(urls))
+        for i in xrange(nthreads):
+            todo.put(None)
+        threads = self._start(nthreads, todo, done)
+
+        for i in xrange(len(urls)):
+            _, url, text, error = done.get()
+            if error is not None:
+                warning('Fetch failed', url, error)
+            yield url, text
+
+        for t in threads:
+            t.join()
+
+    def fetch_all(self, urls):
+        """
+        Fetch all urls
+
+        OUTPUT
+        pages, dict of url: text
+
+        """
+
+        return dict(self.fetch(urls))
+
+    def imap(self, items, urls_of = lambda item: [item], window = 32):
+        """
+        Fetch the urls of each item, yielding items in their order
+        At most window items are fetched ahead of the one being yielded,
+        so memory stays flat however many items there are.
+
+        INPUT
+        items, iterable of anything, eg a generator of legislator sites
+        urls_of, function of an item returning its list of str url
+        window, int max items in flight
+
+        OUTPUT
+        generator of (item, pages), pages dict of url: text, text is None
+            if the fetch failed
+
+        """
+
+        todo, done = Queue.Queue(), Queue.Queue()
+        threads = self._start(self.workers, todo, done)
+
+        # [item, pages, urls left], in order of items
+        pending = collections.deque()
+        items = iter(items)
+
+        def submit():
+            for item in items:
+                urls = []
+                for url in urls_of(item):
+                    if url not in urls:
+                        urls.append(url)
+                entry = [item, {}, len(urls)]
+                pending.append(entry)
+                for url in urls:
+                    todo.put((entry, url))
+                return True
+            return False
+
+        try:
+            while len(pending) < window and submit():
+                pass
+
+            while pending:
+                # wait for the first item, buffering the ones after it
+                while pending[0][2]:
+                    entry, url, text, error = done.get()
+                    if error is not None:
+                        warning('Fetch failed', url, error)
+                    entry[1][url] = text
+                    entry[2] -= 1
+
+                item, pages, _ = pending.popleft()
+                submit()
+                yield item, pages
+        finally:
+            # drop what is queued if stopped early, then stop the workers
+            try:
+                while True:
+                    todo.get_nowait()
+            except Queue.Empty:
+                pass
+            for t in threads:
+                todo.put(None)
@@ -3,9 +3,97 @@ import csv
 import lxml
 import re
 from utils import *
-import xmltodict
+from fetcher import Fetcher
+from crawlstate import CrawlState
+from journal import Journal
+from parsepool import ParsePool
+from parsecache import ParseCache, parser_version
+from sinks import CSVSink, LineSink
+from sqlsink import CommitteeSQLSink
 from collections import defaultdict
 
+# names that are run together with the next name on committee pages are
+# split before a capital following ')', '[a-z]' or '2'
+RUNTOGETHER = re.compile(r'([A-Z|\(]\w+[a-z|\)|2])([A-Z])')
+# '(' after a letter, anchored on the '(' so the scan is fast
+PAREN = re.compile(r'\((?<=[a-z]\()')
+# '\r\n ' and runs of spaces
+CRLF = re.compile(r'\r\n +')
+SPACES = re.compile(r' {2,}')
+# Joint feed items that are not committees, see edit_Joint_Committee()
+OTHER_JOINT = 'records'
+ANNOYING_JOINT = re.compile('Presentation|Report|Proceedings|Minutes|' + 
+                            'Proposed|Audio|Agenda')
+# hearing types
+SESSION = re.compile(r'(Executive|Public) Session ')
+SESSIONS = {'Executive': 'Private', 'Public': 'Public'}
+# positions on a committee, in the order a line is tried for them
+ROLES = [(' (Chair)', 'Chair'), (' (Co-Chair)', 'Co-Chair'), 
+         (' (Vice-Chair)', 'Vice-Chair')]
+# a name up to its last capital, eg Vander of VanderMeer
+NAME_HEAD = re.compile(r'^(.+)[A-Z][^A-Z]*$')
+
+def mask_names(text, names):
+    """
+    Hide names from RUNTOGETHER, eg Rep. VanderMeer
+    
+    The head of a name, up to its last capital, is replaced by a sentinel
+    of NULs, which page text never holds, so the name is not split at its
+    capitals while its tail still splits from a name run into it.
+    
+    INPUT
+    text, str
+    names, list of str
+    
+    OUTPUT
+    text, masked
+    masks, dict of sentinel: head, see unmask_names()
+    
+    """
+    
+    masks = {}
+    for name in names:
+        head = NAME_HEAD.match(name)
+        if head and name in text:
+            mask = '\x00%d\x00' % len(masks)
+            masks[mask] = head.group(1)
+            text = text.replace(name, mask + name[len(head.group(1)):])
+    
+    return text, masks
+
+def unmask_names(text, masks):
+    """text with the sentinels of mask_names() back to the names"""
+    
+    for mask, head in masks.items():
+        text = text.replace(mask, head)
+    
+    return text
+
+def split_role(line, roles = ROLES):
+    """
+    Name and role of a line tagged with a position, eg 'Sen. X (Chair)'
+    
+    Positions are tried in roles order, and a tag that is on the line more
+    than once is not taken as a position.
+    
+    INPUT
+    line, str
+    roles, list of (str tag, str role), see ROLES
+    
+    OUTPUT
+    (name, role), None if the line has no position
+    
+    """
+    
+    if ' (' not in line:
+        return None
+    for tag, role in roles:
+        parts = line.split(tag)
+        if len(parts) == 2:
+            return parts[0], role
+    
+    return None
+
 class GetCommittee(object):
     """
     Get data from website and move it to CSV
@@ -20,9 +108,40 @@ class GetCommittee(object):
     
     """
     
-    def __init__(self):
+    # names split wrongly at their capitals, see edit_committee_info()
+    name_exceptions = ['VanderMeer']
+    # positions of person lines, see split_role()
+    roles = ROLES
+    
+    def __init__(self, workers = 8, per_host = 4, window = 32, flush = 1,
+                 fsync = False, db = None, incremental = False, 
+                 state = 'crawl_state.json', 
+                 journal = 'committees_journal.jsonl', processes = 1,
+                 parse_cache = None, resume = False):
         """
         Get all data for committees
+        Rows are written as they are parsed, see sinks.py
+        
+        INPUT
+        workers, number of pages fetched concurrently
+        per_host, max pages fetched concurrently from one host
+        window, max committees fetched ahead of the one being parsed
+        flush, int rows between flushes of the output files, 0 only at the end
+        fsync, bool, also fsync the output files on each flush
+        db, also load into this database, str sqlite file or a DB-API 
+            connection, see sqlsink.py
+        incremental, bool, only fetch committees whose feed item changed
+            since the last incremental run, reuse the others
+        state, str file of the last incremental run, see crawlstate.py
+        journal, str file of finished feeds and committees, an interrupted
+            crawl can resume from, None for no journal, see journal.py
+        processes, int processes parsing committee sites, None for one per
+            core, 1 to parse in this process, see parsepool.py
+        parse_cache, str file of parse results by page body, committee 
+            sites parsed before by the same parser are not parsed again, 
+            None for no cache, see parsecache.py
+        resume, bool, reuse the feeds and committees in the journal of an
+            interrupted crawl, else the journal is started over
         
         SAVE TO FILE committees.csv
         data
@@ -37,43 +156,82 @@ class GetCommittee(object):
     
         TODO
         Follow more links? Get more research? as I've skipped links for ease.
-        Fix up edit_committee_info, it's long and repetitive.
     
         """
     
         root = 'http://docs.legis.wisconsin.gov/feed/2015/committees/'
         committee_type = ['Senate', 'Assembly', 'Joint', 'Other']
         self.topics = self.get_topics()
-    
-        data = []
-        for ct in committee_type:
-            # metadata
-            # [committee name, committee_type, link]
-            text = load_txt(root+ct)
-            metadata = self.get_committee_metadata(text, ct)
-        
-            # other data
-            infodata = self.get_committee_info(metadata)
-            
-            # write
-            data.extend(infodata)
-        
-        # save list of committees to file
-        with open('committee_list.txt', 'w') as f:
-            for d in data:
-                f.write(d[0] + '\n')
-    
-        # write list of lists to outfile
+        self.fetcher = Fetcher(workers, per_host)
+        self.window = window
+        self.state = CrawlState(state) if incremental else None
+        self.journal = Journal(journal, resume = resume) if journal else None
+        self.parsers = ParsePool(processes, window)
+        self.parse_cache = None
+        if parse_cache:
+            self.parse_cache = ParseCache(parse_cache, 
+                                          {'committee': parser_version(
+                                               *(PARSERS + self.tables()))})
+        # committee url: update stamp of its feed item
+        self.stamps = {}
+    
+        # fetch all feeds concurrently, but those finished before an 
+        # interruption
+        urls = [root+ct for ct in committee_type 
+                if not (self.journal and 'feed:' + ct in self.journal)]
+        with timed('fetch'):
+            feeds = self.fetcher.fetch_all(urls)
+    
+        # list of committees, and list of lists to outfile
         header = ['CommitteeName', 'CommitteeType', 'Link', 
                   'Header', 'Chair', 'CoChair', 
                   'ViceChair', 'CommitteeClerk', 'LegislativeCouncilStaff', 
                   'Member', 'Other', 'Hearings', 'ComTopics']
-        with open('committees.csv', 'w') as f:
-            #quotechar="'", escapechar = '\\', lineterminator = '\r\n'
-            # also see utils.py rm_unicode()
-            writer = csv.writer(f, delimiter='|', quoting = csv.QUOTE_NONE)
-            writer.writerow(header)
-            writer.writerows(data)
+        names = LineSink('committee_list.txt', lambda d: d[0], 
+                         flush = flush, fsync = fsync)
+        #quotechar="'", escapechar = '\\', lineterminator = '\r\n'
+        # also see utils.py rm_unicode()
+        rows = CSVSink('committees.csv', header, mode = 'w', flush = flush,
+                       fsync = fsync, delimiter='|', quoting = csv.QUOTE_NONE)
+        outs = [names, rows]
+        if db is not None:
+            outs.append(CommitteeSQLSink(db))
+        
+        try:
+            for ct in committee_type:
+                # metadata
+                # [committee name, committee_type, link]
+                unit = 'feed:' + ct
+                if self.journal and unit in self.journal:
+                    metadata, stamps = self.journal.get(unit)
+                    self.stamps.update(stamps)
+                else:
+                    text = feeds.get(root+ct)
+                    if text is None:
+                        with timed('fetch'):
+                            text = load_txt(root+ct)
+                    with timed('feed'):
+                        metadata = self.get_committee_metadata(text, ct)
+                    if self.journal:
+                        stamps = dict((m[2], self.stamps.get(m[2])) 
+                                      for m in metadata)
+                        self.journal.record(unit, [metadata, stamps])
+            
+                # other data, written as it comes
+                for d in self.get_committee_info(metadata):
+                    for out in outs:
+                        out.write(d)
+        finally:
+            for out in outs:
+                out.close()
+            self.parsers.close()
+        
+        if self.state:
+            self.state.save()
+        if self.parse_cache:
+            self.parse_cache.save()
+        if self.journal:
+            self.journal.finish()
     
         return None
 
@@ -85,10 +243,9 @@ class GetCommittee(object):
         In the future, check that the information skipped is reasonable
     
         INPUT
-        item, the list of OrderedDicts with metadata on each committee
+        item, dict with metadata on one committee, see utils.iter_feed()
         Parameters and example data:
-            (u'guid', OrderedDict([(u'@isPermaLink', u'false'), 
-                                   ('#text', u'5b7a05a6-...')]))
+            (u'guid', u'5b7a05a6-...')
             (u'link', u'http://docs.legis.wisconsin.gov/2015/committees')
             (u'title', u'Committee Name - 2016-12-17')
             (u'description', u'Committee Name')
@@ -100,22 +257,18 @@ class GetCommittee(object):
     
         """
     
-        OtherJointCommitteeCrap = 'records'
-        AnnoyingJointCommittees = ['Presentation', 'Report', 'Proceedings', 
-                                   'Minutes', 'Proposed', 'Audio', 'Agenda']
-    
-        name = item['description']
-        title = item['title']
+        name = item.get('description')
+        title = item.get('title') or ''
 
         if not name: 
             return False
     
-        if OtherJointCommitteeCrap in name:
+        if OTHER_JOINT in name:
             return False
     
-        for ajc in AnnoyingJointCommittees:
-            if ajc in title:
-                return False
+        # reports, minutes, agendas, audio, ...
+        if ANNOYING_JOINT.search(title):
+            return False
     
         return True
     
@@ -128,10 +281,10 @@ class GetCommittee(object):
         committee_type
     
         INTERMEDIARIES
-        x is a list of items/OrderedDicts with metadata on each committee
+        items are dicts with metadata on each committee, read one at a time
+        and dropped unless used, see utils.iter_feed()
         Parameters and example data:
-            (u'guid', OrderedDict([(u'@isPermaLink', u'false'), 
-                                   ('#text', u'5b7a05a6-...')]))
+            (u'guid', u'5b7a05a6-...')
             (u'link', u'http://docs.legis.wisconsin.gov/2015/committees')
             (u'title', u'Committee Name - 2016-12-17')
             (u'description', u'Committee Name')
@@ -143,27 +296,19 @@ class GetCommittee(object):
     
         """
     
-        # x is a list of OrderedDict
-        # should do some error catching here
-        # find format of data through testing / pretty xml
-        x = xmltodict.parse(text)['rss']['channel']['item']
+        # dealing with Joint Committee reports while parsing
+        if committee_type == 'Joint':
+            keep = self.edit_Joint_Committee
+        else:
+            keep = lambda item: item.get('description')
     
         # iterate for relevant information
+        # should do some error catching here
         data = []
-        for item in x:
-            name = item['description']
-        
-            interest = True
-            if not name: 
-                interest = False
-        
-            # dealing with Joint Committee reports
-            if committee_type == 'Joint':
-                interest = self.edit_Joint_Committee(item)
-        
-            # add to data
-            if interest:
-                data.append([name, committee_type, item['link']])
+        for item in iter_feed(text, keep):
+            data.append([item['description'], committee_type, item['link']])
+            self.stamps[item['link']] = item.get('a10:updated') or \
+                                        item.get('pubDate')
     
         return data
     
@@ -171,16 +316,32 @@ class GetCommittee(object):
         """Get committees and hand-assigned topics."""
         topics = defaultdict(str)
         with open('committee_topics.txt', 'r') as f:
-            reader = csv.reader(f)
+            reader = csv.reader(f, delimiter=';')
             for row in reader:
                 topics[row[0]] = row[1]
         
         return topics
     
+    def tables(self):
+        """
+        Tables of the edits that a subclass or instance may change, handed
+        to the parsing processes with each page, see parse_committee()
+        
+        OUTPUT
+        list of name_exceptions, roles
+        
+        """
+        
+        return [self.name_exceptions, self.roles]
+    
     def edit_committee_info(self, info):
         """
         String editing to get committee info
         Reduce text data from each parsed committee site
+        
+        Every person line is classified once by a small state machine:
+        lines before the second 'Members' are persons (roles and staff),
+        lines after are members. Roles are deduplicated with sets.
     
         INPUT
         info, text from get_committee_metadata()
@@ -192,186 +353,117 @@ class GetCommittee(object):
              Member, Other, Hearings]
     
         TO DO
-        Look into exceptions for names when adding spaces before capital letters 
         This info doesn't include Hearing Documents/In/Out/All/Proposals
-        Can also clean this up a lot
-            duplicates for committee members
-        And instead of testing if len(a) == 2, check if a[0 or 1] == None
     
         """
-        
-        # name exceptions?
-        names = ['VanderMeer', 'Bowers2']
     
         # rm header
-        a = info.split('Notify', 1)[-1].lstrip().rstrip()
+        a = info.split('Notify', 1)[-1].strip()
     
-        # add space before every CAP preceded by ')' or '[a-z]' or '2' but NOT '\n', ' ' or '-'
-        #b = re.sub(r'([a-z][a-z|\)])([A-Z])', r'\1\n\2', a)
-        # first expression failed to exclude Rep. VanderMeer
+        # add newline before every CAP preceded by ')' or '[a-z]' or '2'
+        # but NOT '\n', ' ' or '-', leaving names in self.name_exceptions
         # https://regex101.com/r/XS0OC5/1
-        b = re.sub(r'(?!VanderM)([A-Z|\(]\w+[a-z|\)|2])([A-Z])', r'\1\n\2', a)
+        a, masks = mask_names(a, self.name_exceptions)
+        b = RUNTOGETHER.sub(r'\1\n\2', a)
+        if masks:
+            b = unmask_names(b, masks)
     
         # add space before '(' - rare
         # eg for clerk phone number
-        c = re.sub(r'([a-z])\(', r'\1 (', b)
-        
-        # replace '\r\n ' to '\n'
-        d = re.sub(r'\r\n +', '\n', c)
+        c = PAREN.sub(' (', b)
     
-        # lots of spaces to one
-        e = re.sub(' +', ' ', d)
+        # replace '\r\n ' by '\n', and lots of spaces by one
+        d = CRLF.sub('\n', c) if '\r\n ' in c else c
+        e = SPACES.sub(' ', d) if '  ' in d else d
     
         # split off hearings
         hearings = None
         f = e.split('Hearing Notices')
-        if len(f) == 1: f = f[0]
-        elif len(f) == 2:
-            f, hearings = f
-        
-            # parse
-            hearings = re.sub('Executive Session ', 'Private', hearings)
-            hearings = re.sub('Public Session ', 'Public', hearings)
-            hearings = hearings.lstrip().split('\n\n\n\n')
-            tmp = []
-            for h in hearings:
-                h = re.sub('\n', '-', h)
-                tmp.append(h)
-        
-            hearings = tmp
-            
-        else:
+        if len(f) > 2:
             w = 'get_data.edit_committee_info() split info into 3+ parts.'
             warning(w, info)
+        elif len(f) == 2:
+            hearings = SESSION.sub(lambda m: SESSIONS[m.group(1)], f[1])
+            hearings = [h.replace('\n', '-') 
+                        for h in hearings.lstrip().split('\n\n\n\n')]
+        f = f[0]
     
         # split into headers/chairs/staff/etc, _, members
         g, _, members = f.split('Members')
     
         # split into header/persons
         header, persons = [None] * 2
-        h = filter(None, g.lstrip().rstrip().split('\n\n'))
+        h = filter(None, g.strip().split('\n\n'))
         if h:
             persons = h.pop()
             if h:
                 header = ' '.join([i.lstrip() for i in h])
     
         # setup
-        Chair, CoChair, ViceChair = [], [], []
+        roles = dict((role, []) for tag, role in self.roles)
+        seen = dict((role, set()) for tag, role in self.roles)
         CommitteeClerk, LegislativeCouncilStaff = [], []
         Member, Other = [], []
     
-        # split persons 
-        prev = None
-        if persons:
-            lines = persons.split('\n')
-            for i, line in enumerate(lines):
-                if not line: continue
-            
-                # Chair
-                a = line.split(' (Chair)')
-                if len(a) == 2:
-                    Chair.append(a[0])
-                    prev = Chair
-                    continue
+        # persons, then members
+        # prev is the list an untagged person line repeats, with its set
+        prev, prev_seen = None, None
+        lines = persons.split('\n') if persons else []
+        npersons = len(lines)
+        lines.extend(members.split('\n'))
+        for i, line in enumerate(lines):
+            if not line: continue
+            in_persons = i < npersons
             
-                # CoChair
-                a = line.split(' (Co-Chair)')
-                if len(a) == 2:
-                    CoChair.append(a[0])
-                    prev = CoChair
-                    continue
-                
-                # ViceChair
-                a = line.split(' (Vice-Chair)')
-                if len(a) == 2:
-                    ViceChair.append(a[0])
-                    prev = ViceChair
+            # Chair, CoChair, ViceChair
+            role = split_role(line, self.roles)
+            if role:
+                name, role = role
+                if in_persons:
+                    prev, prev_seen = roles[role], seen[role]
+                elif name in seen[role]:
                     continue
+                roles[role].append(name)
+                seen[role].add(name)
+                continue
             
-                # CommitteeClerk
-                a = line.split('Committee Clerk ')
-                if len(a) == 2:
-                    CommitteeClerk.append(a[1])
-                    prev = CommitteeClerk
+            if in_persons:
+                # CommitteeClerk, LegislativeCouncilStaff, tagged once
+                parts = line.split('Committee Clerk ')
+                if len(parts) == 2:
+                    CommitteeClerk.append(parts[1])
+                    prev, prev_seen = CommitteeClerk, None
                     continue
-            
-                # LegislativeCouncilStaff
-                a = line.split('Legislative Council Staff ')
-                if len(a) == 2:
-                    LegislativeCouncilStaff.append(a[1])
-                    prev = LegislativeCouncilStaff
+                parts = line.split('Legislative Council Staff ')
+                if len(parts) == 2:
+                    LegislativeCouncilStaff.append(parts[1])
+                    prev, prev_seen = LegislativeCouncilStaff, None
                     continue
                 
-                # try/except to deal with missing committee pages from
-                # turnover, jan 5 2017
-                try:
-                    # repeat name with no tag
-                    prev.append(a[0].lstrip())
-                except AttributeError:
+                # repeat name with no tag, up to a repeated staff tag
+                name = parts[0].lstrip()
+                if prev is not None:
+                    prev.append(name)
+                    if prev_seen is not None:
+                        prev_seen.add(name)
+                else:
+                    # missing committee pages from turnover, jan 5 2017
                     warn = 'Missing committee chairs (new year), still added.'
-                    warning(warn, lines)
-                    Member.append(a[0].lstrip())
-        
-        # parse members
-        lines = members.split('\n')
-        for i, line in enumerate(lines):
-            if not line: continue
-        
-            # Chair
-            a = line.split(' (Chair)')
-            if len(a) == 2:
-                if a[0] in Chair: 
-                    continue
-                Chair.append(a[0])
-                continue
-
-            # CoChair
-            a = line.split(' (Co-Chair)')
-            if len(a) == 2:
-                if a[0] in CoChair:
-                    continue
-                CoChair.append(a[0])
-                continue
-
-            # ViceChair
-            a = line.split(' (Vice-Chair)')
-            if len(a) == 2:
-                if a[0] in ViceChair:
-                    continue
-                ViceChair.append(a[0])
+                    warning(warn, lines[:npersons])
+                    Member.append(name)
                 continue
-        
-            # Other
+            
+            # Other, also a Member
             if line.startswith(' '):
                 Other.append(line.lstrip())
-        
-            # Member
             Member.append(line)
     
-        # argh, some of these return data as just None 
-        # so we're going to just set it to a None array
-        # so it gets added
-        data = [None for i in xrange(9)]
-        
-        
-        # NOW THE SUPER JENKY PART HAPPENS
-        # BECAUSE I DON'T WANT TO REWRITE
-        # AND BECAUSE I DON'T WANT LISTS, I WANT STR
-        # HERE GOES
-        Chair = joiner(Chair)
-        CoChair = joiner(CoChair)
-        ViceChair = joiner(ViceChair)
-        CommitteeClerk = joiner(CommitteeClerk)
-        LegislativeCouncilStaff = joiner(LegislativeCouncilStaff)
-        Member = joiner(Member)
-        Other = joiner(Other)
-        hearings = joiner(hearings)
-        # WELP
-        
-        # return data
-        data =  [header, Chair, CoChair, ViceChair, 
-                 CommitteeClerk, LegislativeCouncilStaff, 
-                 Member, Other, hearings]
+        # return data, lists as ; joined str
+        data = [header, roles.get('Chair'), roles.get('Co-Chair'), 
+                roles.get('Vice-Chair'),
+                CommitteeClerk, LegislativeCouncilStaff, 
+                Member, Other, hearings]
+        data = [joiner(d) if isinstance(d, list) else d for d in data]
         data = [d if d else None for d in data]
         return data
     
@@ -394,7 +486,7 @@ class GetCommittee(object):
             list of header, people+positions, hearing dates
     
         OUTPUT
-        data
+        generator of data, one committee at a time as its page arrives
             [CommitteeName, CommitteeType, Link, 
              Header, Chair, CoChair, 
              ViceChair, CommitteeClerk, LegislativeCouncilStaff, 
@@ -402,33 +494,132 @@ class GetCommittee(object):
     
         """
     
-        data = []
+        # reuse committees finished before an interruption, and 
+        # incremental, committees whose feed item is unchanged
+        rows = {}
         for meta in metadata:
-            # parse html
+            url = meta[2]
+            if self.journal and 'committee:' + url in self.journal:
+                rows[url] = self.journal.get('committee:' + url)
+            elif self.state:
+                row = self.state.fresh(url, self.stamps.get(url))
+                if row:
+                    rows[url] = row
+    
+        # fetch committee sites a window ahead
+        fetched = self.fetcher.imap(metadata, 
+                                    lambda m: [] if m[2] in rows else [m[2]],
+                                    self.window)
+        
+        def tasks():
+            """
+            (meta, text, row, cominfo), row reused or None to parse text,
+            cominfo parsed before or ParseCache.MISS
+            """
+            for meta, pages in timed_iter('fetch', fetched):
+                url = meta[2]
+                if url in rows:
+                    yield meta, None, rows[url], None
+                    continue
+                
+                text = pages.get(url)
+                if text is None:
+                    warning('Committee page not fetched, skipped.', url)
+                    continue
+                
+                # incremental, reuse committees whose page is unchanged
+                if self.state:
+                    row = self.state.unchanged(url, text)
+                    if row:
+                        self.state.update(url, row, self.stamps.get(url), 
+                                          (text,))
+                        if self.journal:
+                            self.journal.record('committee:' + url, row)
+                        yield meta, None, row, None
+                        continue
+                
+                # parsed before, by the page body
+                cominfo = ParseCache.MISS
+                if self.parse_cache:
+                    cominfo = self.parse_cache.get('committee', text)
+                yield meta, text, None, cominfo
+        
+        # parse and edit the raw pages, in worker processes if any
+        tables = tuple(self.tables())
+        parsed = self.parsers.imap(parse_committee, tasks(),
+                                   lambda t: (t[1],) + tables 
+                                             if t[3] is ParseCache.MISS
+                                             and not t[2] else None)
+        for (meta, text, row, cached), cominfo in parsed:
+            if row:
+                yield row
+                continue
+            
+            if cached is not ParseCache.MISS:
+                cominfo = cached
+            elif self.parse_cache:
+                self.parse_cache.put('committee', text, cominfo)
+            
             name, committee_type, url = meta
-            text = load_txt(url)
-            parser = BeautifulSoup(text, "lxml")
-            info = parser.body.find('div', attrs={'class':'span5'})
             
             # retrieve committee info
-            if info:
-                # remove unicode 
-                info = rm_unicode(info.text)
-                
-                # [header, Chair, CoChair, ViceChair, CommitteeClerk, 
-                #  LegislativeCouncilStaff, Member, Other, hearings]
-                cominfo = self.edit_committee_info(info)
-                
+            if cominfo:
                 # topics
                 comtopics = self.topics[name]
                 
                 # don't add to data if missing cominfo
                 tmp = meta + cominfo + list(comtopics)
-                data.append(tmp)
             else:
                 warn = 'Missing info in get_committee_info, still added.'
                 warning(warn, meta)
                 tmp = meta + [None for i in xrange(10)]
-                data.append(tmp)
-        
-        return data
+            
+            if self.state:
+                self.state.update(url, tmp, self.stamps.get(url), (text,))
+            if self.journal:
+                self.journal.record('committee:' + url, tmp)
+            yield tmp
+
+def parse_committee(text, name_exceptions = GetCommittee.name_exceptions,
+                    roles = ROLES):
+    """
+    Committee info of a committee site, for a worker process
+    See GetCommittee.get_committee_info() and parsepool.py
+    
+    INPUT
+    text, str html of the site
+    name_exceptions, roles, the tables of the GetCommittee, see 
+        GetCommittee.tables()
+    
+    OUTPUT
+    cominfo from GetCommittee.edit_committee_info(), None if the site has
+        no info
+    
+    """
+    
+    # parse html
+    with timed('soup'):
+        info = find_divs(text, 'span5')
+    if not info:
+        return None
+    
+    # remove unicode 
+    with timed('rm_unicode'):
+        info = rm_unicode(info[0].text)
+    
+    # [header, Chair, CoChair, ViceChair, CommitteeClerk, 
+    #  LegislativeCouncilStaff, Member, Other, hearings]
+    # the edits need none of what __init__ sets up, so it is skipped
+    committee = GetCommittee.__new__(GetCommittee)
+    committee.name_exceptions = name_exceptions
+    committee.roles = roles
+    with timed('edit'):
+        return committee.edit_committee_info(info)
+
+# what parses committee pages, so a change to any of it drops their cached
+# results, see parsecache.parser_version(), with the tables of the
+# GetCommittee, see GetCommittee.tables()
+PARSERS = [parse_committee, GetCommittee.edit_committee_info, mask_names,
+           unmask_names, split_role, ROLES, NAME_HEAD, RUNTOGETHER, PAREN,
+           CRLF, SPACES, SESSION, SESSIONS, GetCommittee.tables, find_divs,
+           joiner] + UNFOLD
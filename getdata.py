@@ -1,5 +1,15 @@
 
 from utils import *
+from fetcher import Fetcher
+from legisparser import parse_left
+from crawlstate import CrawlState
+from journal import Journal
+from parsepool import ParsePool
+from parsecache import ParseCache, parser_version
+from sinks import CSVSink, LineSink
+from sqlsink import LegislatorSQLSink
+from records import Legislator
+import legisparser
 import re
 from bs4 import BeautifulSoup
 import lxml
@@ -7,6 +17,11 @@ import csv
 
 from random import randint
 
+# sections of the house author index
+AUTHOR_KINDS = re.compile(r'^(authored|co-?authored|cosponsored)\b', re.I)
+# a proposal as its link gives it, a bill or resolution, eg ab47 or sjr12
+PROPOSAL = re.compile(r'^(ab|sb|ajr|sjr|ar|sr)\d+$')
+
 class GetData(object):
     """
     
@@ -18,31 +33,66 @@ class GetData(object):
     
     """
     
-    def __init__(self):
+    # columns of legislators.csv
+    header = ['HID', 'PID', # 01
+              'FirstName', 'LastName', 'Position', 'District', 'Party', #23456
+              'City', 'MadisonOffice', 'Telephones', 'Fax', 'DistrictPhone', #7891011
+              'Email', 'DistrictAddress', 'VotingAddress', 'Staff', #12131415
+              'PositionedCommittees', 'Committees', 'Biography', #161718
+              'OfficialWeb', 'PersonalWeb', 'Region', 'BillIndex'] #19202122
+    
+    def __init__(self, workers = 8, per_host = 4, window = 32,
+                 incremental = False, state = 'crawl_state.json', 
+                 year = 2017, journal = 'legislators_journal.jsonl',
+                 processes = 1, parse_cache = None, resume = False):
         """
         Setup
+        
+        INPUT
+        workers, number of pages fetched concurrently
+        per_host, max pages fetched concurrently from one host
+        window, max legislators fetched ahead of the one being parsed
+        incremental, bool, reuse legislators whose pages are unchanged
+            since the last incremental run
+        state, str file of the last incremental run, see crawlstate.py
+        year, int session crawled by getlegislators(), see crawler.py for
+            many sessions
+        journal, str file of finished legislators, an interrupted crawl 
+            can resume from, None for no journal, see journal.py
+        processes, int processes parsing pages, None for one per core, 
+            1 to parse in this process, see parsepool.py
+        parse_cache, str file of parse results by page body, pages parsed
+            before by the same parser are not parsed again, None for no
+            cache, see parsecache.py
+        resume, bool, reuse the legislators in the journal of an 
+            interrupted crawl, else the journal is started over
+        
         """
 
-        self.year = str(2017)
+        self.year = str(year)
         self.docs = r'http://docs.legis.wisconsin.gov'
         self.site = r'http://legis.wisconsin.gov'
         
-        # set up regex for legislators webscraping
-        # left side of official legislator page
-        # https://regex101.com/r/6er3zh/2 
-        regex = r'^\n+\w+? (.+?) (\w+?)\n+((.+?)|)\n+\w+ District ' + \
-                r'(\d+?) \((R|D) - (.+?)\)(\s|\S)+?Madison Office:' + \
-                r'\s+(.+?)\s+Telephone:\n\s+(.+)\s*(Fax:\n\s+(.+)|)' + \
-                r'\s+(District Phone:\s+(.+)|)\s+Email:\n(.+)\s+' + \
-                r'(District Address:\s+(.+)|)\s+(Voting Address:\s+' + \
-                r'(.+)|)\s*(Staff:\n((\s|\S)+?)|)\n(Current Committees' + \
-                r'\n((\s|\S)+?)|)\n\s+(Biography\n((.| |\n)+)|)$'
-        self.leftlegisregex = re.compile(regex)
+        # pages are fetched in bulk, see fetcher.py
+        self.fetcher = Fetcher(workers, per_host)
+        self.window = window
+        
+        # legislator pages have no feed, so unchanged is by content hash
+        self.state = CrawlState(state) if incremental else None
+        self.journal = Journal(journal, resume = resume) if journal else None
+        
+        # pages are parsed a window ahead too
+        self.parsers = ParsePool(processes, window)
+        self.parse_cache = None
+        if parse_cache:
+            self.parse_cache = ParseCache(parse_cache, dict(
+                                   (page, parser_version(*parts)) 
+                                   for page, parts in PARSERS.items()))
     
     def _getlegislators_replist(self, house_list):
         '''
         Got to the list of all legislators in chosen house, house_list
-        Parse html using BeautifulSoup
+        Parse only the legislator divs using BeautifulSoup
         Return list of text.
         
         INPUT
@@ -54,13 +104,14 @@ class GetData(object):
         '''
 
         # got to main list and parse html
-        text = load_txt(house_list)
-        parser = BeautifulSoup(text, "lxml")
-        replist = parser.body.find_all('div', attrs={'class':'rounded'})
+        with timed('fetch'):
+            text = load_txt(house_list)
+        with timed('soup'):
+            replist = find_divs(text, 'rounded')
         
         return replist
     
-    def _getlegislators_official_html(self, official):
+    def _getlegislators_official_html(self, official, text):
         """
         Get HTML from official website
         Return (left, right) information
@@ -68,23 +119,26 @@ class GetData(object):
         
         INPUT
         official, a str url
+        text, the fetched page at official
         
         OUTPUT
             website data, list of left, right
             to get text, right = rm_unicode(info[1].get_text())
+            None if the page has no left and right
 
         """
         
         # parse html
-        text = load_txt(official)
-        parser = BeautifulSoup(text, 'lxml')
-        info = parser.body.find_all('div', attrs={'class':'span6'})
+        with timed('soup'):
+            info = find_divs(text, 'span6')
 
         if len(info) != 2:
             warn = 'This site does not have 2 <div class="span6">'
             for i in info: 
                 print '--\n', i
-            warning(warn, len(info) + ' div retrieved', official)
+            warning(warn, str(len(info)) + ' div retrieved', official)
+        if len(info) < 2:
+            return None
 
         return info
     
@@ -179,12 +233,12 @@ class GetData(object):
         
         return txt.rstrip().lstrip().replace("\n", "<br/>")
 
-    def _getlegislators_edit_left(self, mleft):
+    def _getlegislators_edit_left(self, fields):
         """
         Reduce data for Representatives/Senators
     
         INPUT
-        mleft the regex search matches, retrieve with match.group(i)
+        fields, the 16 fields from legisparser.parse_left()
     
         OUTPUT
         left, list
@@ -208,9 +262,7 @@ class GetData(object):
 
         """
         
-        # get matches
-        left = list(mleft.group(1, 2, 4, 5, 6, 7, 9, 10, 12,
-                               14, 15, 17, 19, 21, 24, 27))
+        left = list(fields)
         
         # Addresses
         # Room 113 NorthState CapitolP.O. Box 8952Madison, WI 53708
@@ -243,179 +295,542 @@ class GetData(object):
         right, the right side of official web page
         
         OUTPUT
-        cosponsored, the list of cosponsored proposals
+        cosponsored, list of str cosponsored proposals
         
         '''
         
         
-        # ignoring all other tabs
+        # ignoring all other tabs, Votes are read by votes.py
         # AuthoredCo-authoredCosponsoredAmendmentsVotes
         links = right.find('div', {'id': 'cosponsoredProposals'})
         if not links:
-            return ''
+            return []
         
-        cosponsored = ''
-        for link in links.find_all('a'):
-            tmp = ';' + link.get('href')[16:]
-            cosponsored += tmp
-        
-        return cosponsored
+        return [link.get('href')[16:] for link in links.find_all('a')]
     
-    def _getlegislators_authorindex(self, author_url):
+    def _getlegislators_authorindex(self, author_url, text):
         """
         Get data from authorindex website
         
         INPUT
         author_url, a str url
+        text, the fetched page at author_url
         
         OUTPUT
-        authorindex, 
+        authorindex, list of str authored and co-authored proposals
 
         """
         
         # parse html
-        text = load_txt(author_url)
-        parser = BeautifulSoup(text, 'lxml')
-        info = parser.body.find_all('div', attrs={'class':'authorindex'})
+        with timed('soup'):
+            info = find_divs(text, 'authorindex')
         # info is length 1 ResultSet
         
-        authorindex = -1
-        for inf in info[0].find_all('a'):
+        # skip first link
+        return [inf.get('rel')[0][17:] for inf in info[0].find_all('a')[1:]]
+    
+    def _getlegislators_house_authorindex(self, house, year):
+        """
+        Get the author index of a whole house in one request
+        The page lists each legislator, linked by PID, followed by their
+        Authored, Co-authored and Cosponsored proposals.
+        
+        INPUT
+        house, str 'assembly' or 'senate'
+        year, str session
+        
+        OUTPUT
+        index, dict of PID: (authored, coauthored, cosponsored) lists of 
+            str proposals without repeats, None if the page failed or 
+            nothing was parsed from it. PIDs with no proposals are left out,
+            so they fall back to their own author index too
+        
+        """
+        
+        url = self.docs + r'/' + year + r'/related/author_index/' + house
+        try:
+            with timed('fetch'):
+                text = load_txt(url)
+        except IOError as e:
+            warning('House author index failed, fetching per legislator', 
+                    url, e)
+            return None
+        
+        # parsed before, the links to legislators depend on the house
+        if self.parse_cache:
+            index = self.parse_cache.get('houseindex', house + '\n' + text)
+            if index is not ParseCache.MISS:
+                return index
+        
+        with timed('soup'):
+            info = find_divs(text, 'authorindex')
+        
+        # links to a legislator, by PID
+        legislator = re.compile(r'/(author_index|legislators)/' + house + 
+                                r'/(\d+)')
+        
+        # one pass in page order, the legislator and section set the lists
+        # that following proposals go to
+        index = {}
+        pid, kind = None, 0
+        with timed('parse'):
+            for div in info:
+                for node in div.descendants:
+                    if getattr(node, 'name', None) == 'a':
+                        rel = node.get('rel')
+                        if rel and pid:
+                            if PROPOSAL.match(rel[0][17:]):
+                                index[pid][kind].append(rel[0][17:])
+                            continue
+                        match = legislator.search(node.get('href') or '')
+                        if match:
+                            pid, kind = match.group(2), 0
+                            index.setdefault(pid, ([], [], []))
+                    elif node.name is None and node.parent.name != 'a':
+                        match = AUTHOR_KINDS.match(node.strip())
+                        if match:
+                            section = match.group(1).lower().replace('-', '')
+                            kind = ['authored', 'coauthored', 
+                                    'cosponsored'].index(section)
+        
+        # no proposals may be markup the parse no longer follows
+        index = dict((pid, tuple(unique(bills) for bills in lists))
+                     for pid, lists in index.items() if any(lists))
+        if not index:
+            warning('Nothing parsed from house author index, fetching per '
+                    'legislator', url)
+            index = None
+        
+        if self.parse_cache:
+            self.parse_cache.put('houseindex', house + '\n' + text, index)
+        
+        return index
+    
+    def _getlegislators_sites(self, house, replist, year):
+        """
+        Find the websites of each legislator in the list of a house
+        
+        INPUT
+        house, str 'assembly' or 'senate'
+        replist, from _getlegislators_replist()
+        year, str session
+        
+        OUTPUT
+        generator of (official, personal, author_url) str urls
+        
+        """
+        
+        # Each representative has official website, and most have personal
+        # official is your 4digit ID at the end of
+        #     http://docs.legis.wisconsin.gov/ YEAR/legislators/HOUSE/
+        # personal is your (District)/LastName at the end of
+        #     http://legis.wisconsin.gov/HOUSE/            
+        ow = r'^/' + year + r'/legislators/' + house + r'/'
+        pw = self.site + r'/' + house + r'/'
+        official_web = re.compile(ow)
+        personal_web = re.compile(pw)
+        
+        # author index setup
+        author_base = self.docs + r'/' + year + \
+                      r'/related/author_index/' + house + r'/'
+        
+        for rep in replist:
+            # ignore class="breadcrumb rounded"
+            if rep['class'][0] == 'breadcrumb': continue
+
+            # find the websites of this legislator
+            official, personal = None, None
+            for link in rep.find_all('a'):
+                if official and personal: break
+                tmp = link.get('href')
+                if tmp:
+                    if official_web.match(tmp):
+                        official = self.docs + tmp #tmp[-4:]
+                    elif personal_web.match(tmp):
+                        personal = tmp
             
-            # skip first link
-            if authorindex == -1:
-                authorindex = ''
+            if not official:
+                warn = 'Website missing of a legislator: official'
+                warning(warn, official, rep.find_all('a'))
                 continue
-            elif not authorindex:
-                authorindex = inf.get('rel')[0][17:]
-            else:
-                authorindex += ';' + inf.get('rel')[0][17:]
             
-        return authorindex
+            # author index website for authored/co-authored bills
+            author_url = author_base + official[-4:] + r'?view=section'
+            yield official, personal, author_url
     
-    def getlegislators(self):
+    def _getlegislators_fetched(self, house, year, author_index = True):
         """
-        Get data from official websites of legislators and move it to CSV
-        Outputs all fields to 'house.csv'
-        Outputs reps to 'house_list.txt'
+        Pages of each legislator of a house in a session, as they arrive
+        
+        INPUT
+        house, str 'assembly' or 'senate'
+        year, str session
+        author_index, bool, also get the authored/co-authored/cosponsored 
+            bills, from the house author index or else each legislator's
+        
+        OUTPUT
+        generator of (site, pages, bills)
+            site, (official, personal, author_url) from _getlegislators_sites()
+            pages, dict of url: text
+            bills, (authored, coauthored, cosponsored) from the house author
+                index, None if not there
         
         """
         
-        legislators = []
-        for house in ['assembly', 'senate']:
-            
-            # Each representative has official website, and most have personal
-            # official is your 4digit ID at the end of
-            #     http://docs.legis.wisconsin.gov/ YEAR/legislators/HOUSE/
-            # personal is your (District)/LastName at the end of
-            #     http://legis.wisconsin.gov/HOUSE/            
-            ow = r'^/' + self.year + r'/legislators/' + house + r'/'
-            pw = self.site + r'/' + house + r'/'
-            official_web = re.compile(ow)
-            personal_web = re.compile(pw)
-            
-            # author index setup
-            author_base = self.docs + r'/' + self.year + \
-                          r'/related/author_index/' + house + r'/'
-            
-            # list of all representatibes
-            house_list = self.docs + r'/' +  self.year + r'/legislators/' + house + r'/'
-            
-            # get html into parsed data
+        # list of all representatibes
+        house_list = self.docs + r'/' +  year + r'/legislators/' + house + r'/'
+        
+        # get html into parsed data
+        # the list and author index of a house are journaled too
+        unit = 'sites:%s:%s' % (year, house)
+        if self.journal and unit in self.journal:
+            sites = self.journal.get(unit)
+        else:
             replist = self._getlegislators_replist(house_list)
-            
-            # iterate over each legislator
-            for rep in replist:
-                # ignore class="breadcrumb rounded"
-                if rep['class'][0] == 'breadcrumb': continue
+            sites = list(self._getlegislators_sites(house, replist, year))
+            if self.journal:
+                self.journal.record(unit, sites)
+        
+        # authored/co-authored/cosponsored bills of the whole house, 
+        # legislators missing from it fall back to their own author index
+        index = {}
+        unit = 'authorindex:%s:%s' % (year, house)
+        if author_index and self.journal and unit in self.journal:
+            index = self.journal.get(unit)
+        elif author_index:
+            index = self._getlegislators_house_authorindex(house, year)
+            if self.journal and index is not None:
+                self.journal.record(unit, index)
+            index = index or {}
+        
+        def urls_of(site):
+            # finished before an interruption
+            if self.journal and 'legislator:' + site[0] in self.journal:
+                return []
+            if not author_index or site[0][-4:] in index:
+                return [site[0]]
+            return [site[0], site[2]]
+        
+        # fetch official and author index websites a window ahead
+        fetched = self.fetcher.imap(sites, urls_of, self.window)
+        for site, pages in timed_iter('fetch', fetched):
+            yield site, pages, index.get(site[0][-4:])
+    
+    def _getlegislators_parse(self, official, text):
+        """
+        Parse the left side of an official website
+        
+        INPUT
+        official, a str url
+        text, the fetched page at official
+        
+        OUTPUT
+        officialinfo, from _getlegislators_official_html()
+        fields, from legisparser.parse_left(), None if nothing parsed or
+            the page has no left and right
+        
+        """
+        
+        # go to official site and grab all other information
+        officialinfo = self._getlegislators_official_html(official, text)
+        if officialinfo is None:
+            return None, None
 
-                # find the websites of this legislator
-                official, personal = None, None
-                for link in rep.find_all('a'):
-                    if official and personal: break
-                    tmp = link.get('href')
-                    if tmp:
-                        if official_web.match(tmp):
-                            official = self.docs + tmp #tmp[-4:]
-                        elif personal_web.match(tmp):
-                            personal = tmp
+        # left
+        # retrieve text from two sides 
+        # and remove \u2018 | \u2019 to make csv happy
+        with timed('rm_unicode'):
+            left = rm_unicode(officialinfo[0].get_text())
+        with timed('parse'):
+            fields = parse_left(left)
+        if not fields:
+            warn = 'No data parsed for representative. No name/district.'
+            warn1 = 'NO DATA ADDED.'
+            warning(warn, warn1, official, left)
+        
+        return officialinfo, fields
+    
+    def _getlegislators_legis(self, house, site, pages, bills, 
+                              parsed = None):
+        """
+        Parse and edit the fetched pages of one legislator
+        Runs in a worker process when parsing with processes, see parsepool.py
+        
+        INPUT
+        house, str 'assembly' or 'senate'
+        site, pages, bills, from _getlegislators_fetched()
+        parsed, dict of page: result, pages parsed before, see 
+            _getlegislators_parsed()
+        
+        OUTPUT
+        legis, list of the fields in legislators.csv, Region None, or 
+            None if nothing parsed
+        parsed, with the results of the pages parsed here
+        
+        """
+        
+        official, personal, author_url = site
+        parsed = dict(parsed or {})
+        
+        if 'official' not in parsed:
+            # go to official site and grab all other information
+            officialinfo, fields = self._getlegislators_parse(
+                                       official, pages.get(official))
+            parsed['official'] = None
+            if fields:
+                with timed('edit'):
+                    overview = self._getlegislators_edit_left(fields)
                 
-                # go to official site and grab all other information
-                if official:
-                    officialinfo = self._getlegislators_official_html(official)
-
-                    # left
-                    # retrieve text from two sides 
-                    # and remove \u2018 | \u2019 to make csv happy
-                    left = rm_unicode(officialinfo[0].get_text())
-                    mleft = self.leftlegisregex.search(left)
-                    if mleft:
-                        overview = self._getlegislators_edit_left(mleft)
-                    else:
-                        warn = 'No data parsed for representative. No regex match.'
-                        warn1 = 'NO DATA ADDED.'
-                        warning(warn, warn1, official, left)
-                        continue
-                    
-                    # right
-                    # AmendmentsVotes TODO
-                    # AuthoredCo-authoredCosponsoredAmendmentsVotes
-                    cosponsored = self._getlegislators_edit_right(officialinfo[1])
-                else:
-                    warn = 'Website missing of a legislator: official'
-                    warning(warn, official, rep.find_all('a'))
+                # right
+                # Amendments TODO, Votes see votes.py
+                # AuthoredCo-authoredCosponsoredAmendmentsVotes
+                with timed('edit'):
+                    cosponsored = self._getlegislators_edit_right(
+                                      officialinfo[1])
+                parsed['official'] = (overview, cosponsored)
+        if not parsed['official']:
+            return None, parsed
+        overview, cosponsored = parsed['official']
+        
+        # go to feed websites TODO
+        
+        # authored/co-authored bills from the house author index, 
+        # else go to author index website
+        if bills:
+            authorindex = bills[0] + bills[1] + bills[2]
+        else:
+            if 'authorindex' not in parsed:
+                parsed['authorindex'] = self._getlegislators_authorindex(
+                                            author_url, pages.get(author_url))
+            authorindex = parsed['authorindex']
+        # these bills are found at
+        # http://docs.legis.wisconsin.gov/2017/proposals/BILL
+        
+        # get some random stuff
+        # get an HID index for each user
+        hid = house[0].upper() + "%02d" % int(overview[3])
+        # get the PID
+        pid = official[-4:]
+        # get the picture:: picture is official.jpg so nevermind!
+        
+        # data, region is drawn by the caller so it does not depend on
+        # the worker process
+        legis = [hid, pid] + list(overview) + \
+                [official, personal, None, 
+                 ';'.join(unique(authorindex + cosponsored))]
+        return legis, parsed
+    
+    def _getlegislators_pages(self, site, pages, bills):
+        """
+        Pages of a legislator that are parsed, see PARSERS
+        
+        OUTPUT
+        dict of page: str text, pages not fetched left out
+        
+        """
+        
+        texts = {'official': pages.get(site[0])}
+        if not bills:
+            texts['authorindex'] = pages.get(site[2])
+        
+        return dict((page, text) for page, text in texts.items() 
+                    if text is not None)
+    
+    def _getlegislators_parsed(self, site, pages, bills):
+        """
+        Results of the pages of a legislator parsed before, by their body
+        
+        OUTPUT
+        parsed, dict of page: result, see _getlegislators_legis()
+        pages, without the pages parsed before
+        
+        """
+        
+        parsed = {}
+        if not self.parse_cache:
+            return parsed, pages
+        
+        for page, text in self._getlegislators_pages(site, pages, 
+                                                     bills).items():
+            result = self.parse_cache.get(page, text)
+            if result is not ParseCache.MISS:
+                parsed[page] = result
+        
+        # only what is left to parse goes to the parser
+        urls = {'official': site[0], 'authorindex': site[2]}
+        skip = set(urls[page] for page in parsed)
+        pages = dict((u, t) for u, t in pages.items() if u not in skip)
+        
+        return parsed, pages
+    
+    def _getlegislators_rows(self, house, year = None):
+        """
+        Legislators of a house, one row at a time as their pages arrive
+        
+        INPUT
+        house, str 'assembly' or 'senate'
+        year, session, None for self.year
+        
+        OUTPUT
+        generator of legis, list of the fields in legislators.csv
+        
+        """
+        
+        year = str(year or self.year)
+        
+        def tasks():
+            """
+            (site, pages, bills, texts, reused, legis, parsed), legis 
+            reused, parsed pages parsed before
+            """
+            for site, pages, bills in self._getlegislators_fetched(house, 
+                                                                   year):
+                official = site[0]
+                
+                # finished before an interruption, None if nothing parsed
+                unit = 'legislator:' + official
+                if self.journal and unit in self.journal:
+                    yield site, None, bills, None, True, \
+                          self.journal.get(unit), None
                     continue
                 
-                # go to feed websites TODO
+                if bills:
+                    texts = (pages.get(official), joiner(sum(bills, [])))
+                else:
+                    texts = (pages.get(official), pages.get(site[2]))
+                
+                # the fetcher gave up on a page, left out of the journal so
+                # a resumed crawl tries it again
+                if texts[0] is None or (not bills and texts[1] is None):
+                    warning('Legislator pages not fetched, skipped.', 
+                            official)
+                    yield site, None, bills, None, True, None, None
+                    continue
                 
-                # go to author index website
-                # for authored/co-authored bills
-                author_url = author_base + official[-4:] + r'?view=section'
-                authorindex = self._getlegislators_authorindex(author_url)
-                # these bills are found at
-                # http://docs.legis.wisconsin.gov/2017/proposals/BILL
+                # incremental, reuse legislators whose pages are unchanged
+                if self.state:
+                    legis = self.state.unchanged(official, *texts)
+                    if legis:
+                        if self.journal:
+                            self.journal.record(unit, legis)
+                        yield site, None, bills, texts, True, legis, None
+                        continue
                 
-                # get some random stuff
-                # get an HID index for each user
-                hid = house[0].upper() + "%02d" % int(overview[3])
-                # get the PID
-                pid = official[-4:]
+                yield site, pages, bills, texts, False, None, \
+                      self._getlegislators_parsed(site, pages, bills)
+        
+        # parse and edit the raw pages, in worker processes if any
+        parsed = self.parsers.imap(parse_legislator, tasks(), 
+                                   lambda t: None if t[4] else \
+                                             (house, t[0], t[6][1], t[2], 
+                                              t[6][0]))
+        for task, result in parsed:
+            site, pages, bills, texts, reused, reused_legis, cached = task
+            if reused:
+                if reused_legis:
+                    yield reused_legis
+                continue
+            legis, results = result
+            
+            # remember the pages parsed here
+            if self.parse_cache:
+                for page, text in self._getlegislators_pages(site, pages,
+                                                             bills).items():
+                    if page in results and page not in cached[0]:
+                        self.parse_cache.put(page, text, results[page])
+            
+            official = site[0]
+            unit = 'legislator:' + official
+            if legis:
                 # get the region
                 region = str(randint(0,5)) # TODO
-                # get the picture:: picture is official.jpg so nevermind!
-                
-                # data
-                legis = [hid, pid] + overview + \
-                        [official, personal, region, authorindex+cosponsored]
-                # print legis
-                legislators.append(legis)
-                
-        # save list of legislators to file
-        with open('legislators.txt', 'w') as f:
-            for leg in legislators:
-                row = leg[0] + ',' + leg[1] + ',' + leg[2] + ' ' + leg[3] + \
-                      ',' + leg[21] + '\n'
-                f.write(row)
-
-        # write house to csv
-        header = ['HID', 'PID', # 01
-                  'FirstName', 'LastName', 'Position', 'District', 'Party', #23456
-                  'City', 'MadisonOffice', 'Telephones', 'Fax', 'DistrictPhone', #7891011
-                  'Email', 'DistrictAddress', 'VotingAddress', 'Staff', #12131415
-                  'PositionedCommittees', 'Committees', 'Biography', #161718
-                  'OfficialWeb', 'PersonalWeb', 'Region', 'BillIndex'] #19202122
-        with open('legislators.csv', 'wb') as f:
-            #quotechar="'", lineterminator = '\r\n'
-            # also see utils.py rm_unicode()
-            writer = csv.writer(f, delimiter='|', quoting = csv.QUOTE_NONE, 
-                                escapechar = '\\')
-            writer.writerow(header)
-            writer.writerows(legislators)
+                legis[self.header.index('Region')] = region
+                if self.state:
+                    self.state.update(official, legis, texts = texts)
+            if self.journal:
+                self.journal.record(unit, legis)
+            if legis:
+                yield legis
+    
+    def getlegislators(self, flush = 1, fsync = False, db = None):
+        """
+        Get data from official websites of legislators and move it to CSV
+        Outputs all fields to 'legislators.csv'
+        Outputs reps to 'legislators.txt'
+        Rows are written as they are parsed, see sinks.py
+        
+        INPUT
+        flush, int rows between flushes of the output files, 0 only at the end
+        fsync, bool, also fsync the output files on each flush
+        db, also load into this database, str sqlite file or a DB-API 
+            connection, see sqlsink.py
+        
+        OUTPUT
+        int number of legislators written
+        
+        """
+        
+        # list of legislators, and house to csv
+        #quotechar="'", lineterminator = '\r\n'
+        # also see utils.py rm_unicode()
+        def rep(legis):
+            leg = Legislator.from_row(legis)
+            return ','.join([leg.HID, leg.PID, 
+                             leg.FirstName + ' ' + leg.LastName, 
+                             str(leg.Region)])
+        reps = LineSink('legislators.txt', rep, flush = flush, fsync = fsync)
+        rows = CSVSink('legislators.csv', self.header, flush = flush, 
+                       fsync = fsync, delimiter='|', quoting = csv.QUOTE_NONE, 
+                       escapechar = '\\')
+ 
+        outs = [reps, rows]
+        if db is not None:
+            outs.append(LegislatorSQLSink(db, self.year))
+        
+        try:
+            for house in ['assembly', 'senate']:
+                for legis in self._getlegislators_rows(house):
+                    for out in outs:
+                        out.write(legis)
+        finally:
+            for out in outs:
+                out.close()
+            self.parsers.close()
+        
+        if self.state:
+            self.state.save()
+        if self.parse_cache:
+            self.parse_cache.save()
+        if self.journal:
+            self.journal.finish()
 
-        return len(legislators)
+        return rows.rows
 
     def next(self):
         '''
         '''
         
         pass
+
+def parse_legislator(house, site, pages, bills, parsed):
+    """
+    GetData._getlegislators_legis() for a worker process, see parsepool.py
+    The edits need none of what __init__ sets up, so it is skipped
+    """
+    
+    return GetData.__new__(GetData)._getlegislators_legis(house, site, pages,
+                                                          bills, parsed)
+
+# pages whose parse results are cached, see _getlegislators_parsed() and
+# _getlegislators_house_authorindex(), and what parses them, so a change
+# to any of it drops their cached results, see parsecache.parser_version()
+PARSERS = {
+    'official': [parse_legislator, GetData._getlegislators_legis,
+                 GetData._getlegislators_parse, 
+                 GetData._getlegislators_official_html, legisparser, 
+                 find_divs, unique] + UNFOLD + 
+                [getattr(GetData, m) for m in sorted(dir(GetData))
+                 if m.startswith('_getlegislators_edit_')],
+    'authorindex': [GetData._getlegislators_authorindex, find_divs],
+    'houseindex': [GetData._getlegislators_house_authorindex, AUTHOR_KINDS,
+                   PROPOSAL, find_divs, unique]}
@@ -3,13 +3,17 @@ import csv
 import lxml
 import re
 from utils import *
+from getdata import GetData
+from sinks import CSVSink, LineSink
 
-class GetHouse(object):
+class GetHouse(GetData):
     """
     Get data from website and move it to CSV
     Outputs 18 fields to 'out.csv'
     Outputs legislatures to 'out_list.txt'
     
+    The older output format of one house, crawled like GetData
+    
     
     Example
     
@@ -19,12 +23,15 @@ class GetHouse(object):
     
     """
     
-    def __init__(self, out = 'assembly', year = 2015):
+    def __init__(self, out = 'assembly', year = 2015, workers = 8, 
+                 per_host = 4, window = 32):
         """
         Get all data for Representatives/Senators
 
         INPUT
         out the legislative house
+        year, int session, any year the site has
+        workers, per_host, window, see GetData
 
         SAVE TO FILE out.csv
         data
@@ -35,34 +42,23 @@ class GetHouse(object):
         Notes on html grab from each individual official website
             str all but can be otherwise denoted
             () optional
-            regex match, tuple https://regex101.com/r/6er3zh/1 and 2
-                1 FirstName 
-                2 LastName 
-                3 
-                4 Position ()
-                5 District short int
-                6 Party char
-                7 City 
-                8 
-                9 MadisonOffice 
-                10 Telephones 
-                11 
-                12 Fax ()
-                13
-                14 DistrictPhone ()
-                15 Email
-                16 
-                17 DistrictAddress ()
-                18 
-                19 VotingAddress ()
-                10 
-                21 Staff ()
-                22 
-                23 
-                24 Committees ()
-                25
-                26
-                27 Biography ()
+            fields from legisparser.parse_left()
+                0 FirstName 
+                1 LastName 
+                2 Position ()
+                3 District short int
+                4 Party char
+                5 City 
+                6 MadisonOffice 
+                7 Telephones 
+                8 Fax ()
+                9 DistrictPhone ()
+                10 Email
+                11 DistrictAddress ()
+                12 VotingAddress ()
+                13 Staff ()
+                14 Committees ()
+                15 Biography ()
 
         TODO
         There is overlap between the following four.
@@ -92,162 +88,57 @@ class GetHouse(object):
             warning('Input house must be either "assembly" or "senate".')
             return None
         
-        if year not in [2015, 2017]:
-            warning('Input year must be either 2015 or 2017.')
-        
+        # the list walk, fetching and parsing are shared with GetData
+        GetData.__init__(self, workers, per_host, window, year = year, 
+                         journal = None)
         self.out = out
-        self.year = str(year)
-        
-        # set up regex for websites
-        ow = r'/' + self.year + r'/legislators/' + self.out + r'/'
-        pw = r'http://legis.wisconsin.gov/' + self.out + r'/'
-        official_web = re.compile(ow)
-        personal_web = re.compile(pw)
-
-        # Each representative has official website, and most have personal website
-        # official is your 4digit ID at the end of 
-        #     http://docs.legis.wisconsin.gov/YEAR/legislators/OUT/
-        # personal is your (District)/LastName at the end of
-        #     http://legis.wisconsin.gov/OUT/
-        off_header = 'http://docs.legis.wisconsin.gov'
-
-        # set up regex for official webpage
-        # https://regex101.com/r/6er3zh/2
-        # regex = r'^\n+\w+? (.+?) (\w+?)\n+((.+?)|)\n+\w+ District ' + \
-        #         r'(\d+?) \((R|D) - (.+?)\)(\s|\S)+?Madison Office:' + \
-        #         r'\s+(.+?)\s+Telephone:\n\s+(.+)\s*(Fax:\n\s+(.+)|' + \
-        #         r')\s+(District Phone:\s+(.+)|)\s+Email:\n(.+)\s+(' + \
-        #         r'District Address:\s+(.+)|)\s+(Voting Address:\s+' + \
-        #         r'(.+)|)\s*(Staff:\n((\s|\S)+?)|)\n(Current Commit' + \
-        #         r'tees\n((\s|\S)+?)|)\n\s+(Biography\n((.| |\n)+)|)$'
-        regex = r'^\n+\w+? (.+?) (\w+?)\n+((.+?)|)\n+\w+ District ' + \
-                r'(\d+?) \((R|D) - (.+?)\)(\s|\S)+?Madison Office:' + \
-                r'\s+(.+?)\s+Telephone:\n\s+(.+)\s*(Fax:\n\s+(.+)|)' + \
-                r'\s+(District Phone:\s+(.+)|)\s+Email:\n(.+)\s+' + \
-                r'(District Address:\s+(.+)|)\s+(Voting Address:\s+' + \
-                r'(.+)|)\s*(Staff:\n((\s|\S)+?)|)\n(Current Committees' + \
-                r'\n((\s|\S)+?)|)\n\s+(Biography\n((.| |\n)+)|)$'
-        self.regex = re.compile(regex)
 
-        # Go to main list and parse html
-        url = 'https://docs.legis.wisconsin.gov/' + \
-              self.year + '/legislators/' + self.out
-        text = load_txt(url)
-        parser = BeautifulSoup(text, "lxml")
-        legislators = parser.body.find_all('div', attrs={'class':'rounded'})
+        # list of legislators, and house to csv, written as they come
+        header = ['HID', 'FirstName', 'LastName', 'Position', 'District', 
+                  'Party', 'City', 'MadisonOffice', 'Telephones', 'Fax', 
+                  'DistrictPhone', 'Email', 'DistrictAddress', 
+                  'VotingAddress', 'Staff', 'Committees', 'Biography', 
+                  'OfficialWeb', 'PersonalWeb']
+        names = LineSink(out + '_list.txt', lambda h: h[1] + ' ' + h[2])
+        #quotechar="'", lineterminator = '\r\n'
+        # also see utils.py rm_unicode()
+        house = CSVSink(out + '.csv', header, delimiter='|', 
+                        quoting = csv.QUOTE_NONE, escapechar = '\\')
 
         # for each legislator
-        house = []
-        for legis in legislators:
-            # ignore class="breadcrumb rounded"
-            if legis['class'][0] == 'breadcrumb': continue
-    
-            # find the websites of this legislator
-            official, personal = None, None
-            for link in legis.find_all('a'):
-                tmp = link.get('href')
-                if tmp:
-                    if official and personal: break
-                    if official_web.match(tmp) is not None:
-                        official = off_header + tmp #tmp[-4:]
-                    if personal_web.match(tmp):
-                        personal = tmp
-            
-            # go to official site and grab all other information
-            if official: 
-                left, _ = self.get_official_html(official)
-                # ignore right for now TODO 
-                
-                # match for data
-                match = self.regex.search(left)
+        fetched = self._getlegislators_fetched(out, self.year, 
+                                               author_index = False)
+        with names, house:
+            for site, pages, _ in fetched:
+                official, personal, _ = site
+                text = pages.get(official)
+                if text is None:
+                    warning('Official page not fetched, skipped.', official)
+                    continue
                 
-                # retrieve data
-                if match:
-                    # retrieve data
-                    rep = self.edit_left(match)
-                else:             
-                    warn = 'No data parsed for representative. No regex match.'
-                    warn1 = 'NO DATA ADDED.'
-                    warning(warn, warn1, official, left)
+                # parse official site for data, ignore right for now TODO 
+                _, fields = self._getlegislators_parse(official, text)
+                if not fields:
                     # rep = ['', ''] + [None for i in xrange(14)]
                     # if this is added, tag no longer works (duplicate, also None)
                     continue
                 
+                # retrieve data
+                with timed('edit'):
+                    rep = self.edit_left(fields)
+                
                 # also feed websites, see TODO
                 
                 # get an ID index for each user
                 tag = self.out[0].upper() + "%02d" % int(rep[3])
                 rep = [tag] + rep + [official, personal]
-                house.append(rep)
-            else:
-                warn = 'Website missing of a legislator: official'
-                warning(warn, official, legis.find_all('a'))
-                continue
-        
-        # save list of legislators to file
-        fn = out + '_list.txt'
-        with open(fn, 'w') as f:
-            for h in house:
-                f.write(h[1] + ' ' + h[2] + '\n')
-
-        # write house to csv
-        fn = out + '.csv'
-        header = ['HID', 'FirstName', 'LastName', 'Position', 'District', 
-                  'Party', 'City', 'MadisonOffice', 'Telephones', 'Fax', 
-                  'DistrictPhone', 'Email', 'DistrictAddress', 
-                  'VotingAddress', 'Staff', 'Committees', 'Biography', 
-                  'OfficialWeb', 'PersonalWeb']
-        with open(fn, 'wb') as f:
-            #quotechar="'", lineterminator = '\r\n'
-            # also see utils.py rm_unicode()
-            writer = csv.writer(f, delimiter='|', quoting = csv.QUOTE_NONE, 
-                                escapechar = '\\')
-            writer.writerow(header)
-            writer.writerows(house)
+                names.write(rep)
+                house.write(rep)
 
-        print len(house)
+        print house.rows
         return None
 
 
-    def get_official_html(self, official):
-        """
-        Get HTML from official website
-        Return (left, right) information
-        Currently ignoring the right information
-        
-        INPUT
-        official, a str url
-        
-        OUTPUT
-            left, right: text from website
-
-        """
-        
-        # parse html
-        text = load_txt(official)
-        parser = BeautifulSoup(text, 'lxml')
-        info = parser.body.find_all('div', attrs={'class':'span6'})
-
-        if len(info) != 2:
-            warn = 'This site does not have 2 <div class="span6">'
-            for i in info: 
-                print '--'
-                print i
-            warning(warn, len(info) + ' div retrieved', official)
-
-        # retrieve text from left side  (info[0])
-        # and remove \u2018 | \u2019 to make csv happy
-        left = info[0].get_text()
-        left = rm_unicode(left)
-        
-        # retrive text from right side
-        #right = info[1].get_text()
-        #right = rm_unicode(right)
-        right = None
-        
-        return left, right
-
-
     def edit_address(self, txt):
         """Reformat address"""
     
@@ -352,12 +243,12 @@ class GetHouse(object):
         return txt.rstrip().lstrip().replace("\n", "\\n")
 
 
-    def edit_left(self, match):
+    def edit_left(self, fields):
         """
         Reduce data for Representatives/Senators
     
         INPUT
-        match the regex search matches, retrieve with match.group(i)
+        fields, the 16 fields from legisparser.parse_left()
     
         OUTPUT
         rep
@@ -380,9 +271,7 @@ class GetHouse(object):
 
         """
         
-        # get matches
-        rep = list(match.group(1, 2, 4, 5, 6, 7, 9, 10, 12,
-                               14, 15, 17, 19, 21, 24, 27))
+        rep = list(fields)
         
         # Addresses
         # Room 113 NorthState CapitolP.O. Box 8952Madison, WI 53708
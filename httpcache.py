@@ -0,0 +1,250 @@
+from utils import *
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib2
+import weakref
+
+# caches not closed, their index is saved at exit
+_open = weakref.WeakSet()
+
+def _save_open():
+    for cache in list(_open):
+        cache.save()
+
+atexit.register(_save_open)
+
+class HTTPCache(object):
+    """
+    Disk-backed response cache for load_txt
+
+    Pages are stored by url with their ETag and Last-Modified headers.
+    Stale pages are revalidated with a conditional GET, so unchanged pages
+    cost a 304 instead of a download. Least recently used pages are evicted
+    once the cache grows past max_bytes.
+
+
+    Example
+
+    from httpcache import HTTPCache
+    from getdata import GetData
+    HTTPCache(max_age = 3600).install()
+    GetData().getlegislators()
+
+    """
+
+    def __init__(self, path = '.httpcache', max_age = 0, offline = False,
+                 max_bytes = 256 * 2**20, save_every = 100):
+        """
+        Setup
+
+        INPUT
+        path, str directory of the cache
+        max_age, seconds a page is used without revalidation, None forever
+        offline, bool, never touch the network, missing pages raise IOError
+        max_bytes, int size of all bodies before evicting
+        save_every, int pages stored between saves of the index, it is
+            also saved by close() and at exit
+
+        """
+
+        self.path = path
+        self.max_age = max_age
+        self.offline = offline
+        self.max_bytes = max_bytes
+        self.save_every = save_every
+        # pages stored since the index was saved
+        self.dirty = 0
+
+        # url: {key, etag, modified, fetched, used, size}
+        self.index_file = os.path.join(path, 'index.json')
+        self.index = {}
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        elif os.path.exists(self.index_file):
+            with open(self.index_file, 'r') as f:
+                self.index = json.load(f)
+
+        self.size = sum(entry['size'] for entry in self.index.values())
+        self.lock = threading.RLock()
+        # the loader under ours while installed, see install()
+        self.previous = None
+        self.installed = False
+
+        # access times change on every hit, save them at exit
+        _open.add(self)
+
+    def install(self):
+        """Route load_txt through this cache"""
+
+        self.previous = install_loader(self.load)
+        self.installed = True
+        return self
+
+    def uninstall(self):
+        """Load through the previous loader again, and save the index"""
+
+        if self.installed:
+            install_loader(self.previous)
+            self.installed = False
+        self.save()
+
+    def close(self):
+        """Save the index, it is no longer saved at exit"""
+
+        self.save()
+        _open.discard(self)
+
+    def _body_file(self, entry):
+        """File holding the body of a cache entry"""
+
+        return os.path.join(self.path, entry['key'])
+
+    def _read(self, url, entry):
+        """Body of a cache entry, marked as used, None if it was evicted"""
+
+        with self.lock:
+            if self.index.get(url) is not entry:
+                return None
+            with open(self._body_file(entry), 'rb') as f:
+                text = f.read()
+            entry['used'] = time.time()
+
+        return text
+
+    def fresh(self, entry):
+        """If entry can be used without revalidation"""
+
+        if self.offline or self.max_age is None:
+            return True
+
+        return time.time() - entry['fetched'] < self.max_age
+
+    def load(self, url):
+        """
+        Grab text from string url, through the cache
+
+        INPUT
+        url, str
+
+        OUTPUT
+        text, str
+
+        """
+
+        # looked up and read under the lock, so evict() cannot remove it
+        with self.lock:
+            entry = self.index.get(url)
+            if entry and self.fresh(entry):
+                return self._read(url, entry)
+
+        if self.offline:
+            raise IOError('Offline and not in cache: ' + url)
+
+        # conditional GET
+        headers = {}
+        if entry:
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry['modified']:
+                headers['If-Modified-Since'] = entry['modified']
+
+        try:
+            status, info, text = http_get(url, headers)
+        except IOError as e:
+            cached = self._read(url, entry) if entry else None
+            if cached is not None:
+                warning('Fetch failed, using cached page', url, e)
+                return cached
+            if isinstance(e, urllib2.HTTPError):
+                # the error page, as urllib.urlopen gave it, not cached so
+                # it is fetched again next time
+                return e.read()
+            raise
+
+        if status == 304 and entry:
+            with self.lock:
+                entry['fetched'] = time.time()
+            cached = self._read(url, entry)
+            if cached is not None:
+                return cached
+            # evicted meanwhile
+            status, info, text = http_get(url)
+
+        self.store(url, text, info.get('etag'), info.get('last-modified'))
+        return text
+
+    def store(self, url, text, etag = None, modified = None):
+        """
+        Save a page to the cache, evicting old pages if it is too big
+
+        INPUT
+        url, str
+        text, str body
+        etag, modified, str response headers
+
+        """
+
+        key = hashlib.sha1(url).hexdigest()
+        entry = {'key': key, 'etag': etag, 'modified': modified,
+                 'fetched': time.time(), 'used': time.time(),
+                 'size': len(text)}
+
+        with self.lock:
+            with open(self._body_file(entry), 'wb') as f:
+                f.write(text)
+
+            old = self.index.get(url)
+            if old:
+                self.size -= old['size']
+            self.index[url] = entry
+            self.size += entry['size']
+
+            self.evict()
+            self.dirty += 1
+            if self.dirty >= self.save_every:
+                self.save()
+
+    def evict(self):
+        """Remove least recently used pages until under max_bytes"""
+
+        with self.lock:
+            if self.size <= self.max_bytes:
+                return
+
+            lru = sorted(self.index.items(), key = lambda x: x[1]['used'])
+            for url, entry in lru:
+                if self.size <= self.max_bytes:
+                    break
+                try:
+                    os.remove(self._body_file(entry))
+                except OSError:
+                    pass
+                self.size -= entry['size']
+                del self.index[url]
+
+    def save(self):
+        """Write the index to disk"""
+
+        with self.lock:
+            tmp = self.index_file + '.tmp'
+            with open(tmp, 'w') as f:
+                json.dump(self.index, f)
+            os.rename(tmp, self.index_file)
+            self.dirty = 0
+
+    def clear(self):
+        """Remove every page from the cache"""
+
+        with self.lock:
+            for entry in self.index.values():
+                try:
+                    os.remove(self._body_file(entry))
+                except OSError:
+                    pass
+            self.index = {}
+            self.size = 0
+            self.save()
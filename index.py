@@ -0,0 +1,363 @@
+"""
+In-memory index of the scraped output, for lookups without rescanning
+
+Three relations, each looked up from either side in O(1) plus the k
+results, with the role or kind of each link:
+    committee, person and committee, role Chair, CoChair, ViceChair,
+        CommitteeClerk, LegislativeCouncilStaff, Member or Other
+    bill, person and bill, kind Sponsor for BillIndex (authored, co-authored
+        or cosponsored, legislators.csv does not tell them apart), Author
+        or Cosponsor from proposals.csv
+    topic, committee and topic letter of committee_topics.txt
+
+Persons are legislators by PID, from legislators.csv, and names as the
+page gives them, from committees.csv and proposals.csv, unless committee
+names are resolved to PIDs, see resolve.py.
+
+An index is saved to a snapshot file that other processes map into
+memory and query as is, see Snapshot, so opening it only reads the names
+of the legislators; other strings are read from the map as looked up.
+
+
+Example
+
+from index import Index, Snapshot
+idx = Index.load('legislators.csv', 'committees.csv')
+idx.committees('1533')         # [('Committee on Rules', 'Chair'), ...]
+idx.members('Senate Committee on Agriculture', 'Chair')
+idx.sponsors('sb19', 'Cosponsor')
+idx.save('legis.idx')
+
+idx = Snapshot('legis.idx')     # in another process
+idx.bills('1533')
+
+"""
+
+from utils import *
+from records import read_committees, read_legislators, read_rows
+from resolve import ROLES, Resolver
+import array
+import marshal
+import mmap
+import os
+import re
+import struct
+import sys
+
+RELATIONS = ['committee', 'bill', 'topic']
+# a positioned committee of legislators.csv, eg 'Committee on Rules (Chair)'
+POSITIONED = re.compile(r'^(.*?)\s*\(([^()]+)\)$')
+# snapshot file, see Index.save()
+MAGIC = 'LEGIDX2\n'
+
+class Query(object):
+    """
+    Lookups of an index, abstract: subclasses implement _links(), see
+    Index and Snapshot
+    Results are lists of (other side, role or kind)
+    """
+
+    def _links(self, relation, side, key):
+        """
+        Links of key, abstract, every lookup goes through it
+
+        INPUT
+        relation, str of RELATIONS
+        side, 0 if key is the first of the relation (person, committee),
+            1 if the second (committee, bill, topic)
+        key, str
+
+        OUTPUT
+        list of (str other, str kind)
+
+        """
+
+        raise NotImplementedError('%s does not implement _links()' %
+                                  type(self).__name__)
+
+    def _kind(self, links, kind):
+        if kind is None:
+            return links
+        return [link for link in links if link[1] == kind]
+
+    def committees(self, person, role = None):
+        """Committees of a PID or name, (committee, role)"""
+
+        return self._kind(self._links('committee', 0, person), role)
+
+    def members(self, committee, role = None):
+        """Persons on a committee, (PID or name, role), eg role 'Chair'"""
+
+        return self._kind(self._links('committee', 1, committee), role)
+
+    def bills(self, person, kind = None):
+        """Bills of a PID or name, (bill, kind)"""
+
+        return self._kind(self._links('bill', 0, person), kind)
+
+    def sponsors(self, bill, kind = None):
+        """Persons on a bill, (PID or name, kind), eg kind 'Cosponsor'"""
+
+        return self._kind(self._links('bill', 1, bill), kind)
+
+    def topics(self, committee):
+        """Topic letters of a committee"""
+
+        return [t for t, kind in self._links('topic', 0, committee)]
+
+    def committees_on(self, topic):
+        """Committees of a topic letter"""
+
+        return [c for c, kind in self._links('topic', 1, topic)]
+
+class Index(Query):
+    """Relations held in dicts, built from the scraped files"""
+
+    def __init__(self):
+        # relation: ({first: list of (second, kind)},
+        #            {second: list of (first, kind)})
+        self.relations = dict((r, ({}, {})) for r in RELATIONS)
+        # relation: set of (first, second, kind), to add each link once
+        self.seen = dict((r, set()) for r in RELATIONS)
+        # PID: 'FirstName LastName'
+        self.names = {}
+
+    @classmethod
+    def load(cls, legislators = 'legislators.csv',
+             committees = 'committees.csv', topics = 'committee_topics.txt',
+             proposals = None, resolve = False):
+        """
+        Index of the scraped files, None or missing files are skipped
+
+        INPUT
+        legislators, str legislators.csv or sessions.csv
+        committees, str committees.csv
+        topics, str committee_topics.txt
+        proposals, str proposals.csv
+        resolve, bool, key the legislators of committees.csv by PID, see
+            resolve.py, names not resolved are kept
+
+        """
+
+        idx = cls()
+        legs = []
+        if legislators and os.path.exists(legislators):
+            legs = list(read_legislators(legislators))
+            for leg in legs:
+                idx.add_legislator(leg)
+        resolver = Resolver(legs) if resolve else None
+        if committees and os.path.exists(committees):
+            for com in read_committees(committees):
+                idx.add_committee(com, resolver)
+        if resolver:
+            resolver.report()
+        if topics and os.path.exists(topics):
+            with open(topics, 'r') as f:
+                for line in f:
+                    name, _, letters = line.rstrip('\r\n').partition(';')
+                    idx.add_topics(name, letters)
+        if proposals and os.path.exists(proposals):
+            for header, row in read_rows(proposals):
+                idx.add_proposal(row)
+
+        return idx
+
+    def add(self, relation, first, second, kind):
+        """Link first and second in relation"""
+
+        if not first or not second:
+            return
+        link = (intern(first), intern(second), intern(kind or ''))
+        if link in self.seen[relation]:
+            return
+        self.seen[relation].add(link)
+
+        forward, backward = self.relations[relation]
+        forward.setdefault(link[0], []).append((link[1], link[2]))
+        backward.setdefault(link[1], []).append((link[0], link[2]))
+
+    def add_legislator(self, leg):
+        """Committees and bills of a records.Legislator"""
+
+        pid = leg.PID
+        self.names[pid] = '%s %s' % (leg.FirstName, leg.LastName)
+
+        for committee in leg.PositionedCommittees or ():
+            match = POSITIONED.match(committee)
+            if match:
+                # Vice-Chair as in committees.csv, ViceChair
+                role = match.group(2).replace('-', '')
+                self.add('committee', pid, match.group(1), role)
+            else:
+                self.add('committee', pid, committee, 'Member')
+        for committee in leg.Committees or ():
+            self.add('committee', pid, committee, 'Member')
+
+        for bill in leg.BillIndex or ():
+            self.add('bill', pid, bill, 'Sponsor')
+
+    def add_committee(self, com, resolver = None):
+        """
+        Persons and topics of a records.Committee
+        resolver, resolve.Resolver of the names to PIDs, None to keep names
+        """
+
+        for m in com.memberships():
+            person = m.Name
+            if resolver and m.Role in ROLES:
+                person = resolver.resolve(m.Name) or m.Name
+            self.add('committee', person, com.CommitteeName, m.Role)
+        self.add_topics(com.CommitteeName, com.ComTopics)
+
+    def add_topics(self, committee, letters):
+        """Topics of a committee, a str of letters"""
+
+        for letter in letters or '':
+            self.add('topic', committee, letter, None)
+
+    def add_proposal(self, row):
+        """Authors and cosponsors of a row of proposals.csv"""
+
+        bill = row[0]
+        for column, kind in [(3, 'Author'), (4, 'Cosponsor')]:
+            for name in (row[column] or '').split(';'):
+                self.add('bill', name.strip(), bill, kind)
+
+    def _links(self, relation, side, key):
+        return self.relations[relation][side].get(key, [])
+
+    def name(self, pid):
+        """FirstName LastName of a PID"""
+
+        return self.names.get(pid)
+
+    def save(self, fn):
+        """
+        Snapshot the index to a file, see Snapshot
+
+        Layout: MAGIC, uint32 size of the header, the marshal'ed header,
+        then per relation and side two uint32 arrays: start, the first
+        link of each str id, and links, (other id, kind id) pairs, then
+        the strings: a uint32 array of the offset of each, and their bytes.
+        Ids are in sorted order of the strings, so a str is found by
+        bisection.
+
+        """
+
+        # every str gets an id
+        strings = set()
+        for relation in RELATIONS:
+            for link in self.seen[relation]:
+                strings.update(link)
+        for pid, name in self.names.items():
+            strings.update((pid, name))
+        strings = sorted(strings)
+        ids = dict((s, i) for i, s in enumerate(strings))
+
+        arrays = []
+        for relation in RELATIONS:
+            for side in (0, 1):
+                links = self.relations[relation][side]
+                start, flat = array.array('I', [0]), array.array('I')
+                for i, s in enumerate(strings):
+                    for other, kind in links.get(s, []):
+                        flat.append(ids[other])
+                        flat.append(ids[kind])
+                    start.append(len(flat) // 2)
+                arrays.append(((relation, side), start, flat))
+
+        # byte offsets of the arrays from the end of the header
+        offsets, offset = {}, 0
+        for key, start, flat in arrays:
+            offsets[key] = (offset, offset + 4 * len(start))
+            offset += 4 * (len(start) + len(flat))
+        ends = array.array('I', [0])
+        for s in strings:
+            ends.append(ends[-1] + len(s))
+        arrays.append((None, ends, array.array('I')))
+        names = [(ids[pid], ids[name]) for pid, name in self.names.items()]
+        data = marshal.dumps({'count': len(strings), 'names': names,
+                              'arrays': offsets,
+                              'strings': (offset, offset + 4 * len(ends))})
+
+        tmp = fn + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(MAGIC + struct.pack('<I', len(data)) + data)
+            # arrays 4 byte aligned
+            f.write('\0' * (-f.tell() % 4))
+            for key, start, flat in arrays:
+                for a in (start, flat):
+                    # little endian, as Snapshot reads them
+                    if sys.byteorder == 'big':
+                        a.byteswap()
+                    a.tofile(f)
+            f.write(''.join(strings))
+        os.rename(tmp, fn)
+
+class Snapshot(Query):
+    """
+    Index saved by Index.save(), mapped into memory
+    Only the names of the legislators are read on opening, links and the
+    strings they point to are read from the map
+    """
+
+    def __init__(self, fn):
+        with open(fn, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+
+        if self.map[:len(MAGIC)] != MAGIC:
+            raise ValueError('Not an index snapshot: ' + fn)
+        size, = struct.unpack_from('<I', self.map, len(MAGIC))
+        start = len(MAGIC) + 4
+        header = marshal.loads(self.map[start:start + size])
+        base = start + size + (-(start + size) % 4)
+
+        # byte offsets of the string offsets and the strings in the map
+        self.count = header['count']
+        self.ends, self.text = [base + o for o in header['strings']]
+        self.names = dict((self._string(p), self._string(n))
+                          for p, n in header['names'])
+        # (relation, side): byte offsets of start and links in the map
+        self.arrays = dict((key, (base + s, base + l))
+                           for key, (s, l) in header['arrays'].items())
+
+    def _string(self, i):
+        """str of id i"""
+
+        lo, hi = struct.unpack_from('<II', self.map, self.ends + 4 * i)
+        return self.map[self.text + lo:self.text + hi]
+
+    def _id(self, key):
+        """id of str key by bisection, None if not in the index"""
+
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._string(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count and self._string(lo) == key:
+            return lo
+        return None
+
+    def _links(self, relation, side, key):
+        i = self._id(key)
+        if i is None:
+            return []
+
+        start, links = self.arrays[relation, side]
+        lo, hi = struct.unpack_from('<II', self.map, start + 4 * i)
+        flat = struct.unpack_from('<%dI' % (2 * (hi - lo)), self.map,
+                                  links + 8 * lo)
+
+        return [(self._string(flat[j]), self._string(flat[j + 1]))
+                for j in xrange(0, len(flat), 2)]
+
+    def name(self, pid):
+        """FirstName LastName of a PID"""
+
+        return self.names.get(pid)
+
+    def close(self):
+        self.map.close()
@@ -0,0 +1,117 @@
+from utils import *
+import json
+import os
+import threading
+
+class Journal(object):
+    """
+    Append-only record of the finished units of a crawl and their results,
+    so an interrupted crawl resumes where it stopped
+
+    Each unit, eg a legislator or committee page, is one json line of
+    [unit, result] written as soon as the unit is done. A crawl started
+    with resume on, over a journal left by an interrupted one, reuses those
+    results without fetching or parsing again; otherwise the old journal
+    is discarded, as the site may have changed since. The journal is
+    removed once the crawl finishes.
+
+
+    Example
+
+    from journal import Journal
+    journal = Journal('crawl_journal.jsonl', resume = True)
+    for url in urls:
+        if url in journal:
+            row = journal.get(url)
+        else:
+            row = parse(load_txt(url))
+            journal.record(url, row)
+    journal.finish()
+
+    """
+
+    def __init__(self, path, fsync = False, resume = False):
+        """
+        Open the journal, reading the units of an interrupted crawl
+
+        INPUT
+        path, str file
+        fsync, bool, fsync each unit so it survives a power loss
+        resume, bool, reuse the units of a journal left at path, else it is
+            emptied
+
+        """
+
+        self.path = path
+        self.fsync = fsync
+        self.lock = threading.Lock()
+
+        # unit: result
+        self.units = {}
+        if os.path.exists(path) and not resume:
+            if os.path.getsize(path):
+                warning('Discarding journal of an earlier crawl, '
+                        'pass resume = True to resume it', path)
+            os.remove(path)
+        if os.path.exists(path):
+            with open(path, 'rb+') as f:
+                data = f.read()
+                # drop the line being written when the crawl stopped
+                end = data.rfind('\n') + 1
+                if end < len(data):
+                    f.truncate(end)
+            for line in data[:end].splitlines():
+                unit, result = json.loads(line)
+                self.units[encode(unit)] = encode(result)
+            if self.units:
+                warning('Resuming crawl from journal', path,
+                        '%d units done' % len(self.units))
+
+        self.f = open(path, 'a')
+
+    def __contains__(self, unit):
+        return unit in self.units
+
+    def get(self, unit, default = None):
+        """Result of a finished unit"""
+
+        return self.units.get(unit, default)
+
+    def record(self, unit, result):
+        """
+        Mark a unit finished
+
+        INPUT
+        unit, str eg 'legislator:' + official url
+        result, anything json can hold, eg the parsed row
+
+        """
+
+        line = json.dumps([unit, result]) + '\n'
+        with self.lock:
+            self.units[unit] = result
+            self.f.write(line)
+            self.f.flush()
+            if self.fsync:
+                os.fsync(self.f.fileno())
+
+    def finish(self):
+        """The crawl is complete, remove the journal"""
+
+        with self.lock:
+            self.f.close()
+            self.units = {}
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+def encode(x):
+    """x from json with unicode as utf8 str, see crawlstate.encode"""
+
+    if isinstance(x, unicode):
+        return x.encode('utf8')
+    if isinstance(x, list):
+        return [encode(i) for i in x]
+    if isinstance(x, dict):
+        return dict((encode(k), encode(v)) for k, v in x.items())
+
+    return x
@@ -0,0 +1,173 @@
+"""
+Section-anchored parser for the left side of an official legislator page
+
+Replaces the single legislator regex (https://regex101.com/r/6er3zh/2),
+whose nested (\s|\S)+? groups backtrack on malformed pages. The text is cut
+at the known labels with str.find, so time is linear in page size, and a
+missing section leaves its fields None instead of dropping the legislator.
+
+"""
+
+from utils import *
+import re
+
+# Representative Scott Allen
+NAME = re.compile(r'^\w+? (.+?) (\w+?)$')
+# Assembly District 97 (R - Waukesha)
+DISTRICT = re.compile(r'^\w+ District (\d+?) \((R|D) - (.+?)\)')
+
+# contact labels in page order, and if the field skips leading whitespace
+CONTACT = [('Fax:\n', True),
+           ('District Phone:', True),
+           ('Email:\n', False),
+           ('District Address:', True),
+           ('Voting Address:', True)]
+
+def _line(text, start, skip_space = True):
+    """
+    Rest of the line from start, optionally after leading whitespace
+
+    OUTPUT
+    str, None if nothing is there
+
+    """
+
+    if skip_space:
+        while start < len(text) and text[start].isspace():
+            start += 1
+    end = text.find('\n', start)
+    if end == -1:
+        end = len(text)
+
+    return text[start:end] or None
+
+def _section_end(text, label):
+    """
+    Where the section before a label ends: at the first newline of the
+    whitespace run in front of the label
+    """
+
+    run = label
+    while run > 0 and text[run-1].isspace():
+        run -= 1
+    end = text.find('\n', run, label)
+
+    return run if end == -1 else end
+
+def parse_left(left):
+    """
+    Parse the text of the left side of an official legislator page
+
+    INPUT
+    left, str text from rm_unicode(info[0].get_text())
+
+    OUTPUT
+    fields, list of str or None, None if the name/district header is missing
+        0 FirstName
+        1 LastName
+        2 Position ()
+        3 District
+        4 Party
+        5 City
+        6 MadisonOffice
+        7 Telephones
+        8 Fax ()
+        9 DistrictPhone ()
+        10 Email
+        11 DistrictAddress ()
+        12 VotingAddress ()
+        13 Staff ()
+        14 Committees ()
+        15 Biography ()
+
+    """
+
+    fields = [None] * 16
+
+    # header: first non-blank lines, name, optional position, district
+    # with the position after each line
+    header, pos = [], 0
+    while len(header) < 3 and pos < len(left):
+        end = left.find('\n', pos)
+        if end == -1:
+            end = len(left)
+        if left[pos:end].strip():
+            header.append((left[pos:end], end))
+        pos = end + 1
+    if len(header) < 2:
+        return None
+
+    name = NAME.match(header[0][0])
+    if not name:
+        return None
+    fields[0:2] = name.group(1, 2)
+
+    line, pos = header[1]
+    district = DISTRICT.match(line)
+    if not district and len(header) == 3:
+        fields[2] = line
+        line, pos = header[2]
+        district = DISTRICT.match(line)
+    if not district:
+        return None
+    fields[3:6] = district.group(1, 2, 3)
+
+    # later sections, any of which may be missing
+    missing = []
+    staff = left.find('Staff:\n')
+    committees = left.find('Current Committees\n')
+    bio = left.find('Biography\n')
+    ends = [i for i in (staff, committees, bio) if i != -1]
+    contact_end = min(ends) if ends else len(left)
+
+    # contact
+    start = left.find('Madison Office:', pos, contact_end)
+    if start == -1:
+        missing.append('Madison Office:')
+        start = pos
+    else:
+        start += len('Madison Office:')
+        phone = left.find('Telephone:\n', start, contact_end)
+        office = _line(left, start)
+        fields[6] = office.rstrip() if office else None
+        if phone == -1:
+            missing.append('Telephone:')
+        else:
+            start = phone + len('Telephone:\n')
+            fields[7] = _line(left, start)
+
+    for i, (label, skip_space) in enumerate(CONTACT):
+        pos = left.find(label, start, contact_end)
+        if pos == -1:
+            continue
+        start = pos + len(label)
+        fields[8+i] = _line(left, start, skip_space)
+    if fields[10] is None:
+        missing.append('Email:')
+
+    # staff, up to the committees or biography
+    if staff != -1:
+        start = staff + len('Staff:\n')
+        if committees > start and left[committees-1] == '\n':
+            end = committees - 1
+        elif bio > start:
+            end = _section_end(left, bio)
+        else:
+            end = len(left)
+        fields[13] = left[start:end] or None
+
+    # committees, up to the biography
+    if committees != -1:
+        start = committees + len('Current Committees\n')
+        end = _section_end(left, bio) if bio > start else len(left)
+        fields[14] = left[start:end].rstrip('\n') or None
+
+    # biography, the rest of the page
+    if bio != -1:
+        fields[15] = left[bio + len('Biography\n'):] or None
+
+    if missing:
+        warning('Partial legislator page, missing ' + ', '.join(missing),
+                fields[0], fields[1])
+
+    return fields
@@ -0,0 +1,133 @@
+"""
+Arrays saved as numpy .npz files, without needing numpy
+
+An .npz is a zip of .npy files, each a short text header giving the
+dtype and shape, then the raw little-endian items. Arrays are written from
+array.array and lists of str, and read back as the same, so numpy is not
+needed here but np.load() reads the files as they are.
+
+
+Example
+
+from npz import save_npz, load_npz
+import array
+save_npz('x.npz', {'counts': array.array('i', [1, 2, 3]),
+                   'names': ['a', 'b', 'c']})
+load_npz('x.npz')['counts']      # (array('i', [1, 2, 3]), (3,))
+
+import numpy as np               # if installed
+np.load('x.npz')['names']
+
+"""
+
+from utils import *
+import array
+import ast
+import os
+import struct
+import sys
+import zipfile
+
+MAGIC = '\x93NUMPY\x01\x00'
+# array typecode: numpy dtype kind
+KINDS = {'b': 'i', 'h': 'i', 'i': 'i', 'l': 'i',
+         'B': 'u', 'H': 'u', 'I': 'u', 'L': 'u', 'f': 'f', 'd': 'f'}
+
+def npy(items, shape = None):
+    """
+    .npy file of an array
+
+    INPUT
+    items, array.array, or list of str saved as fixed width bytes
+    shape, tuple of int, None for one dimension
+
+    OUTPUT
+    str
+
+    """
+
+    if isinstance(items, array.array):
+        size = items.itemsize
+        descr = '%s%s%d' % ('|' if size == 1 else '<', KINDS[items.typecode],
+                            size)
+        if sys.byteorder == 'big' and size > 1:
+            items = array.array(items.typecode, items)
+            items.byteswap()
+        data = items.tostring()
+    else:
+        size = max([len(s) for s in items] + [1])
+        descr = '|S%d' % size
+        data = ''.join(s.ljust(size, '\0') for s in items)
+
+    shape = tuple(shape or (len(items),))
+    header = "{'descr': '%s', 'fortran_order': False, 'shape': %r, }" % \
+             (descr, shape)
+    # the data starts 64 byte aligned, the header ends in '\n'
+    header += ' ' * (-(len(MAGIC) + 2 + len(header) + 1) % 64) + '\n'
+
+    return MAGIC + struct.pack('<H', len(header)) + header + data
+
+def from_npy(data):
+    """
+    Array of an .npy file written by npy()
+
+    OUTPUT
+    items, array.array or list of str
+    shape, tuple of int
+
+    """
+
+    if data[:6] != MAGIC[:6]:
+        raise ValueError('Not an npy file')
+    size, = struct.unpack_from('<H', data, 8)
+    header = ast.literal_eval(data[10:10 + size])
+    if header['fortran_order']:
+        raise ValueError('Fortran order arrays are not read')
+    body = data[10 + size:]
+    descr = header['descr']
+
+    if descr[1] == 'S':
+        width = int(descr[2:])
+        items = [body[i:i + width].rstrip('\0')
+                 for i in xrange(0, len(body), width)]
+    else:
+        kind, width = descr[1], int(descr[2:])
+        typecode = [t for t in KINDS if KINDS[t] == kind and
+                    array.array(t).itemsize == width][0]
+        items = array.array(typecode)
+        items.fromstring(body)
+        if sys.byteorder == 'big' and width > 1:
+            items.byteswap()
+
+    return items, header['shape']
+
+def save_npz(fn, arrays, shapes = None):
+    """
+    Save arrays to an .npz file
+
+    INPUT
+    fn, str file
+    arrays, dict of name: array.array or list of str
+    shapes, dict of name: shape of the arrays not of one dimension
+
+    """
+
+    shapes = shapes or {}
+    tmp = fn + '.tmp'
+    with zipfile.ZipFile(tmp, 'w', zipfile.ZIP_STORED) as z:
+        for name, items in sorted(arrays.items()):
+            z.writestr(name + '.npy', npy(items, shapes.get(name)))
+    os.rename(tmp, fn)
+
+def load_npz(fn):
+    """
+    Arrays of an .npz file written by save_npz()
+
+    OUTPUT
+    dict of name: (items, shape), see from_npy()
+
+    """
+
+    with zipfile.ZipFile(fn) as z:
+        return dict((name[:-len('.npy')], from_npy(z.read(name)))
+                    for name in z.namelist() if name.endswith('.npy'))
@@ -0,0 +1,136 @@
+from utils import *
+import hashlib
+import inspect
+import os
+import shelve
+import threading
+
+class ParseCache(object):
+    """
+    Parse results by the page they were parsed from
+
+    A result is kept under (kind, parser version, sha1 of the page body),
+    so a page byte-identical to one parsed before is not parsed again,
+    whatever its url. The parser version is a hash of the source of the
+    functions and the tables doing the parsing, see parser_version(), so
+    results of an older parser are never used and are dropped when the
+    cache is opened.
+
+
+    Example
+
+    from parsecache import ParseCache, parser_version
+    import legisparser
+    cache = ParseCache('.parsecache', {'left': parser_version(legisparser)})
+    fields = cache.get('left', text)
+    if fields is ParseCache.MISS:
+        fields = legisparser.parse_left(text)
+        cache.put('left', text, fields)
+    cache.save()
+
+    """
+
+    # get() of a page not in the cache, None is a valid result
+    MISS = object()
+
+    def __init__(self, path = '.parsecache', versions = None):
+        """
+        Open the cache, dropping results of other parser versions
+
+        INPUT
+        path, str file of the cache
+        versions, dict of kind: str parser version of the results used
+
+        """
+
+        self.path = path
+        self.versions = dict(versions or {})
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+        # kind:version:sha1 of the page: result
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.db = shelve.open(path, protocol = 2)
+
+        stale = [key for key in self.db.keys()
+                 if key.split(':')[0] in self.versions and
+                 key.split(':')[1] != self.versions[key.split(':')[0]]]
+        for key in stale:
+            del self.db[key]
+        if stale:
+            warning('Parser changed, dropped cached results', path,
+                    '%d results' % len(stale))
+
+    def key(self, kind, text):
+        """Key of the result of a kind of page"""
+
+        body = text.encode('utf8') if isinstance(text, unicode) else text
+        return '%s:%s:%s' % (kind, self.versions.get(kind, ''),
+                             hashlib.sha1(body or '').hexdigest())
+
+    def get(self, kind, text):
+        """
+        Result of a page parsed before
+
+        INPUT
+        kind, str eg 'committee'
+        text, str page body
+
+        OUTPUT
+        result, ParseCache.MISS if not in the cache
+
+        """
+
+        key = self.key(kind, text)
+        with self.lock:
+            if key in self.db:
+                self.hits += 1
+                return self.db[key]
+            self.misses += 1
+
+        return ParseCache.MISS
+
+    def put(self, kind, text, result):
+        """Remember the result of a page, anything pickle can hold"""
+
+        key = self.key(kind, text)
+        with self.lock:
+            self.db[key] = result
+
+    def save(self):
+        """Write the cache to disk"""
+
+        with self.lock:
+            self.db.sync()
+
+def parser_version(*parts):
+    """
+    Version of a parser, the sha1 of its parts
+    Any change to them gives a new version
+
+    INPUT
+    parts, functions, classes or modules, by their source, and the tables
+        they parse with, dicts, lists or regexes, by their contents
+
+    OUTPUT
+    str short sha1
+
+    """
+
+    sha = hashlib.sha1()
+    for part in parts:
+        if inspect.ismodule(part) or inspect.isclass(part) or \
+           inspect.isroutine(part):
+            sha.update(inspect.getsource(part))
+        elif hasattr(part, 'pattern'):
+            sha.update(repr((part.pattern, part.flags)))
+        elif isinstance(part, dict):
+            sha.update(repr(sorted(part.items())))
+        else:
+            sha.update(repr(part))
+        sha.update('\0')
+
+    return sha.hexdigest()[:12]
@@ -0,0 +1,118 @@
+from utils import *
+import collections
+import multiprocessing
+import threading
+
+class ParsePool(object):
+    """
+    Process pool for the CPU-bound parse and edit of fetched pages
+
+    Pages are handed to worker processes as raw text, and results come
+    back in the order the pages went in, at most window pages ahead of the
+    writer. With one process everything runs inline in this process.
+
+
+    Example
+
+    from parsepool import ParsePool
+    pool = ParsePool(processes = 4)
+    for url, row in pool.imap(parse_page, urls, lambda u: (load_txt(u),)):
+        ...
+    pool.close()
+
+    """
+
+    def __init__(self, processes = 1, window = 32):
+        """
+        Setup, the pool is started on first use
+
+        INPUT
+        processes, int worker processes, None for one per core, 1 inline
+        window, int max pages being parsed ahead of the one yielded
+
+        """
+
+        self.processes = processes or multiprocessing.cpu_count()
+        self.window = window
+        self.pool = None
+        self.lock = threading.Lock()
+
+    def _start(self):
+        """The worker processes, started once"""
+
+        with self.lock:
+            if self.pool is None:
+                self.pool = multiprocessing.Pool(self.processes)
+            return self.pool
+
+    def imap(self, func, items, args = lambda item: (item,)):
+        """
+        Apply func to items in the pool, yielding in order as they finish
+
+        INPUT
+        func, top-level function, so it can be pickled
+        items, iterable
+        args, function of an item, the picklable args of func, None to pass
+            the item through without parsing, eg a row reused from a journal
+
+        OUTPUT
+        generator of (item, result), result None for items passed through
+
+        """
+
+        if self.processes == 1:
+            for item in items:
+                a = args(item)
+                yield item, func(*a) if a is not None else None
+            return
+
+        pool = self._start()
+        pending = collections.deque()
+        for item in items:
+            a = args(item)
+            # timings of the worker are added to ours, see _get()
+            job = pool.apply_async(run_timed, (func,) + a) \
+                  if a is not None else None
+            pending.append((item, job))
+            if len(pending) >= self.window:
+                yield self._get(*pending.popleft())
+        while pending:
+            yield self._get(*pending.popleft())
+
+    def _get(self, item, job):
+        """(item, result) of a job, adding its stage times to ours"""
+
+        if job is None:
+            return item, None
+
+        result, times = job.get()
+        for stage, (seconds, calls) in times.items():
+            stage_times[stage] += seconds
+            stage_calls[stage] += calls
+
+        return item, result
+
+    def close(self):
+        """Stop the worker processes"""
+
+        with self.lock:
+            if self.pool is not None:
+                self.pool.close()
+                self.pool.join()
+                self.pool = None
+
+def run_timed(func, *args):
+    """
+    func(*args) in a worker process, with the stage times it took
+    See ParsePool.imap()
+
+    OUTPUT
+    result, dict of stage: (seconds, calls)
+
+    """
+
+    reset_timed()
+    result = func(*args)
+
+    return result, dict((stage, (stage_times[stage], stage_calls[stage]))
+                        for stage in stage_times)
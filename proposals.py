@@ -0,0 +1,199 @@
+from bs4 import BeautifulSoup
+import csv
+import lxml
+import re
+from utils import *
+from fetcher import Fetcher
+from sinks import CSVSink
+from sqlsink import ProposalSQLSink
+
+# Introduced by Representatives Allen and Kooyenga; cosponsored by Senator
+# Darling.
+INTRODUCED = re.compile(r'Introduced by (?:the )?(.+?)' +
+                        r'(?:;\s*cosponsored by (.+?))?\.?\s*$', re.M)
+RELATING = re.compile(r'Relating to:?\s*(.+)')
+# Representatives, Senator, ... in front of a list of names
+TITLES = re.compile(r'^(?:Representatives?|Senators?)\s+')
+NAMES = re.compile(r',\s*(?:and\s+)?|\s+and\s+')
+
+class GetProposals(object):
+    """
+    Get the detail page of each distinct bill in BillIndex
+    Outputs 8 fields to 'proposals.csv'
+
+    Bills are collected across all legislators first, so each proposal is
+    fetched once however many legislators list it.
+
+
+    Example
+
+    from getdata import GetData
+    from proposals import GetProposals
+    GetData().getlegislators()
+    GetProposals().getproposals()
+
+    """
+
+    def __init__(self, year = 2017, workers = 8, per_host = 4, window = 32):
+        """
+        Setup
+
+        INPUT
+        year, int session of the bills
+        workers, number of pages fetched concurrently
+        per_host, max pages fetched concurrently from one host
+        window, max proposals fetched ahead of the one being parsed
+
+        """
+
+        self.year = str(year)
+        self.docs = r'http://docs.legis.wisconsin.gov'
+        self.fetcher = Fetcher(workers, per_host)
+        self.window = window
+
+    def bills(self, fn = 'legislators.csv'):
+        """
+        Distinct bills of the BillIndex column of a legislators file
+
+        INPUT
+        fn, str file written by GetData.getlegislators()
+
+        OUTPUT
+        bills, list of str eg ['ab47', 'sb19'], in order first seen
+
+        """
+
+        with open(fn, 'rb') as f:
+            reader = csv.reader(f, delimiter='|', quoting = csv.QUOTE_NONE,
+                                escapechar = '\\')
+            column = next(reader).index('BillIndex')
+            bills = [b for row in reader for b in row[column].split(';')]
+
+        return unique(filter(None, bills))
+
+    def proposal_url(self, bill):
+        """Detail page of a bill"""
+
+        return self.docs + r'/' + self.year + r'/proposals/' + bill
+
+    def parse_proposal(self, bill, text):
+        """
+        Parse the detail page of a bill
+
+        INPUT
+        bill, str eg 'ab47'
+        text, str html of proposal_url(bill)
+
+        OUTPUT
+        data
+            [Bill, Title, RelatingTo, Authors, Cosponsors,
+             Status, History, Link]
+            Authors, Cosponsors, History are ; joined
+            Status is the last action of History
+
+        """
+
+        with timed('soup'):
+            soup = BeautifulSoup(text, 'lxml')
+
+        with timed('rm_unicode'):
+            page = rm_unicode(soup.get_text())
+
+        with timed('parse'):
+            # title, eg 2017 Assembly Bill 47
+            h1 = soup.find('h1')
+            title = rm_unicode(h1.get_text().strip()) if h1 else None
+
+            relating = RELATING.search(page)
+            relating = relating.group(1).strip() if relating else None
+
+            # authors, cosponsors
+            authors, cosponsors = [], []
+            introduced = INTRODUCED.search(page)
+            if introduced:
+                authors = self.edit_names(introduced.group(1))
+                cosponsors = self.edit_names(introduced.group(2))
+
+            # history, rows of date/house, action
+            history, status = [], None
+            for tr in soup.find_all('tr'):
+                cells = rm_unicode_all(td.get_text(' ', strip = True)
+                                       for td in tr.find_all('td'))
+                if len(cells) < 2:
+                    continue
+                history.append(' '.join(filter(None, cells[:2])))
+                status = cells[1]
+
+        if not (title or introduced or history):
+            warning('Nothing parsed for proposal, still added.', bill)
+
+        data = [bill, title, relating, joiner(authors), joiner(cosponsors),
+                status, joiner(history), self.proposal_url(bill)]
+        return [d if d else None for d in data]
+
+    def edit_names(self, txt):
+        """
+        Names of a list of legislators
+        'Representatives Allen, Kooyenga and Tittl' to
+            ['Allen', 'Kooyenga', 'Tittl']
+        """
+
+        if not txt:
+            return []
+
+        names = []
+        # Representatives A and B; Senator C
+        for part in txt.split(';'):
+            part = TITLES.sub('', part.strip())
+            names.extend(n.strip() for n in NAMES.split(part))
+
+        return filter(None, names)
+
+    def getproposals(self, bills = None, flush = 1, fsync = False,
+                     db = None):
+        """
+        Fetch and parse each proposal once, writing them to 'proposals.csv'
+
+        INPUT
+        bills, iterable of str bills, None for self.bills()
+        flush, int rows between flushes of the output file, 0 only at the end
+        fsync, bool, also fsync the output file on each flush
+        db, also load into this database, str sqlite file or a DB-API
+            connection, see sqlsink.py
+
+        OUTPUT
+        int number of proposals written
+
+        """
+
+        if bills is None:
+            bills = self.bills()
+        bills = unique(bills)
+
+        header = ['Bill', 'Title', 'RelatingTo', 'Authors', 'Cosponsors',
+                  'Status', 'History', 'Link']
+        rows = CSVSink('proposals.csv', header, flush = flush, fsync = fsync,
+                       delimiter='|', quoting = csv.QUOTE_NONE,
+                       escapechar = '\\')
+        outs = [rows]
+        if db is not None:
+            outs.append(ProposalSQLSink(db, self.year))
+
+        # each proposal fetched once, a window ahead
+        fetched = self.fetcher.imap(bills, lambda b: [self.proposal_url(b)],
+                                    self.window)
+        try:
+            for bill, pages in timed_iter('fetch', fetched):
+                text = pages.get(self.proposal_url(bill))
+                if text is None:
+                    warning('Proposal not fetched, skipped.', bill)
+                    continue
+
+                proposal = self.parse_proposal(bill, text)
+                for out in outs:
+                    out.write(proposal)
+        finally:
+            for out in outs:
+                out.close()
+
+        return rows.rows
@@ -0,0 +1,282 @@
+"""
+Typed records of the scraped rows
+
+A Legislator or Committee holds the columns of a row of legislators.csv
+or committees.csv as attributes of the same name, in __slots__, with
+District and Region as int, Party as one char, and staff, committees,
+bills, persons and hearings as tuples of interned str, so nothing is split
+again downstream and records repeated over sessions share their strings.
+to_row() gives back the row exactly as the csv files have it.
+
+
+Example
+
+from records import read_legislators, read_committees
+for leg in read_legislators('legislators.csv'):
+    print leg.District, leg.Party, leg.Committees
+for com in read_committees('committees.csv'):
+    for m in com.memberships():
+        print m.Name, m.Role
+
+"""
+
+from utils import *
+import csv
+
+# interned tuples, see Multi
+_tuples = {}
+
+def intern_str(x):
+    """x interned if it is a str"""
+
+    return intern(x) if type(x) is str else x
+
+class Text(object):
+    """A str column, interned unless it is mostly unique"""
+
+    def __init__(self, interned = True):
+        self.interned = interned
+
+    def load(self, x):
+        return intern_str(x) if self.interned else x
+
+    def dump(self, x):
+        return x
+
+class Int(object):
+    """An int column, None if empty"""
+
+    def load(self, x):
+        if x is None or x == '':
+            return None
+        return int(x)
+
+    def dump(self, x):
+        return None if x is None else str(x)
+
+class Char(Text):
+    """A one character column, eg Party"""
+
+    def load(self, x):
+        if x and len(x) != 1:
+            raise ValueError('Not one character: %r' % x)
+        return intern_str(x)
+
+class Multi(object):
+    """
+    A ; joined column as an interned tuple of its items
+    lead is a separator the column starts with, eg ';Committee on Rules'
+    """
+
+    def __init__(self, sep = ';', lead = ''):
+        self.sep = sep
+        self.lead = lead
+
+    def load(self, x):
+        if x is None:
+            return None
+        if x == '':
+            return ()
+        if self.lead and x.startswith(self.lead):
+            x = x[len(self.lead):]
+        items = tuple(intern_str(i) for i in x.split(self.sep))
+        return _tuples.setdefault(items, items)
+
+    def dump(self, x):
+        if x is None:
+            return None
+        if not x:
+            return ''
+        return self.lead + self.sep.join(x)
+
+class Record(object):
+    """
+    Row of a csv file as typed attributes
+    Subclasses set fields and __slots__
+    """
+
+    __slots__ = ()
+
+    # (column, type) in csv order
+    fields = []
+
+    def __init__(self, **values):
+        for name in self.__slots__:
+            setattr(self, name, values.pop(name, None))
+        if values:
+            raise TypeError('Unknown fields: ' + ', '.join(sorted(values)))
+
+    @classmethod
+    def from_row(cls, row):
+        """Record of a row, a list of the csv columns"""
+
+        if len(row) != len(cls.fields):
+            raise ValueError('%s row of %d columns, not %d' %
+                             (cls.__name__, len(row), len(cls.fields)))
+
+        record = cls()
+        for (name, kind), x in zip(cls.fields, row):
+            setattr(record, name, kind.load(x))
+
+        return record
+
+    def to_row(self):
+        """The row of the record, as it was read"""
+
+        return [kind.dump(getattr(self, name)) for name, kind in self.fields]
+
+    def __eq__(self, other):
+        return type(self) is type(other) and \
+               all(getattr(self, n) == getattr(other, n)
+                   for n in self.__slots__)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return '%s(%s)' % (type(self).__name__,
+                           ', '.join('%s=%r' % (n, getattr(self, n))
+                                     for n in self.__slots__))
+
+class Legislator(Record):
+    """Row of legislators.csv, see GetData.header"""
+
+    fields = [('HID', Text()), ('PID', Text()),
+              ('FirstName', Text()), ('LastName', Text()),
+              ('Position', Text()), ('District', Int()), ('Party', Char()),
+              ('City', Text()), ('MadisonOffice', Text()),
+              ('Telephones', Text()), ('Fax', Text()),
+              ('DistrictPhone', Text()), ('Email', Text(False)),
+              ('DistrictAddress', Text()), ('VotingAddress', Text()),
+              ('Staff', Multi()),
+              ('PositionedCommittees', Multi(lead = ';')),
+              ('Committees', Multi(lead = ';')),
+              ('Biography', Text(False)),
+              ('OfficialWeb', Text(False)), ('PersonalWeb', Text(False)),
+              ('Region', Int()), ('BillIndex', Multi())]
+    # Session, str year, not a column of legislators.csv but of sessions.csv
+    __slots__ = [name for name, kind in fields] + ['Session']
+
+class Committee(Record):
+    """
+    Row of committees.csv, see GetCommittee
+
+    The topics of a row are one column per character, as the csv has
+    them, and one str here.
+    """
+
+    fields = [('CommitteeName', Text()), ('CommitteeType', Text()),
+              ('Link', Text(False)), ('Header', Text()),
+              ('Chair', Multi()), ('CoChair', Multi()),
+              ('ViceChair', Multi()), ('CommitteeClerk', Multi()),
+              ('LegislativeCouncilStaff', Multi()), ('Member', Multi()),
+              ('Other', Multi()), ('Hearings', Multi()),
+              ('ComTopics', Text())]
+    __slots__ = [name for name, kind in fields]
+
+    # person columns, the role of their persons in a Membership
+    roles = ['Chair', 'CoChair', 'ViceChair', 'CommitteeClerk',
+             'LegislativeCouncilStaff', 'Member', 'Other']
+
+    @classmethod
+    def from_row(cls, row):
+        # 12 columns without topics, 13 with None when the page had no info
+        topics = row[12:]
+        if topics in ([None], ['']):
+            topics = None
+        else:
+            topics = ''.join(topics)
+
+        return super(Committee, cls).from_row(list(row[:12]) + [topics])
+
+    def to_row(self):
+        row = Record.to_row(self)
+        topics = row.pop()
+
+        return row + ([None] if topics is None else list(topics))
+
+    def memberships(self):
+        """
+        Persons of the committee, once per role
+
+        OUTPUT
+        list of Membership
+
+        """
+
+        members, seen = [], set()
+        for role in self.roles:
+            for name in getattr(self, role) or ():
+                name = name.strip()
+                if name and (name, role) not in seen:
+                    seen.add((name, role))
+                    members.append(Membership(self.Link, intern_str(name),
+                                              role))
+
+        return members
+
+class Membership(object):
+    """A person in a role on a committee"""
+
+    __slots__ = ['Link', 'Name', 'Role']
+
+    def __init__(self, link, name, role):
+        self.Link = link
+        self.Name = name
+        self.Role = role
+
+    def __eq__(self, other):
+        return isinstance(other, Membership) and \
+               (self.Link, self.Name, self.Role) == \
+               (other.Link, other.Name, other.Role)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((self.Link, self.Name, self.Role))
+
+    def __repr__(self):
+        return 'Membership(%r, %r, %r)' % (self.Link, self.Name, self.Role)
+
+def read_rows(fn, escapechar = '\\'):
+    """
+    Header and rows of a csv file written by the scrapers
+    committees.csv is written without an escapechar
+    """
+
+    with open(fn, 'rb') as f:
+        reader = csv.reader(f, delimiter='|', quoting = csv.QUOTE_NONE,
+                            escapechar = escapechar)
+        header = next(reader)
+        for row in reader:
+            yield header, row
+
+def read_legislators(fn = 'legislators.csv'):
+    """
+    Legislators of legislators.csv, or sessions.csv with their Session
+
+    OUTPUT
+    generator of Legislator
+
+    """
+
+    for header, row in read_rows(fn):
+        if header[0] == 'Session':
+            leg = Legislator.from_row(row[1:])
+            leg.Session = intern_str(row[0])
+        else:
+            leg = Legislator.from_row(row)
+        yield leg
+
+def read_committees(fn = 'committees.csv'):
+    """
+    Committees of committees.csv
+
+    OUTPUT
+    generator of Committee
+
+    """
+
+    for header, row in read_rows(fn, escapechar = None):
+        yield Committee.from_row(row)
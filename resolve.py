@@ -0,0 +1,209 @@
+"""
+Legislator PIDs of the person names on committee pages
+
+Committee pages name legislators as 'Rep. VanderMeer' or 'Sen. Harsdorf',
+legislators.csv has their HID, PID, first and last names. A Resolver
+hashes the legislators by (house, last name) once, then each name is one
+lookup: the prefix gives the house, Rep. the Assembly and Sen. the
+Senate, and names shared within a house, eg the two Reps. Brooks, are
+told apart by a district, eg 'Rep. Brooks (R-60)', or a first initial,
+eg 'Rep. R. Brooks'. Names that match no one or more than one legislator
+are reported, not guessed.
+
+
+Example
+
+from resolve import resolve_committees
+resolve_committees('legislators.csv', 'committees.csv')
+# committee_members.csv: Link|CommitteeName|Role|Name|PID
+
+"""
+
+from utils import *
+from records import read_committees, read_legislators
+from sinks import CSVSink
+import csv
+import re
+
+# house of a name prefix, the first letter of a HID
+HOUSES = {'rep': 'A', 'representative': 'A', 'sen': 'S', 'senator': 'S'}
+# 'Rep. ' or 'Senator '
+PREFIX = re.compile(r'^\s*(Rep|Representative|Sen|Senator)\b\.?\s*', re.I)
+# a party and district, eg '(R-60)' or '(60th)'
+DISTRICT = re.compile(r'\s*\(([^()]*?)(\d+)[^()]*\)')
+# anything else in parentheses, eg '(Chair)'
+PARENS = re.compile(r'\s*\([^()]*\)')
+SUFFIXES = set(['jr', 'sr', 'ii', 'iii', 'iv'])
+# roles of legislators, not staff, see records.Committee.roles
+ROLES = ['Chair', 'CoChair', 'ViceChair', 'Member', 'Other']
+
+def name_key(name):
+    """Lowercase letters of a name, eg 'vandermeer' for 'Vander Meer'"""
+
+    return re.sub('[^a-z]', '', rm_unicode(name).lower())
+
+class Resolver(object):
+    """
+    Hash join of person names to legislators
+
+
+    Example
+
+    from resolve import Resolver
+    resolver = Resolver('legislators.csv')
+    resolver.resolve('Rep. VanderMeer')     # '1624'
+    resolver.report()
+
+    """
+
+    def __init__(self, legislators = 'legislators.csv'):
+        """
+        Index the legislators
+
+        INPUT
+        legislators, str legislators.csv or sessions.csv, or an iterable
+            of records.Legislator
+
+        """
+
+        if isinstance(legislators, basestring):
+            legislators = read_legislators(legislators)
+
+        # (house, last name key): list of Legislator, house None for any
+        self.legislators = defaultdict(list)
+        for leg in legislators:
+            house = (leg.HID or ' ')[0]
+            key = name_key(leg.LastName or '')
+            for h in (house, None):
+                if all(l.PID != leg.PID for l in self.legislators[h, key]):
+                    self.legislators[h, key].append(leg)
+
+        # name: PID or None, each distinct name is resolved once
+        self.resolved = {}
+        # name: 'unknown' or 'ambiguous'
+        self.unresolved = {}
+
+    def parse(self, name):
+        """
+        Parts of a person name
+
+        OUTPUT
+        house, 'A', 'S' or None without a prefix
+        district, int or None
+        words, list of str of the name, eg ['R.', 'Brooks']
+
+        """
+
+        house, district = None, None
+        prefix = PREFIX.match(name)
+        if prefix:
+            house = HOUSES[prefix.group(1).lower()]
+            name = name[prefix.end():]
+        match = DISTRICT.search(name)
+        if match:
+            district = int(match.group(2))
+        name = PARENS.sub('', name)
+
+        words = name.replace(',', ' ').split()
+        while len(words) > 1 and name_key(words[-1]) in SUFFIXES:
+            words.pop()
+
+        return house, district, words
+
+    def candidates(self, house, district, words):
+        """Legislators a parsed name may be, see parse()"""
+
+        if not words:
+            return []
+
+        # the whole name as a last name, eg 'Vander Meer', else the last
+        # word, with the words before it as first names
+        legs = self.legislators.get((house, name_key(''.join(words))))
+        first = None
+        if not legs and len(words) > 1:
+            legs = self.legislators.get((house, name_key(words[-1])))
+            first = name_key(words[0])
+        legs = legs or []
+
+        if len(legs) > 1 and district is not None:
+            legs = [l for l in legs if l.District == district]
+        if len(legs) > 1 and first:
+            # an initial or the whole first name
+            legs = [l for l in legs
+                    if name_key(l.FirstName or '').startswith(first)]
+
+        return legs
+
+    def resolve(self, name):
+        """
+        PID of a person name, None if it is not one legislator
+
+        INPUT
+        name, str eg 'Rep. VanderMeer'
+
+        OUTPUT
+        str PID or None
+
+        """
+
+        if name in self.resolved:
+            return self.resolved[name]
+
+        legs = self.candidates(*self.parse(name))
+        pid = legs[0].PID if len(legs) == 1 else None
+        self.resolved[name] = pid
+        if pid is None:
+            self.unresolved[name] = 'ambiguous' if legs else 'unknown'
+
+        return pid
+
+    def report(self):
+        """Warn of the names that were not resolved"""
+
+        if not self.unresolved:
+            return
+
+        for reason, match in [('unknown', 'no legislator'),
+                              ('ambiguous', 'several legislators')]:
+            names = sorted(n for n, r in self.unresolved.items()
+                           if r == reason)
+            if names:
+                warning('%d of %d names match %s' %
+                        (len(names), len(self.resolved), match),
+                        '; '.join(names))
+
+def resolve_committees(legislators = 'legislators.csv',
+                       committees = 'committees.csv',
+                       out = 'committee_members.csv'):
+    """
+    Join the committee memberships to legislator PIDs
+
+    INPUT
+    legislators, str legislators.csv or sessions.csv
+    committees, str committees.csv
+
+    SAVE TO FILE committee_members.csv
+    data, one row per legislator role on a committee, PID empty if the
+        name was not resolved
+        [Link, CommitteeName, Role, Name, PID]
+
+    OUTPUT
+    Resolver, with the unresolved names
+
+    """
+
+    resolver = Resolver(legislators)
+    header = ['Link', 'CommitteeName', 'Role', 'Name', 'PID']
+    rows = CSVSink(out, header, mode = 'w', delimiter = '|',
+                   quoting = csv.QUOTE_NONE)
+    try:
+        for com in read_committees(committees):
+            for m in com.memberships():
+                if m.Role in ROLES:
+                    rows.write([m.Link, com.CommitteeName, m.Role, m.Name,
+                                resolver.resolve(m.Name)])
+    finally:
+        rows.close()
+
+    resolver.report()
+    return resolver
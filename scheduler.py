@@ -0,0 +1,309 @@
+from utils import *
+import httplib
+import random
+import socket
+import threading
+import time
+import urllib2
+import urlparse
+
+# statuses worth another try, and those meaning slow down
+RETRY_STATUS = set([429, 500, 502, 503, 504])
+THROTTLE_STATUS = set([429, 503])
+
+class Scheduler(object):
+    """
+    Polite, retrying scheduler of the network requests of a crawl
+
+    Each host has a token bucket of rate requests per second, so bursts
+    stay within a politeness budget, and a limit on requests in flight
+    that adapts to the host: it grows by one after limit fast successes
+    in a row and halves on a timeout, a throttle (429, 503), a 5xx or a
+    response slower than slow. Failed requests are retried with jittered
+    exponential backoff, and a Retry-After pauses the whole host.
+
+    Sits under loaders like httpcache.HTTPCache, so cache hits are free.
+
+
+    Example
+
+    from scheduler import Scheduler
+    from getdata import GetData
+    scheduler = Scheduler(rate = 5, timeout = 30).install()
+    GetData().getlegislators()
+    scheduler.report()
+
+    """
+
+    def __init__(self, rate = 5., burst = 5, concurrency = 2,
+                 max_concurrency = 8, timeout = 30, retries = 4,
+                 backoff = 1., max_backoff = 60., slow = 10.):
+        """
+        Setup
+
+        INPUT
+        rate, float requests per second to one host, None for no budget
+        burst, int requests to one host allowed at once after idling
+        concurrency, int requests in flight to one host to start with
+        max_concurrency, int most requests in flight to one host
+        timeout, seconds to wait on a connection before retrying
+        retries, int tries after the first before giving up
+        backoff, seconds before the first retry, doubled on each retry and
+            jittered, at most max_backoff
+        slow, seconds, slower responses lower the concurrency
+
+        """
+
+        self.rate = rate
+        self.burst = burst
+        self.concurrency = concurrency
+        self.max_concurrency = max(concurrency, max_concurrency)
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.slow = slow
+
+        # host: Host
+        self.hosts = {}
+        self.cond = threading.Condition()
+        self.started = time.time()
+        # the scheduler under ours while installed, see install()
+        self.previous = None
+        self.installed = False
+
+    def install(self):
+        """Route every network request through this scheduler"""
+
+        self.previous = install_scheduler(self)
+        self.installed = True
+        return self
+
+    def uninstall(self):
+        """Request through the previous scheduler again, if any"""
+
+        if self.installed:
+            install_scheduler(self.previous)
+            self.previous = None
+            self.installed = False
+
+    def _host(self, url):
+        """Host of url, created on demand, call holding cond"""
+
+        name = urlparse.urlparse(url).netloc
+        if name not in self.hosts:
+            self.hosts[name] = Host(self.burst, self.concurrency)
+        return self.hosts[name]
+
+    def _acquire(self, url):
+        """
+        Wait for a token and a free slot of the host of url
+
+        OUTPUT
+        host, Host with the request counted in flight
+
+        """
+
+        start = time.time()
+        with self.cond:
+            host = self._host(url)
+            while True:
+                now = time.time()
+                if self.rate:
+                    host.tokens = min(self.burst, host.tokens +
+                                      (now - host.stamp) * self.rate)
+                host.stamp = now
+
+                # paused by a Retry-After, out of slots, or out of tokens
+                wait = host.paused - now
+                if wait <= 0 and host.in_flight >= host.limit:
+                    wait = None
+                elif wait <= 0 and self.rate and host.tokens < 1:
+                    wait = (1 - host.tokens) / self.rate
+                elif wait <= 0:
+                    break
+                # woken by _release() when waiting on a slot
+                self.cond.wait(wait)
+
+            if self.rate:
+                host.tokens -= 1
+            host.in_flight += 1
+            host.stats['waited'] += time.time() - start
+
+        return host
+
+    def _release(self, host, outcome, latency, size = 0):
+        """
+        The request is done, adapt the concurrency of its host
+
+        INPUT
+        host, Host from _acquire()
+        outcome, str 'ok', 'throttled', 'timeout', 'error' for retried
+            failures, or 'failed' for those not worth a retry, eg 404
+        latency, seconds the request took
+        size, int bytes received
+
+        """
+
+        with self.cond:
+            host.in_flight -= 1
+            stats = host.stats
+            stats['requests'] += 1
+            stats['latency'] += latency
+            stats['bytes'] += size
+            stats[outcome] += 1
+
+            # additive increase on fast successes, multiplicative decrease
+            # on slow responses and failures that say slow down
+            if outcome == 'ok' and latency <= self.slow:
+                host.successes += 1
+                if host.successes >= host.limit:
+                    host.limit = min(self.max_concurrency, host.limit + 1)
+                    host.successes = 0
+            elif outcome != 'failed':
+                host.limit = max(1, host.limit // 2)
+                host.successes = 0
+
+            self.cond.notify_all()
+
+    def _pause(self, host, seconds):
+        """No requests to host for seconds, eg from a Retry-After"""
+
+        with self.cond:
+            host.paused = max(host.paused, time.time() + seconds)
+
+    def delay(self, attempt):
+        """Seconds before retry number attempt, 0 for the first retry"""
+
+        return random.uniform(0, min(self.max_backoff,
+                                     self.backoff * 2 ** attempt))
+
+    def get(self, url, headers = None):
+        """
+        Request url, waiting its turn and retrying failures
+        Used by utils.http_get() and utils.fetch_txt() once installed
+
+        INPUT
+        url, str
+        headers, dict of request headers
+
+        OUTPUT
+        status, info, text, see utils.http_get()
+
+        """
+
+        for attempt in xrange(self.retries + 1):
+            host = self._acquire(url)
+            start = time.time()
+            retry_after = None
+            try:
+                status, info, text = http_request(url, headers, self.timeout)
+            except urllib2.HTTPError as e:
+                retry = e.code in RETRY_STATUS
+                if e.code in THROTTLE_STATUS:
+                    outcome = 'throttled'
+                    retry_after = e.info().get('Retry-After')
+                else:
+                    outcome = 'error' if retry else 'failed'
+                error = e
+            except (IOError, httplib.HTTPException) as e:
+                # urllib2.URLError and socket errors are IOError
+                retry = True
+                reason = getattr(e, 'reason', e)
+                timeout = isinstance(reason, socket.timeout)
+                outcome = 'timeout' if timeout else 'error'
+                error = e
+            else:
+                self._release(host, 'ok', time.time() - start, len(text))
+                return status, info, text
+
+            self._release(host, outcome, time.time() - start)
+            if not retry or attempt == self.retries:
+                with self.cond:
+                    host.stats['gave up'] += 1
+                raise error
+
+            delay = self.delay(attempt)
+            if retry_after:
+                # seconds, the http-date form is not worth parsing
+                try:
+                    delay = max(delay, float(retry_after))
+                    self._pause(host, delay)
+                except ValueError:
+                    pass
+            with self.cond:
+                host.stats['retries'] += 1
+                host.stats['backoff'] += delay
+            time.sleep(delay)
+
+    def stats(self):
+        """
+        Statistics of the run so far
+
+        OUTPUT
+        dict of host: dict of
+            requests, int requests sent, retries included
+            ok, throttled, timeout, error, failed, int requests by outcome
+            retries, int requests that were tried again
+            gave up, int urls that failed after the last try
+            bytes, int received
+            latency, waited, backoff, float seconds summed over requests
+            limit, int current concurrency
+            pages/s, float successful requests per second of the run
+
+        """
+
+        elapsed = max(time.time() - self.started, 1e-9)
+        with self.cond:
+            stats = {}
+            for name, host in self.hosts.items():
+                stats[name] = dict(host.stats)
+                stats[name]['limit'] = host.limit
+                stats[name]['pages/s'] = host.stats['ok'] / elapsed
+
+        return stats
+
+    def report(self):
+        """Print the statistics of each host"""
+
+        for name, s in sorted(self.stats().items()):
+            requests = max(s['requests'], 1)
+            print '%s: %d requests, %.1f pages/s, %.1f KB, limit %d' % \
+                  (name, s['requests'], s['pages/s'], s['bytes'] / 1024.,
+                   s['limit'])
+            print '    ok %d, throttled %d, timeout %d, error %d, failed %d' \
+                  % (s['ok'], s['throttled'], s['timeout'], s['error'],
+                     s['failed'])
+            print '    retries %d, gave up %d, backoff %.1fs' % \
+                  (s['retries'], s['gave up'], s['backoff'])
+            print '    latency %.3fs, waited %.3fs per request' % \
+                  (s['latency'] / requests, s['waited'] / requests)
+
+    def reset(self):
+        """Start the statistics of a new run, keeping what was learned"""
+
+        with self.cond:
+            for host in self.hosts.values():
+                host.stats = Host.new_stats()
+            self.started = time.time()
+
+class Host(object):
+    """Token bucket, slots and statistics of one host, see Scheduler"""
+
+    def __init__(self, burst, limit):
+        self.tokens = burst
+        self.stamp = time.time()
+        self.limit = limit
+        self.in_flight = 0
+        self.successes = 0
+        # no requests before this time
+        self.paused = 0
+        self.stats = Host.new_stats()
+
+    @staticmethod
+    def new_stats():
+        stats = defaultdict(float)
+        for key in ['requests', 'ok', 'throttled', 'timeout', 'error',
+                    'failed', 'retries', 'gave up', 'bytes']:
+            stats[key] = 0
+        return stats
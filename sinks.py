@@ -0,0 +1,120 @@
+from utils import *
+import csv
+import os
+
+class Sink(object):
+    """
+    Output file written row by row as rows are produced, so a crash keeps
+    every row written before it and memory does not grow with the crawl
+    Rows are str written as given, subclasses write other rows
+
+
+    Example
+
+    from sinks import CSVSink, LineSink, Sink
+    with CSVSink('out.csv', header, fsync = True) as out:
+        for row in rows:
+            out.write(row)
+    with Sink('out.txt', 'w') as out:
+        out.write('one line\n')
+
+    """
+
+    def __init__(self, path, mode = 'wb', flush = 1, fsync = False):
+        """
+        Open the file
+
+        INPUT
+        path, str file
+        mode, str file mode
+        flush, int rows between flushes, 0 only at close
+        fsync, bool, also fsync on each flush so rows survive a power loss
+
+        """
+
+        self.path = path
+        self.flush_every = flush
+        self.fsync = fsync
+        self.rows = 0
+        self.f = open(path, mode)
+
+    def _write(self, row):
+        """
+        Write one row to self.f, a str written as is, eg a line with its
+        newline, subclasses format other rows, see CSVSink and LineSink
+        """
+
+        self.f.write(row)
+
+    def write(self, row):
+        """Write one row, flushing by the policy"""
+
+        with timed('csv'):
+            self._write(row)
+            self.rows += 1
+            if self.flush_every and self.rows % self.flush_every == 0:
+                self.flush()
+
+    def flush(self):
+        """Push written rows to the os, and to disk if fsync"""
+
+        self.f.flush()
+        if self.fsync:
+            os.fsync(self.f.fileno())
+
+    def close(self):
+        """Flush and close the file"""
+
+        if self.f.closed:
+            return
+        with timed('csv'):
+            self.flush()
+            self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class CSVSink(Sink):
+    """Rows written with csv.writer, see Sink"""
+
+    def __init__(self, path, header = None, mode = 'wb', flush = 1,
+                 fsync = False, **fmtparams):
+        """
+        Open the file and write the header
+
+        INPUT
+        header, list of column names, None for no header
+        fmtparams, passed to csv.writer eg delimiter = '|'
+        others, see Sink
+
+        """
+
+        Sink.__init__(self, path, mode, flush, fsync)
+        self.writer = csv.writer(self.f, **fmtparams)
+        if header:
+            self.writer.writerow(header)
+
+    def _write(self, row):
+        self.writer.writerow(row)
+
+class LineSink(Sink):
+    """Rows written as one line each, see Sink"""
+
+    def __init__(self, path, line, mode = 'w', flush = 1, fsync = False):
+        """
+        Open the file
+
+        INPUT
+        line, function of a row returning its line without newline
+        others, see Sink
+
+        """
+
+        Sink.__init__(self, path, mode, flush, fsync)
+        self.line = line
+
+    def _write(self, row):
+        self.f.write(self.line(row) + '\n')
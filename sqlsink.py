@@ -0,0 +1,310 @@
+"""
+Database sinks for the scrapers, SQLite locally and MySQL on the server
+
+Rows are buffered and loaded with one executemany per table per batch,
+inside a transaction, as upserts so a crawl can be loaded again. Child rows
+(committee members, legislator bills) of a reloaded parent are replaced.
+
+Tables
+    legislators (Session, PID) the columns of legislators.csv but BillIndex
+    legislator_bills (Session, PID, Bill) split out of BillIndex
+    committees (Link) the columns of committees.csv
+    committee_members (Link, Name, Role) split out of the person columns
+    proposals (Session, Bill) the columns of proposals.csv
+    proposal_authors (Session, Bill, Name, Role) split out of the authors
+
+
+Example
+
+from getdata import GetData
+from getcommittee import GetCommittee
+GetData().getlegislators(db = 'legis.db')
+GetCommittee(db = 'legis.db')
+
+# MySQL, any DB-API connection
+import MySQLdb
+GetCommittee(db = MySQLdb.connect(db = 'legis'))
+
+"""
+
+from utils import *
+from records import Committee, Legislator
+import sqlite3
+
+# table: (key columns, other columns)
+TABLES = {
+    'legislators': (['Session', 'PID'],
+                    ['HID', 'FirstName', 'LastName', 'Position', 'District',
+                     'Party', 'City', 'MadisonOffice', 'Telephones', 'Fax',
+                     'DistrictPhone', 'Email', 'DistrictAddress',
+                     'VotingAddress', 'Staff', 'PositionedCommittees',
+                     'Committees', 'Biography', 'OfficialWeb', 'PersonalWeb',
+                     'Region']),
+    'legislator_bills': (['Session', 'PID', 'Bill'], []),
+    'committees': (['Link'],
+                   ['CommitteeName', 'CommitteeType', 'Header', 'Chair',
+                    'CoChair', 'ViceChair', 'CommitteeClerk',
+                    'LegislativeCouncilStaff', 'Member', 'Other', 'Hearings',
+                    'ComTopics']),
+    'committee_members': (['Link', 'Name', 'Role'], []),
+    'proposals': (['Session', 'Bill'],
+                  ['Title', 'RelatingTo', 'Authors', 'Cosponsors', 'Status',
+                   'History', 'Link']),
+    'proposal_authors': (['Session', 'Bill', 'Name', 'Role'], []),
+}
+
+# length of each key column, the keys of a table within the 3072 byte
+# index limit of InnoDB at 4 bytes a character (utf8mb4)
+KEY_SIZES = {'Session': 8, 'PID': 64, 'Bill': 16, 'Link': 255, 'Name': 128,
+             'Role': 32}
+
+# child table: (parent table, columns shared with the parent)
+CHILDREN = {'legislator_bills': ('legislators', ['Session', 'PID']),
+            'committee_members': ('committees', ['Link']),
+            'proposal_authors': ('proposals', ['Session', 'Bill'])}
+
+def connect(db):
+    """
+    Connection and dialect of db
+
+    INPUT
+    db, str sqlite file, or a DB-API connection (sqlite3, MySQLdb, pymysql)
+
+    OUTPUT
+    conn, dialect str 'sqlite' or 'mysql'
+
+    """
+
+    if isinstance(db, basestring):
+        return sqlite3.connect(db), 'sqlite'
+
+    if type(db).__module__.startswith('sqlite3'):
+        return db, 'sqlite'
+
+    return db, 'mysql'
+
+def create_sql(table, dialect):
+    """CREATE TABLE statement of table"""
+
+    keys, others = TABLES[table]
+    # mysql keys need a length, see KEY_SIZES
+    columns = ['%s VARCHAR(%d) NOT NULL' % (c, KEY_SIZES[c])
+               for c in keys] + ['%s TEXT' % c for c in others]
+    columns.append('PRIMARY KEY (%s)' % ', '.join(keys))
+
+    return 'CREATE TABLE IF NOT EXISTS %s (%s)' % (table, ', '.join(columns))
+
+def upsert_sql(table, dialect):
+    """Insert or update statement of table, with parameters for every column"""
+
+    keys, others = TABLES[table]
+    columns = keys + others
+    if dialect == 'sqlite':
+        values = ', '.join(['?'] * len(columns))
+        return 'INSERT OR REPLACE INTO %s (%s) VALUES (%s)' % \
+               (table, ', '.join(columns), values)
+
+    values = ', '.join(['%s'] * len(columns))
+    # a table of only keys has nothing to update
+    update = ', '.join(['%s = VALUES(%s)' % (c, c) for c in others or keys])
+    return 'INSERT INTO %s (%s) VALUES (%s) ON DUPLICATE KEY UPDATE %s' % \
+           (table, ', '.join(columns), values, update)
+
+def delete_sql(table, dialect):
+    """Delete statement of the children of one parent row"""
+
+    mark = '?' if dialect == 'sqlite' else '%s'
+    where = ' AND '.join(['%s = %s' % (c, mark) for c in CHILDREN[table][1]])
+
+    return 'DELETE FROM %s WHERE %s' % (table, where)
+
+def split(txt):
+    """Items of a ; joined field, stripped and without blanks"""
+
+    if not txt:
+        return []
+
+    return filter(None, [t.strip() for t in txt.split(';')])
+
+class SQLSink(object):
+    """
+    Rows of one scraper upserted into the database in batches
+    Used like sinks.Sink, rows of one table as they are, subclasses of
+    more tables turn a row into their table rows
+    """
+
+    # tables this sink writes, parents first
+    tables = []
+
+    def __init__(self, db, batch = 500):
+        """
+        Open the database and create the tables
+
+        INPUT
+        db, str sqlite file or a DB-API connection, see connect(), a
+            connection is left open by close()
+        batch, int rows per transaction
+
+        """
+
+        self.conn, self.dialect = connect(db)
+        # connections opened here are closed here
+        self.owned = isinstance(db, basestring)
+        self.batch = batch
+        self.rows = 0
+
+        # table: list of tuples waiting for the next batch
+        self.pending = dict((table, []) for table in self.tables)
+
+        cursor = self.conn.cursor()
+        for table in self.tables:
+            cursor.execute(create_sql(table, self.dialect))
+        self.conn.commit()
+
+    def _rows(self, row):
+        """
+        Table rows of one scraper row
+        A sink of one table takes the row as its row, in TABLES column
+        order, a sink of more tables splits the row in its own _rows()
+
+        OUTPUT
+        dict of table: list of tuples in TABLES column order
+
+        """
+
+        if len(self.tables) != 1:
+            raise NotImplementedError('%s of %d tables needs its own _rows()'
+                                      % (type(self).__name__,
+                                         len(self.tables)))
+
+        return {self.tables[0]: [tuple(row)]}
+
+    def write(self, row):
+        """Add one scraper row, loading a batch once full"""
+
+        # utf8 str, eg rows reused by crawlstate.py, are not bound as text
+        row = [x.decode('utf8') if isinstance(x, str) else x for x in row]
+        for table, rows in self._rows(row).items():
+            self.pending[table].extend(rows)
+        self.rows += 1
+        if self.rows % self.batch == 0:
+            self.flush()
+
+    def flush(self):
+        """Load the pending rows in one transaction"""
+
+        if not any(self.pending.values()):
+            return
+
+        with timed('sql'):
+            cursor = self.conn.cursor()
+            try:
+                for table in self.tables:
+                    rows = self.pending[table]
+                    if table in CHILDREN:
+                        # replace the children of reloaded parents
+                        parent, shared = CHILDREN[table]
+                        keys = TABLES[parent][0]
+                        index = [keys.index(c) for c in shared]
+                        parents = set(tuple(r[i] for i in index)
+                                      for r in self.pending[parent])
+                        cursor.executemany(delete_sql(table, self.dialect),
+                                           sorted(parents))
+                    if rows:
+                        cursor.executemany(upsert_sql(table, self.dialect),
+                                           rows)
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+
+        for table in self.tables:
+            self.pending[table] = []
+
+    def close(self):
+        """Load what is pending, and close the sqlite file opened here"""
+
+        try:
+            self.flush()
+        finally:
+            if self.owned:
+                self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class LegislatorSQLSink(SQLSink):
+    """Rows of legislators.csv into legislators and legislator_bills"""
+
+    tables = ['legislators', 'legislator_bills']
+
+    def __init__(self, db, session, batch = 500):
+        """
+        INPUT
+        session, str year of the session the rows are from
+        others, see SQLSink
+
+        """
+
+        self.session = session
+        SQLSink.__init__(self, db, batch)
+
+    def _rows(self, row):
+        # row is the columns of legislators.csv, BillIndex last
+        leg = Legislator.from_row(row)
+        legislator = (self.session, leg.PID, leg.HID) + tuple(row[2:-1])
+
+        # the author index and cosponsored parts of BillIndex overlap
+        bills = unique(filter(None, leg.BillIndex or ()))
+
+        return {'legislators': [legislator],
+                'legislator_bills': [(self.session, leg.PID, b) 
+                                     for b in bills]}
+
+class CommitteeSQLSink(SQLSink):
+    """Rows of committees.csv into committees and committee_members"""
+
+    tables = ['committees', 'committee_members']
+
+    def _rows(self, row):
+        # row is the columns of committees.csv, the topics after the 12th
+        # are characters of one str, see get_committee_info()
+        com = Committee.from_row(row)
+        committee = (com.Link, com.CommitteeName, com.CommitteeType) + \
+                    tuple(row[3:12]) + (com.ComTopics or None,)
+        members = [(m.Link, m.Name, m.Role) for m in com.memberships()]
+
+        return {'committees': [committee], 'committee_members': members}
+
+class ProposalSQLSink(SQLSink):
+    """Rows of proposals.csv into proposals and proposal_authors"""
+
+    tables = ['proposals', 'proposal_authors']
+
+    def __init__(self, db, session, batch = 500):
+        """
+        INPUT
+        session, str year of the session the rows are from
+        others, see SQLSink
+
+        """
+
+        self.session = session
+        SQLSink.__init__(self, db, batch)
+
+    def _rows(self, row):
+        # row is the columns of proposals.csv
+        bill = row[0]
+        proposal = (self.session, bill) + tuple(row[1:])
+
+        authors, seen = [], set()
+        for i, role in [(3, 'Author'), (4, 'Cosponsor')]:
+            for person in split(row[i]):
+                if (person, role) not in seen:
+                    seen.add((person, role))
+                    authors.append((self.session, bill, person, role))
+
+        return {'proposals': [proposal], 'proposal_authors': authors}
@@ -0,0 +1,14 @@
+import os
+import sys
+
+# the modules are at the root of the repo
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+FIXTURES = os.path.join(ROOT, 'tests', 'fixtures')
+
+def fixture(*parts):
+    """Path of a saved fixture, see tests/fixtures"""
+
+    return os.path.join(FIXTURES, *parts)
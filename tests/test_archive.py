@@ -0,0 +1,30 @@
+import utils
+from archive import Archive
+
+def pages(url):
+    return 'page of ' + url
+
+def test_close_without_record_keeps_loader(tmpdir):
+    previous = utils.install_loader(pages)
+    try:
+        Archive(str(tmpdir.join('a.zip'))).close()
+        assert utils.load_txt('http://a') == 'page of http://a'
+    finally:
+        utils.install_loader(previous)
+
+def test_record_replay_restore_loader(tmpdir):
+    fn = str(tmpdir.join('a.zip'))
+    previous = utils.install_loader(pages)
+    try:
+        archive = Archive(fn).record()
+        assert utils.load_txt('http://a') == 'page of http://a'
+        archive.close()
+        assert utils._loader is pages
+
+        archive = Archive(fn).replay()
+        utils.install_loader(None)
+        assert archive.get('http://a') == 'page of http://a'
+        archive.close()
+        assert utils._loader is pages
+    finally:
+        utils.install_loader(previous)
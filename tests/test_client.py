@@ -0,0 +1,48 @@
+import pytest
+
+import utils
+from client import Client
+
+def client_redirecting(status):
+    """Client whose http://h pages redirect with status to https://h"""
+
+    client = Client()
+
+    def send(scheme, host, path, headers, timeout):
+        if scheme == 'http':
+            return status, 'Moved', None, \
+                   {'location': 'https://' + host + path}, ''
+        return 200, 'OK', None, {}, 'page ' + path
+
+    client._send = send
+    return client
+
+@pytest.mark.parametrize('status', [301, 308])
+def test_scheme_learned_from_permanent_redirect(status):
+    client = client_redirecting(status)
+
+    assert client.get('http://h/a')[2] == 'page /a'
+    assert client.schemes == {'h': 'https'}
+    assert client.normalize('http://h/b')[2] == 'https://h/b'
+
+@pytest.mark.parametrize('status', [302, 303, 307])
+def test_scheme_not_learned_from_temporary_redirect(status):
+    client = client_redirecting(status)
+
+    assert client.get('http://h/a')[2] == 'page /a'
+    assert client.schemes == {}
+    assert client.normalize('http://h/b')[2] == 'http://h/b'
+
+def test_uninstall_restores_previous():
+    other = Client()
+    previous = utils.install_client(other)
+    try:
+        Client().uninstall()
+        assert utils._client is other
+
+        client = Client().install()
+        assert utils._client is client
+        client.uninstall()
+        assert utils._client is other
+    finally:
+        utils.install_client(previous)
@@ -0,0 +1,77 @@
+import threading
+import time
+
+import utils
+from crawler import Crawler
+from crawlstate import CrawlState
+
+def pages(url):
+    return 'page of ' + url
+
+def crawler(**kwargs):
+    return Crawler([(2015, 'assembly'), (2015, 'senate'), (2017, 'assembly')],
+                   parallel = 3, journal = None, **kwargs)
+
+def test_cache_installed_while_crawling(tmpdir):
+    c = crawler(cache = str(tmpdir.join('cache')))
+    loaders = []
+
+    def rows(house, year):
+        loaders.append(utils._loader)
+        yield [year, house]
+
+    c.data._getlegislators_rows = rows
+    previous = utils.install_loader(pages)
+    try:
+        assert utils._loader is pages
+        assert list(c.rows()) == [('2015', ['2015', 'assembly']),
+                                  ('2015', ['2015', 'senate']),
+                                  ('2017', ['2017', 'assembly'])]
+        assert loaders == [c.cache.load] * 3
+        assert utils._loader is pages
+    finally:
+        utils.install_loader(previous)
+        c.cache.close()
+
+def test_pairs_wait_on_pages_together(tmpdir):
+    c = crawler()
+    inside = []
+    overlaps = []
+
+    def rows(house, year):
+        for i in xrange(5):
+            inside.append(house)
+            if len(inside) > 1:
+                overlaps.append(list(inside))
+            # waiting on the fetcher
+            time.sleep(0.01)
+            inside.remove(house)
+            yield [year, house, str(i)]
+
+    c.data._getlegislators_rows = rows
+    out = list(c.rows())
+
+    assert len(out) == 15
+    assert [legis[2] for year, legis in out[:5]] == list('01234')
+    assert [legis[1] for year, legis in out] == \
+           ['assembly'] * 5 + ['senate'] * 5 + ['assembly'] * 5
+    assert overlaps
+
+def test_state_shared_by_pairs(tmpdir):
+    state = CrawlState(str(tmpdir.join('state.json')))
+
+    def pair(n):
+        for i in xrange(200):
+            key = '%d/%d' % (n, i)
+            state.unchanged(key, 'page')
+            state.update(key, [key], texts = ['page'])
+            state.unchanged(key, 'page')
+
+    threads = [threading.Thread(target = pair, args = (n,)) for n in xrange(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert (state.hits, state.misses) == (800, 800)
+    assert len(state.entries) == 800
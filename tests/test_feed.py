@@ -0,0 +1,45 @@
+"""
+iter_feed() and get_committee_metadata() against what xmltodict made of
+the saved committee feeds in tests/fixtures/feeds
+"""
+
+import glob
+import json
+import os
+
+import pytest
+
+from conftest import fixture
+from utils import iter_feed
+
+FEEDS = sorted(os.path.basename(fn)[:-len('.xml')]
+               for fn in glob.glob(fixture('feeds', '*.xml')))
+
+@pytest.mark.parametrize('name', FEEDS)
+def test_committee_metadata(name):
+    from getcommittee import GetCommittee
+
+    with open(fixture('feeds', name + '.xml'), 'rb') as f:
+        feed = f.read()
+    with open(fixture('feeds', name + '.json')) as f:
+        expected = json.load(f)
+
+    committee = GetCommittee.__new__(GetCommittee)
+    committee.stamps = {}
+    assert committee.get_committee_metadata(feed, name.title()) == expected
+
+def test_iter_feed_items():
+    with open(fixture('feeds', 'joint.xml'), 'rb') as f:
+        items = list(iter_feed(f.read()))
+
+    assert len(items) == 7
+    assert items[0] == {'guid': '5b7a05a6-0001',
+                        'link': 'http://docs.legis.wisconsin.gov/2015/'
+                                'committees/joint/2207',
+                        'title': 'Joint Committee on Finance - 2016-12-17',
+                        'description': 'Joint Committee on Finance',
+                        'pubDate': 'Sat, 17 Dec 2016 07:35:58 -0600',
+                        'a10:updated': '2016-12-17T07:35:58-06:00'}
+    assert items[3]['description'] == \
+           'Joint Committee on Information Policy & Technology'
+    assert 'a10:updated' not in items[2]
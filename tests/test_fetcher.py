@@ -0,0 +1,154 @@
+import threading
+import time
+
+import utils
+from fetcher import Fetcher
+from getdata import GetData
+
+class Flaky(object):
+    """Loader failing the first fails loads of each url"""
+
+    def __init__(self, fails):
+        self.fails = fails
+        self.loads = {}
+        self.lock = threading.Lock()
+
+    def __call__(self, url):
+        with self.lock:
+            self.loads[url] = self.loads.get(url, 0) + 1
+            if self.loads[url] <= self.fails:
+                raise IOError('flaky', url)
+        return 'page of ' + url
+
+def fetch(loader, urls, **kwargs):
+    previous = utils.install_loader(loader)
+    try:
+        fetcher = Fetcher(backoff = 0, **kwargs)
+        return list(fetcher.imap(urls, window = 2))
+    finally:
+        utils.install_loader(previous)
+
+class Slow(object):
+    """Loader counting the loads in flight to each host"""
+
+    def __init__(self, delay = 0.01):
+        self.delay = delay
+        self.loads = []
+        self.inflight = {}
+        self.most = {}
+        self.lock = threading.Lock()
+
+    def __call__(self, url):
+        host = url.split('/')[2]
+        with self.lock:
+            self.loads.append(url)
+            self.inflight[host] = self.inflight.get(host, 0) + 1
+            self.most[host] = max(self.most.get(host, 0), self.inflight[host])
+        time.sleep(self.delay)
+        with self.lock:
+            self.inflight[host] -= 1
+        return 'page of ' + url
+
+def test_per_host_limit():
+    loader = Slow()
+    urls = ['http://a/%d' % i for i in xrange(12)] + \
+           ['http://b/%d' % i for i in xrange(12)]
+    previous = utils.install_loader(loader)
+    try:
+        pages = Fetcher(workers = 8, per_host = 2).fetch_all(urls)
+    finally:
+        utils.install_loader(previous)
+
+    assert pages == dict((u, 'page of ' + u) for u in urls)
+    assert loader.most == {'a': 2, 'b': 2}
+
+def test_duplicates_fetched_once():
+    loader = Slow(0)
+    urls = ['http://a/1', 'http://a/2', 'http://a/1']
+    previous = utils.install_loader(loader)
+    try:
+        out = list(Fetcher(workers = 2).fetch(urls))
+    finally:
+        utils.install_loader(previous)
+
+    assert sorted(out) == [('http://a/1', 'page of http://a/1'),
+                           ('http://a/2', 'page of http://a/2')]
+    assert sorted(loader.loads) == ['http://a/1', 'http://a/2']
+
+def test_imap_in_order_of_items():
+    loader = Slow()
+    items = [str(i) for i in xrange(10)]
+    urls_of = lambda item: ['http://a/' + item, 'http://b/' + item]
+    previous = utils.install_loader(loader)
+    try:
+        out = list(Fetcher(workers = 4).imap(items, urls_of, window = 3))
+    finally:
+        utils.install_loader(previous)
+
+    assert [item for item, pages in out] == items
+    assert out[4][1] == {'http://a/4': 'page of http://a/4',
+                         'http://b/4': 'page of http://b/4'}
+
+def test_failed_load_retried():
+    loader = Flaky(2)
+    out = fetch(loader, ['http://a/1', 'http://a/2'], retries = 2)
+
+    assert out == [('http://a/1', {'http://a/1': 'page of http://a/1'}),
+                   ('http://a/2', {'http://a/2': 'page of http://a/2'})]
+    assert loader.loads == {'http://a/1': 3, 'http://a/2': 3}
+
+def test_given_up_after_retries(monkeypatch):
+    import fetcher
+    monkeypatch.setattr(fetcher, 'warning', lambda *args: None)
+    loader = Flaky(3)
+    out = fetch(loader, ['http://a/1'], retries = 2)
+
+    assert out == [('http://a/1', {'http://a/1': None})]
+    assert loader.loads == {'http://a/1': 3}
+
+def test_unfetched_legislator_not_loaded_by_the_parser(monkeypatch):
+    import getdata
+    monkeypatch.setattr(getdata, 'warning', lambda *args: None)
+    official = 'http://docs/2017/legislators/assembly/1533'
+    site = (official, None, 'http://docs/author/1533')
+
+    data = GetData(journal = None)
+    data._getlegislators_fetched = \
+        lambda house, year: iter([(site, {official: None}, None)])
+    loads = []
+    previous = utils.install_loader(loads.append)
+    try:
+        assert list(data._getlegislators_rows('assembly', 2017)) == []
+    finally:
+        utils.install_loader(previous)
+        data.parsers.close()
+    assert loads == []
+
+def test_no_retries_under_a_scheduler(monkeypatch):
+    import fetcher
+    monkeypatch.setattr(fetcher, 'warning', lambda *args: None)
+    # the scheduler retries the requests under the loader itself
+    previous = utils.install_scheduler(object())
+    try:
+        loader = Flaky(1)
+        out = fetch(loader, ['http://a/1'], retries = 2)
+    finally:
+        utils.install_scheduler(previous)
+
+    assert out == [('http://a/1', {'http://a/1': None})]
+    assert loader.loads == {'http://a/1': 1}
+
+def test_official_page_without_two_sides_skipped(monkeypatch):
+    import getdata
+    warnings = []
+    monkeypatch.setattr(getdata, 'warning', lambda *args: warnings.append(args))
+    official = 'http://docs/2017/legislators/assembly/1533'
+    site = (official, None, 'http://docs/author/1533')
+    text = '<div class="span6"><p>Representative Sargent</p></div>'
+
+    legis, parsed = GetData(journal = None)._getlegislators_legis(
+                        'assembly', site, {official: text}, None)
+
+    assert legis is None
+    assert parsed == {'official': None}
+    assert warnings[0][1:] == ('1 div retrieved', official)
@@ -0,0 +1,94 @@
+"""
+edit_committee_info() against the output of the original parser
+
+Each tests/fixtures/committees/NAME.txt is the text of a committee site
+and NAME.json what the original edit_committee_info() made of it.
+"""
+
+import glob
+import json
+import os
+
+import pytest
+
+from conftest import fixture
+import getcommittee
+from getcommittee import GetCommittee, mask_names, split_role, unmask_names
+
+PAGES = sorted(os.path.basename(fn)[:-len('.txt')]
+               for fn in glob.glob(fixture('committees', '*.txt')))
+
+def edit(text):
+    # the edits need none of what __init__ sets up
+    return GetCommittee.__new__(GetCommittee).edit_committee_info(text)
+
+@pytest.mark.parametrize('name', PAGES)
+def test_edit_committee_info(name, monkeypatch):
+    monkeypatch.setattr(getcommittee, 'warning', lambda *args: None)
+    with open(fixture('committees', name + '.txt'), 'rb') as f:
+        text = f.read()
+    with open(fixture('committees', name + '.json')) as f:
+        expected = [str(x) if x is not None else None for x in json.load(f)]
+
+    assert edit(text) == expected
+
+def test_split_role_order():
+    # Chair before Co-Chair before Vice-Chair, whatever comes first
+    assert split_role('Sen. A (Co-Chair) Sen. B (Chair)') == \
+           ('Sen. A (Co-Chair) Sen. B', 'Chair')
+    assert split_role('Sen. C (Vice-Chair) (Co-Chair)') == \
+           ('Sen. C (Vice-Chair)', 'Co-Chair')
+    # a tag found twice is no position
+    assert split_role('Sen. D (Chair) (Chair)') is None
+    assert split_role('Sen. E') is None
+
+def test_mask_names_keeps_other_spellings():
+    text = 'Rep. VanderMeerRep. Mason\nRep. Vandermeer'
+    masked, masks = mask_names(text, ['VanderMeer'])
+
+    assert 'VanderMeer' not in masked
+    assert 'Rep. Vandermeer' in masked
+    assert unmask_names(masked, masks) == text
+
+def test_mask_names_absent():
+    assert mask_names('Rep. Mason', ['VanderMeer']) == ('Rep. Mason', {})
+
+class MacIver(GetCommittee):
+    name_exceptions = GetCommittee.name_exceptions + ['MacIver']
+
+PAGE = ('<html><div class="span5">Notify\nRep. MacIver (Chair)\n\n'
+        'Members\nMembers\nRep. MacIverRep. Mason\n</div></html>')
+
+def test_worker_given_the_tables(monkeypatch):
+    monkeypatch.setattr(getcommittee, 'warning', lambda *args: None)
+    # split at its capital
+    assert getcommittee.parse_committee(PAGE)[1] == 'Iver'
+
+    tables = MacIver.__new__(MacIver).tables()
+    info = getcommittee.parse_committee(PAGE, *tables)
+    assert info[1] == 'Rep. MacIver'
+    assert info[6] == 'Rep. MacIver;Rep. Mason'
+
+def test_subclass_tables_used_in_the_pool():
+    from fetcher import Fetcher
+    from parsepool import ParsePool
+    import utils
+
+    url = 'http://docs/2017/committees/assembly/1'
+    committee = MacIver.__new__(MacIver)
+    committee.fetcher = Fetcher(workers = 1)
+    committee.window = 2
+    committee.state = committee.journal = committee.parse_cache = None
+    committee.parsers = ParsePool(processes = 1)
+    committee.stamps = {}
+    committee.topics = {'Assembly Committee on Jobs': ''}
+
+    previous = utils.install_loader(lambda u: PAGE)
+    try:
+        rows = list(committee.get_committee_info(
+                        [['Assembly Committee on Jobs', 'Assembly', url]]))
+    finally:
+        utils.install_loader(previous)
+
+    assert rows[0][4] == 'Rep. MacIver'
+    assert rows[0][9] == 'Rep. MacIver;Rep. Mason'
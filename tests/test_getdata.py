@@ -0,0 +1,45 @@
+"""
+The house author index of tests/fixtures/authorindex/assembly.html
+"""
+
+import pytest
+
+from conftest import fixture
+import getdata
+import utils
+from getdata import GetData
+
+URL = 'http://docs.legis.wisconsin.gov/2017/related/author_index/assembly'
+
+def house_index(text, monkeypatch):
+    warnings = []
+    monkeypatch.setattr(getdata, 'warning', lambda *args: warnings.append(args))
+    previous = utils.install_loader(lambda url: text if url == URL else '')
+    try:
+        index = GetData(journal = None)._getlegislators_house_authorindex(
+                    'assembly', '2017')
+    finally:
+        utils.install_loader(previous)
+
+    return index, warnings
+
+def page():
+    with open(fixture('authorindex', 'assembly.html'), 'rb') as f:
+        return f.read()
+
+def test_house_authorindex(monkeypatch):
+    index, warnings = house_index(page(), monkeypatch)
+
+    # 1701 has no proposals, so it falls back to its own author index
+    assert index == {'1533': (['ab47', 'ab52'], ['ab30'], ['sb19']),
+                     '1638': ([], ['ab47'], [])}
+    assert warnings == []
+
+@pytest.mark.parametrize('change', [('rel=', 'data-rel='),
+                                    ('/proposals/_', '/proposals/'),
+                                    ('class="authorindex"', 'class="index"')])
+def test_changed_markup_falls_back(change, monkeypatch):
+    index, warnings = house_index(page().replace(*change), monkeypatch)
+
+    assert index is None
+    assert warnings[0][0].startswith('Nothing parsed from house author index')
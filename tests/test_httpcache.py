@@ -0,0 +1,134 @@
+import BaseHTTPServer
+import gc
+import json
+import os
+import threading
+import weakref
+
+import pytest
+
+import httpcache
+import utils
+from httpcache import HTTPCache
+
+class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """/ok/NAME is a page, /missing a 404 with a body"""
+
+    def do_GET(self):
+        if self.path.startswith('/ok/'):
+            status, body = 200, 'page ' + self.path[4:]
+        else:
+            status, body = 404, 'not here'
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    httpd = BaseHTTPServer.HTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target = httpd.serve_forever)
+    thread.daemon = True
+    thread.start()
+    yield 'http://127.0.0.1:%d' % httpd.server_port
+    httpd.shutdown()
+
+def test_error_page_returned_not_cached(server, tmpdir):
+    cache = HTTPCache(str(tmpdir))
+
+    assert cache.load(server + '/missing') == 'not here'
+    assert server + '/missing' not in cache.index
+    assert cache.load(server + '/ok/a') == 'page a'
+    assert server + '/ok/a' in cache.index
+    cache.close()
+
+def test_fetch_txt_error_page(server):
+    from client import Client
+
+    client = Client().install()
+    try:
+        assert utils.load_txt(server + '/missing') == 'not here'
+    finally:
+        client.uninstall()
+
+def test_index_saved_in_batches(server, tmpdir):
+    cache = HTTPCache(str(tmpdir), save_every = 3)
+    index = os.path.join(str(tmpdir), 'index.json')
+
+    cache.load(server + '/ok/a')
+    cache.load(server + '/ok/b')
+    assert not os.path.exists(index)
+    cache.load(server + '/ok/c')
+    with open(index) as f:
+        assert len(json.load(f)) == 3
+
+    cache.load(server + '/ok/d')
+    cache.close()
+    with open(index) as f:
+        assert len(json.load(f)) == 4
+
+def test_closed_cache_is_not_kept_alive(tmpdir):
+    cache = HTTPCache(str(tmpdir))
+    assert cache in httpcache._open
+    cache.close()
+    assert cache not in httpcache._open
+
+    ref = weakref.ref(cache)
+    del cache
+    gc.collect()
+    assert ref() is None
+
+def test_read_of_evicted_entry(tmpdir):
+    cache = HTTPCache(str(tmpdir), max_bytes = 10)
+    cache.store('http://a', 'x' * 8)
+    entry = cache.index['http://a']
+    cache.store('http://b', 'y' * 8)
+
+    assert 'http://a' not in cache.index
+    assert cache._read('http://a', entry) is None
+    cache.close()
+
+def test_load_while_evicting(server, tmpdir):
+    # pages of 6 or 7 bytes, room for about two
+    cache = HTTPCache(str(tmpdir), max_age = None, max_bytes = 14)
+    urls = [server + '/ok/%d' % i for i in xrange(8)]
+    errors = []
+
+    def work(k):
+        try:
+            for i in xrange(40):
+                url = urls[(i * (k + 1)) % len(urls)]
+                assert cache.load(url) == 'page ' + url.split('/')[-1]
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target = work, args = (k,))
+               for k in xrange(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    cache.close()
+
+    assert errors == []
+
+def test_uninstall_restores_previous_loader(tmpdir):
+    def pages(url):
+        return 'page of ' + url
+
+    previous = utils.install_loader(pages)
+    try:
+        cache = HTTPCache(str(tmpdir))
+        cache.uninstall()
+        assert utils._loader is pages
+
+        cache.install()
+        assert utils._loader == cache.load
+        cache.uninstall()
+        assert utils._loader is pages
+        cache.close()
+    finally:
+        utils.install_loader(previous)
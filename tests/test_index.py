@@ -0,0 +1,64 @@
+"""
+Snapshot of an index against the Index it was saved from
+"""
+
+import marshal
+import struct
+
+import pytest
+
+from index import MAGIC, Index, Snapshot
+
+def index():
+    idx = Index()
+    idx.names['1533'] = 'Rob Hutton'
+    idx.names['1638'] = 'Amy Loudenbeck'
+    idx.add('committee', '1533', 'Committee on Rules', 'Chair')
+    idx.add('committee', '1638', 'Committee on Rules', 'Member')
+    idx.add('committee', 'Rep. VanderMeer', 'Committee on Jobs', 'ViceChair')
+    idx.add('bill', '1533', 'ab47', 'Sponsor')
+    idx.add('bill', '1638', 'ab47', 'Cosponsor')
+    idx.add('topic', 'Committee on Jobs', 'E', None)
+    return idx
+
+def test_snapshot_answers_like_the_index(tmpdir):
+    fn = str(tmpdir.join('legis.idx'))
+    idx = index()
+    idx.save(fn)
+    snap = Snapshot(fn)
+    try:
+        for person in ['1533', '1638', 'Rep. VanderMeer', 'nobody']:
+            assert snap.committees(person) == idx.committees(person)
+            assert snap.bills(person) == idx.bills(person)
+        for committee in ['Committee on Rules', 'Committee on Jobs']:
+            assert snap.members(committee) == idx.members(committee)
+            assert snap.topics(committee) == idx.topics(committee)
+        assert snap.members('Committee on Rules', 'Chair') == \
+               [('1533', 'Chair')]
+        assert snap.sponsors('ab47', 'Cosponsor') == [('1638', 'Cosponsor')]
+        assert snap.committees_on('E') == ['Committee on Jobs']
+        assert snap.name('1638') == 'Amy Loudenbeck'
+        # past either end of the sorted strings
+        assert snap.bills('') == snap.bills('zz') == []
+    finally:
+        snap.close()
+
+def test_header_holds_only_the_names(tmpdir):
+    fn = str(tmpdir.join('legis.idx'))
+    index().save(fn)
+    with open(fn, 'rb') as f:
+        data = f.read()
+    size, = struct.unpack_from('<I', data, len(MAGIC))
+    start = len(MAGIC) + 4
+    header = repr(marshal.loads(data[start:start + size]))
+
+    # what opening a snapshot reads
+    assert 'Committee on Rules' not in header
+    assert 'ab47' not in header
+    assert len(marshal.loads(data[start:start + size])['names']) == 2
+
+def test_query_is_abstract():
+    from index import Query
+
+    with pytest.raises(NotImplementedError):
+        Query().members('Committee on Rules')
@@ -0,0 +1,52 @@
+"""
+A crawl stopped part way, then run again with and without resume
+"""
+
+import journal
+from journal import Journal
+
+def crash(path):
+    j = Journal(path)
+    j.record('legislator:1533', ['A01', '1533'])
+    j.record('legislator:1638', ['A02', '1638'])
+    j.f.write('["legislator:1701", ["A0')
+    j.f.close()
+
+def test_resume(tmpdir, monkeypatch):
+    monkeypatch.setattr(journal, 'warning', lambda *args: None)
+    path = str(tmpdir.join('journal.jsonl'))
+    crash(path)
+
+    j = Journal(path, resume = True)
+    assert 'legislator:1533' in j
+    assert j.get('legislator:1638') == ['A02', '1638']
+    # the line being written when it stopped is dropped
+    assert 'legislator:1701' not in j
+
+    j.record('legislator:1701', ['A03', '1701'])
+    j.f.close()
+    assert len(Journal(path, resume = True).units) == 3
+
+def test_stale_journal_discarded(tmpdir, monkeypatch):
+    warnings = []
+    monkeypatch.setattr(journal, 'warning', lambda *args: warnings.append(args))
+    path = str(tmpdir.join('journal.jsonl'))
+    crash(path)
+
+    j = Journal(path)
+    assert j.units == {}
+    assert 'legislator:1533' not in j
+    assert warnings[0][1] == path
+    j.record('legislator:1701', ['A03', '1701'])
+    j.f.close()
+    assert open(path).read() == '["legislator:1701", ["A03", "1701"]]\n'
+
+def test_getdata_resume_opt_in(tmpdir, monkeypatch):
+    from getdata import GetData
+    monkeypatch.setattr(journal, 'warning', lambda *args: None)
+    path = str(tmpdir.join('legislators_journal.jsonl'))
+
+    crash(path)
+    assert 'legislator:1533' in GetData(journal = path, resume = True).journal
+    crash(path)
+    assert 'legislator:1533' not in GetData(journal = path).journal
@@ -0,0 +1,30 @@
+"""
+parse_left() against the legislator regex it replaced
+
+Each tests/fixtures/legislators/NAME.txt is the left side of an official
+page and NAME.json the groups the original regex gave for it.
+"""
+
+import glob
+import json
+import os
+
+import pytest
+
+from conftest import fixture
+from legisparser import parse_left
+
+PAGES = sorted(os.path.basename(fn)[:-len('.txt')]
+               for fn in glob.glob(fixture('legislators', '*.txt')))
+
+@pytest.mark.parametrize('name', PAGES)
+def test_parse_left(name):
+    with open(fixture('legislators', name + '.txt'), 'rb') as f:
+        left = f.read()
+    with open(fixture('legislators', name + '.json')) as f:
+        expected = [str(x) if x is not None else None for x in json.load(f)]
+
+    assert parse_left(left) == expected
+
+def test_no_header():
+    assert parse_left('\n\nContact\nMadison Office:\n') is None
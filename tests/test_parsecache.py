@@ -0,0 +1,52 @@
+import re
+
+from parsecache import ParseCache, parser_version
+from utils import rm_unicode
+
+def test_results_kept_by_version(tmpdir):
+    path = str(tmpdir.join('parsecache'))
+    cache = ParseCache(path, {'left': '1', 'right': '1'})
+    cache.put('left', 'page', ['a'])
+    cache.put('right', 'page', ['b'])
+    cache.save()
+    cache.db.close()
+
+    # the same versions
+    cache = ParseCache(path, {'left': '1', 'right': '1'})
+    assert cache.get('left', 'page') == ['a']
+    cache.db.close()
+
+    # a bumped parser drops its results only
+    cache = ParseCache(path, {'left': '2', 'right': '1'})
+    assert cache.get('left', 'page') is ParseCache.MISS
+    assert cache.get('right', 'page') == ['b']
+    cache.db.close()
+
+def test_parser_version_follows_source_and_tables():
+    def parse(text):
+        return text.split()
+
+    def parse_stripped(text):
+        return text.strip().split()
+
+    assert parser_version(parse) == parser_version(parse)
+    assert parser_version(parse) != parser_version(parse_stripped)
+    assert parser_version(parse, {'a': 1}) != parser_version(parse, {'a': 2})
+    assert parser_version(re.compile('a')) != parser_version(re.compile('b'))
+    assert parser_version(re.compile('a')) != \
+           parser_version(re.compile('a', re.I))
+
+def test_parser_versions_ignore_folds_cached_at_run_time():
+    import getdata
+
+    before = parser_version(*getdata.PARSERS['official'])
+    rm_unicode(u'Se\xf1or \u2022')
+    assert parser_version(*getdata.PARSERS['official']) == before
+
+def test_every_legislator_edit_is_hashed():
+    from getdata import GetData, PARSERS
+
+    edits = [m for m in dir(GetData) if m.startswith('_getlegislators_edit')]
+    assert edits
+    for m in edits:
+        assert getattr(GetData, m) in PARSERS['official']
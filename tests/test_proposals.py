@@ -0,0 +1,30 @@
+"""
+parse_proposal() of a saved proposal page, tests/fixtures/proposals/ab47.html,
+against tests/fixtures/proposals/ab47.json
+
+The page is built by hand in the markup of the site's proposal pages, as
+the site could not be reached to capture one; swap in a captured page
+when it can.
+"""
+
+import json
+
+from conftest import fixture
+from proposals import GetProposals
+
+def test_parse_proposal():
+    with open(fixture('proposals', 'ab47.html'), 'rb') as f:
+        text = f.read()
+    with open(fixture('proposals', 'ab47.json')) as f:
+        expected = [str(x) if x is not None else None for x in json.load(f)]
+
+    assert GetProposals().parse_proposal('ab47', text) == expected
+
+def test_edit_names():
+    edit = GetProposals().edit_names
+
+    assert edit('Representatives Allen, Kooyenga and Tittl') == \
+           ['Allen', 'Kooyenga', 'Tittl']
+    assert edit('Representative Allen; Senator Darling') == \
+           ['Allen', 'Darling']
+    assert edit(None) == []
@@ -0,0 +1,25 @@
+import utils
+from scheduler import Scheduler
+
+def test_uninstall_without_install():
+    other = Scheduler()
+    previous = utils.install_scheduler(other)
+    try:
+        Scheduler().uninstall()
+        assert utils._scheduler is other
+    finally:
+        utils.install_scheduler(previous)
+
+def test_uninstall_restores_previous():
+    other = Scheduler()
+    previous = utils.install_scheduler(other)
+    try:
+        scheduler = Scheduler().install()
+        assert utils._scheduler is scheduler
+        scheduler.uninstall()
+        assert utils._scheduler is other
+        # a second uninstall changes nothing
+        scheduler.uninstall()
+        assert utils._scheduler is other
+    finally:
+        utils.install_scheduler(previous)
@@ -0,0 +1,25 @@
+"""
+Rows of the sinks on disk, flushed by their policy
+"""
+
+from sinks import CSVSink, LineSink, Sink
+
+def test_sink_writes_str_as_is(tmpdir):
+    fn = str(tmpdir.join('out.txt'))
+    with Sink(fn, 'w', flush = 2) as out:
+        out.write('a|b\n')
+        out.write('c')
+        assert open(fn).read() == 'a|b\nc'
+        out.write('|d\n')
+    assert out.rows == 3
+    assert open(fn).read() == 'a|b\nc|d\n'
+
+def test_subclasses_format_rows(tmpdir):
+    csv_fn, line_fn = str(tmpdir.join('out.csv')), str(tmpdir.join('out.txt'))
+    with CSVSink(csv_fn, ['x', 'y'], delimiter = '|') as out:
+        out.write(['1', '2'])
+    with LineSink(line_fn, lambda row: ';'.join(row)) as out:
+        out.write(['1', '2'])
+
+    assert open(csv_fn).read() == 'x|y\r\n1|2\r\n'
+    assert open(line_fn).read() == '1;2\n'
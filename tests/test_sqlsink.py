@@ -0,0 +1,90 @@
+import sqlite3
+
+import pytest
+
+from sqlsink import (CommitteeSQLSink, KEY_SIZES, LegislatorSQLSink,
+                     ProposalSQLSink, TABLES)
+
+ROW = ['ab1', 'Title', 'relating to: x', 'Rep. A;Rep. B', 'Sen. C',
+       'Passed', 'History', 'http://docs/2017/proposals/ab1']
+
+def test_file_closed_by_close(tmpdir):
+    fn = str(tmpdir.join('legis.db'))
+    sink = ProposalSQLSink(fn, '2017')
+    sink.write(ROW)
+    sink.close()
+
+    # loaded, and the sink's connection is closed
+    with pytest.raises(sqlite3.ProgrammingError):
+        sink.conn.cursor()
+    conn = sqlite3.connect(fn)
+    assert conn.execute('SELECT COUNT(*) FROM proposal_authors').fetchone() \
+           == (3,)
+    conn.close()
+
+def test_connection_left_open(tmpdir):
+    conn = sqlite3.connect(str(tmpdir.join('legis.db')))
+    with ProposalSQLSink(conn, '2017') as sink:
+        sink.write(ROW)
+
+    assert conn.execute('SELECT Title FROM proposals').fetchall() == \
+           [(u'Title',)]
+    conn.close()
+
+def test_keys_fit_innodb():
+    # utf8mb4 is 4 bytes a character, InnoDB indexes up to 3072 bytes
+    for table, (keys, others) in TABLES.items():
+        assert sum(4 * KEY_SIZES[c] for c in keys) <= 3072, table
+
+def test_every_table_created_and_upserted(tmpdir):
+    fn = str(tmpdir.join('legis.db'))
+    legislator = ['A97', '1533', 'Scott', 'Allen', None, '97', 'R',
+                  'Waukesha'] + [None] * 11 + \
+                 ['http://docs/2017/legislators/assembly/1533', None, '3',
+                  'ab47;sb19']
+    committee = ['Committee on Rules', 'Assembly',
+                 'http://docs/2017/committees/assembly/2000', None,
+                 'Rep. Vos', None, None, None, None, 'Rep. Vos;Rep. Steineke',
+                 None, None, 'G']
+
+    for sink, row in [(LegislatorSQLSink(fn, '2017'), legislator),
+                      (CommitteeSQLSink(fn), committee),
+                      (ProposalSQLSink(fn, '2017'), ROW)]:
+        with sink:
+            sink.write(row)
+            # loaded again, replaced
+            sink.write(row)
+
+    conn = sqlite3.connect(fn)
+    counts = dict((table, conn.execute('SELECT COUNT(*) FROM %s' % table)
+                                .fetchone()[0])
+                  for table in TABLES)
+    conn.close()
+    assert counts == {'legislators': 1, 'legislator_bills': 2,
+                      'committees': 1, 'committee_members': 3,
+                      'proposals': 1, 'proposal_authors': 3}
+
+def test_one_table_sink_takes_rows_as_they_are(tmpdir):
+    from sqlsink import SQLSink
+
+    class BillSQLSink(SQLSink):
+        tables = ['proposals']
+
+    fn = str(tmpdir.join('legis.db'))
+    with BillSQLSink(fn) as out:
+        out.write(['2017'] + ROW)
+    conn = sqlite3.connect(fn)
+    assert conn.execute('SELECT Session, Bill, Status FROM proposals') \
+               .fetchall() == [(u'2017', u'ab1', u'Passed')]
+    conn.close()
+
+def test_sink_of_more_tables_needs_rows(tmpdir):
+    from sqlsink import SQLSink
+
+    class BillsSQLSink(SQLSink):
+        tables = ['proposals', 'proposal_authors']
+
+    out = BillsSQLSink(str(tmpdir.join('legis.db')))
+    with pytest.raises(NotImplementedError):
+        out.write(['2017'] + ROW)
+    out.close()
@@ -0,0 +1,46 @@
+"""
+rm_unicode() against what the five-regex original made of the saved
+texts in tests/fixtures/unicode
+"""
+
+import codecs
+import glob
+import json
+import os
+
+import pytest
+
+from conftest import fixture
+import utils
+from utils import rm_unicode, rm_unicode_all
+
+TEXTS = sorted(os.path.basename(fn)[:-len('.txt')]
+               for fn in glob.glob(fixture('unicode', '*.txt')))
+
+def text(name):
+    with codecs.open(fixture('unicode', name + '.txt'), 'r', 'utf8') as f:
+        return f.read()
+
+def expected_text(name):
+    with open(fixture('unicode', name + '.json')) as f:
+        kind, folded = json.load(f)
+    return folded.encode('ascii') if kind == 'str' else folded
+
+@pytest.mark.parametrize('name', TEXTS)
+def test_rm_unicode(name, monkeypatch):
+    monkeypatch.setattr(utils, 'warning', lambda *args: None)
+    folded = rm_unicode(text(name))
+    expected = expected_text(name)
+
+    assert type(folded) is type(expected)
+    assert folded == expected
+
+def test_rm_unicode_folds_accents():
+    # the original left code points out of its five regexes unicode, the
+    # fold table folds whatever unicodedata can
+    assert rm_unicode(u'Se\xf1or Pe\xf1a') == 'Senor Pena'
+
+def test_rm_unicode_all(monkeypatch):
+    monkeypatch.setattr(utils, 'warning', lambda *args: None)
+    assert rm_unicode_all([text(name) for name in TEXTS]) == \
+           [expected_text(name) for name in TEXTS]
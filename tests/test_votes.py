@@ -0,0 +1,56 @@
+"""
+parse_votes() of a saved official page, tests/fixtures/votes/official.html,
+against tests/fixtures/votes/official.json
+
+The page is built by hand in the markup of the site's official pages, as
+the site could not be reached to capture one; swap in a captured page
+when it can.
+"""
+
+import json
+
+from conftest import fixture
+import votes
+from votes import GetVotes, votes_tab
+
+def page():
+    with open(fixture('votes', 'official.html'), 'rb') as f:
+        return f.read()
+
+def expected():
+    with open(fixture('votes', 'official.json')) as f:
+        return [(str(rollcall), vote, [str(m) if m else m for m in meta])
+                for rollcall, vote, meta in json.load(f)]
+
+def test_parse_votes():
+    assert votes_tab(page()) == 'votes'
+    assert GetVotes().parse_votes(page()) == expected()
+
+def test_tab_found_by_its_link():
+    text = page().replace('"#votes"', '"#rollCalls"') \
+                 .replace('id="votes"', 'id="rollCalls"')
+
+    assert votes_tab(text) == 'rollCalls'
+    assert GetVotes().parse_votes(text) == expected()
+
+def test_no_votes_tab_warns(monkeypatch):
+    warnings = []
+    monkeypatch.setattr(votes, 'warning', lambda *args: warnings.append(args))
+    text = page().replace('id="votes"', 'id="other"')
+
+    assert GetVotes().parse_votes(text, 'http://official') == []
+    assert warnings == [('No Votes tab on official page, no votes read.',
+                         'votes', 'http://official')]
+
+def test_unknown_party_saved(tmpdir):
+    from votes import VoteMatrix, YES, NO
+
+    fn = str(tmpdir.join('votes.npz'))
+    matrix = VoteMatrix(['1533', '1638'], ['R', None], ['av1', 'av2'])
+    matrix.votes[0], matrix.votes[3] = YES, NO
+    matrix.save(fn)
+
+    saved = VoteMatrix.open(fn)
+    assert saved.parties == ['R', '']
+    assert list(saved.votes) == list(matrix.votes)
+    assert saved.party_positions()[''] == [0, NO]
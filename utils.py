@@ -1,8 +1,90 @@
 import urllib
+import urllib2
 import re
+from cStringIO import StringIO
+from xml.etree import cElementTree
+from bs4 import BeautifulSoup, SoupStrainer
+import time
+import unicodedata
+from collections import defaultdict
+from contextlib import contextmanager
+
+# function of str url returning text, see install_loader()
+_loader = None
+# scheduler of network requests, see install_scheduler()
+_scheduler = None
+# http client of network requests, see install_client()
+_client = None
+
+def install_loader(loader):
+    """
+    Route every load_txt through loader, eg httpcache.HTTPCache.load
+    
+    INPUT
+    loader, function of str url returning text, None to fetch directly
+    
+    OUTPUT
+    previous, the loader that was installed, so loaders can be stacked
+    
+    """
+    
+    global _loader
+    previous, _loader = _loader, loader
+    return previous
+
+def install_scheduler(scheduler):
+    """
+    Route every network request through scheduler, under any loader
+    
+    INPUT
+    scheduler, scheduler.Scheduler, None to request directly
+    
+    OUTPUT
+    previous, the scheduler that was installed
+    
+    """
+    
+    global _scheduler
+    previous, _scheduler = _scheduler, scheduler
+    return previous
+
+def install_client(client):
+    """
+    Send every network request over client, under any scheduler
+    
+    INPUT
+    client, client.Client, None for urllib
+    
+    OUTPUT
+    previous, the client that was installed
+    
+    """
+    
+    global _client
+    previous, _client = _client, client
+    return previous
 
 def load_txt(url):
-    """Grab text from string url"""
+    """Grab text from string url, through the installed loader if any"""
+    
+    if _loader is not None:
+        return _loader(url)
+    
+    return fetch_txt(url)
+
+def fetch_txt(url):
+    """
+    Grab text from string url, always over the network
+    An error status gives the error page, as urllib.urlopen does
+    """
+    
+    try:
+        if _scheduler is not None:
+            return _scheduler.get(url)[2]
+        if _client is not None:
+            return _client.get(url)[2]
+    except urllib2.HTTPError as e:
+        return e.read()
     
     fp = urllib.urlopen(url)
     text = fp.read()
@@ -10,6 +92,142 @@ def load_txt(url):
 
     return text
 
+def http_get(url, headers = None):
+    """
+    Grab text from string url, sending extra request headers
+    Through the installed scheduler if any
+    
+    INPUT
+    url, str
+    headers, dict of request headers
+    
+    OUTPUT
+    status, int http status, 304 is returned instead of raised
+    info, dict of lowercased response headers
+    text, str
+    
+    """
+    
+    if _scheduler is not None:
+        return _scheduler.get(url, headers)
+    
+    return http_request(url, headers)
+
+def http_request(url, headers = None, timeout = None):
+    """
+    One request for string url, see http_get()
+    Over the installed client if any
+    An error status raises urllib2.HTTPError, unlike urllib.urlopen, so
+    the scheduler can retry it, load_txt() returns the error page as before
+    
+    INPUT
+    timeout, seconds to wait on the connection, None for the default
+    
+    """
+    
+    if _client is not None:
+        return _client.get(url, headers, timeout)
+    
+    request = urllib2.Request(url, headers = headers or {})
+    try:
+        if timeout is None:
+            fp = urllib2.urlopen(request)
+        else:
+            fp = urllib2.urlopen(request, timeout = timeout)
+    except urllib2.HTTPError as e:
+        if e.code != 304: raise
+        return 304, dict(e.info().items()), ''
+    
+    text = fp.read()
+    status = fp.getcode() or 200
+    info = dict(fp.info().items())
+    fp.close()
+    
+    return status, info, text
+
+def find_divs(text, cls):
+    """
+    All <div class="cls"> in html text
+    
+    Only those subtrees are built, see SoupStrainer, so this is faster
+    and smaller than BeautifulSoup(text, 'lxml').body.find_all('div', ...)
+    and returns the same tags.
+    
+    INPUT
+    text, str html
+    cls, str class of the div
+    
+    OUTPUT
+    divs, list of bs4 Tag
+    
+    """
+    
+    # while parsing, multi-valued classes like "breadcrumb rounded" can
+    # still be one string
+    def has_class(value):
+        if not value:
+            return False
+        if isinstance(value, basestring):
+            value = value.split()
+        return cls in value
+    
+    strainer = SoupStrainer('div', attrs = {'class': has_class})
+    parser = BeautifulSoup(text, 'lxml', parse_only = strainer)
+    
+    return parser.find_all('div', attrs = {'class': cls})
+
+def iter_feed(text, keep = None):
+    """
+    Items of an rss feed, parsed one at a time
+    
+    Each <item> is turned into a dict and freed as soon as it is read, so
+    the whole feed is never held as a tree, and items not kept are dropped
+    on the spot.
+    
+    INPUT
+    text, str xml of the feed
+    keep, function of an item returning if it is wanted, None for all
+    
+    OUTPUT
+    generator of item, dict of child tag: text, namespaced tags by their
+        prefix as in the feed eg item['a10:updated']
+    
+    """
+    
+    # namespace uri: prefix, and the open elements
+    prefixes = {}
+    stack = []
+    events = ('start-ns', 'start', 'end')
+    for event, elem in cElementTree.iterparse(StringIO(text), events):
+        if event == 'start-ns':
+            prefix, uri = elem
+            prefixes[uri] = prefix
+            continue
+        if event == 'start':
+            stack.append(elem)
+            continue
+        
+        stack.pop()
+        if elem.tag != 'item':
+            continue
+        
+        # text as xmltodict gave it, stripped and None if empty
+        item = {}
+        for child in elem:
+            tag = child.tag
+            if tag[0] == '{':
+                uri, tag = tag[1:].split('}', 1)
+                if prefixes.get(uri):
+                    tag = prefixes[uri] + ':' + tag
+            item[tag] = (child.text.strip() or None) if child.text else None
+        
+        # free the item
+        if stack:
+            stack[-1].remove(elem)
+        
+        if keep is None or keep(item):
+            yield item
+
 def warning(*args):
     """Print everything as a warning"""
     
@@ -18,6 +236,41 @@ def warning(*args):
         print(error)
     print('--------------')
 
+class FoldTable(dict):
+    """
+    unicode.translate table folding non-ascii code points to ascii
+    
+    Quotes and dashes are set, other code points are folded with
+    unicodedata the first time they are seen, eg e acute to e, and cached.
+    Code points that do not fold are left as they are, see unfolded.
+    
+    """
+    
+    def __init__(self, folds):
+        dict.__init__(self, ((i, unichr(i)) for i in xrange(128)))
+        self.update((ord(k), v) for k, v in folds.items())
+        # code points left as they are
+        self.unfolded = set()
+    
+    def __missing__(self, i):
+        folded = unicodedata.normalize('NFKD', unichr(i))
+        folded = folded.encode('ascii', 'ignore').decode('ascii')
+        if not folded:
+            folded = unichr(i)
+            self.unfolded.add(i)
+        self[i] = folded
+        
+        return folded
+
+# runs of code points rm_unicode() folds
+NONASCII = re.compile(u'[^\x00-\x7f]+')
+
+# csv unfriendly characters of the government websites
+QUOTES = {u'\u2018': u"'", u'\u2019': u"'", 
+          u'\u201c': u'"', u'\u201d': u'"', 
+          u'\u2013': u'-', u'\u2014': u'--', u'\xe9': u'e'}
+FOLDS = FoldTable(QUOTES)
+
 def rm_unicode(text):
     """
     Remove all unicode quotations from text
@@ -33,22 +286,117 @@ def rm_unicode(text):
     
     Setting encoding to unicode is find but not great for the csv module.
     
+    Text is folded to ascii in one pass, only its runs of non-ascii code 
+    points are looked up in FOLDS. If some code points do not fold, they 
+    are warned about and the text is left unicode.
+    
     """
     
-    a = re.sub(u"(\u2018|\u2019)", "'", text)
-    b = re.sub(u"(\u201c|\u201d)", '"', a)
-    c = re.sub(u"(\u2013)", '-', b)
-    d = re.sub(u"(\u2014)", '--', c)
-    e = re.sub(u"\xe9", 'e', d)
+    return rm_unicode_all([text])[0]
+
+def fold_run(match):
+    """Folded run of non-ascii code points, see rm_unicode()"""
     
-    try:
-        e = str(e)
-    except UnicodeEncodeError:
-        warning("Unicode in utils.py", e)
+    return match.group().translate(FOLDS)
+
+def rm_unicode_all(texts):
+    """
+    rm_unicode() of many texts, warning once about what did not fold
     
-    return e
+    INPUT
+    texts, iterable of unicode or str
+    
+    OUTPUT
+    list of str, unicode if some code points did not fold
+    
+    """
+    
+    out, unfolded = [], defaultdict(int)
+    for text in texts:
+        if isinstance(text, str):
+            out.append(text)
+            continue
+        # most text is ascii already
+        try:
+            out.append(text.encode('ascii'))
+            continue
+        except UnicodeEncodeError:
+            pass
+        
+        text = NONASCII.sub(fold_run, text)
+        try:
+            out.append(text.encode('ascii'))
+        except UnicodeEncodeError:
+            for c in text:
+                if ord(c) in FOLDS.unfolded:
+                    unfolded[c] += 1
+            out.append(text)
+    
+    if unfolded:
+        warning('Unicode not folded in utils.py', 
+                *['U+%04X %s x%d' % (ord(c), unicodedata.name(c, '?'), n)
+                  for c, n in sorted(unfolded.items())])
+    
+    return out
+
+# what rm_unicode() folds with, for parsecache.parser_version()
+UNFOLD = [rm_unicode, rm_unicode_all, fold_run, FoldTable, QUOTES, NONASCII]
 
 def joiner(annoying):
     """Super jenky, oh wells"""
     if not annoying: return annoying
-    return ';'.join(annoying)
\ No newline at end of file
+    return ';'.join(annoying)
+
+def unique(items):
+    """items without repeats, in the order first seen"""
+    seen = set()
+    return [i for i in items if not (i in seen or seen.add(i))]
+
+# seconds and calls per named stage of a crawl, see timed()
+stage_times = defaultdict(float)
+stage_calls = defaultdict(int)
+
+@contextmanager
+def timed(stage):
+    """
+    Add the wall time of a block to stage_times[stage]
+    
+    Example
+    
+    with timed('soup'):
+        parser = BeautifulSoup(text, 'lxml')
+    
+    """
+    
+    start = time.time()
+    try:
+        yield
+    finally:
+        stage_times[stage] += time.time() - start
+        stage_calls[stage] += 1
+
+def timed_iter(stage, iterable):
+    """
+    Yield from iterable, adding the wait for each item to stage_times[stage]
+    
+    Example
+    
+    for url, text in timed_iter('fetch', fetcher.fetch(urls)):
+        ...
+    
+    """
+    
+    iterator = iter(iterable)
+    while True:
+        with timed(stage):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+def reset_timed():
+    """Clear stage_times and stage_calls"""
+    
+    stage_times.clear()
+    stage_calls.clear()
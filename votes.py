@@ -0,0 +1,364 @@
+from bs4 import BeautifulSoup, SoupStrainer
+import array
+import csv
+import lxml
+import re
+import urlparse
+from utils import *
+from fetcher import Fetcher
+from npz import load_npz, save_npz
+from records import read_legislators
+from sinks import CSVSink
+
+# tab of the official page of a legislator listing their votes, the id
+# its Votes link points to, see votes_tab(), else this one
+VOTES_TAB = 'votes'
+VOTES_LINK = re.compile(r'<a\b[^>]*\bhref="#([\w:.-]+)"[^>]*>\s*Votes\s*</a>',
+                        re.I)
+# a vote as the tab gives it, see VOTES
+VOTE = re.compile(r'^(Aye|Yes|No|Nay|NV|Not Voting|Absent|Paired)$', re.I)
+DATE = re.compile(r'\b\d{1,2}/\d{1,2}/\d{4}\b')
+
+# int8 votes of the matrix, not voting also for a roll call of another
+# house or session
+YES, NO, NOT_VOTING = 1, -1, 0
+VOTES = {'aye': YES, 'yes': YES, 'no': NO, 'nay': NO}
+
+class GetVotes(object):
+    """
+    Get the roll call votes of each legislator into a vote matrix
+    Outputs the matrix to 'votes.npz'
+    Outputs 8 fields per roll call to 'rollcalls.csv'
+
+    The votes are on the Votes tab of the official page of each legislator,
+    one roll call a row. A roll call is on the tab of every legislator who
+    voted on it, so it is kept once, by its link.
+
+
+    Example
+
+    from getdata import GetData
+    from votes import GetVotes
+    GetData().getlegislators()
+    votes = GetVotes().getvotes()
+    votes.party_unity()
+
+    """
+
+    def __init__(self, workers = 8, per_host = 4, window = 32):
+        """
+        Setup
+
+        INPUT
+        workers, number of pages fetched concurrently
+        per_host, max pages fetched concurrently from one host
+        window, max legislators fetched ahead of the one being parsed
+
+        """
+
+        self.docs = r'http://docs.legis.wisconsin.gov'
+        self.fetcher = Fetcher(workers, per_host)
+        self.window = window
+
+    def parse_votes(self, text, official = None):
+        """
+        Parse the Votes tab of the official page of a legislator
+
+        INPUT
+        text, str html of the official page
+        official, str url of the page, for the warnings
+
+        OUTPUT
+        votes, list of (str roll call, int vote, meta), roll call the path
+            of its link, eg '2017/related/votes/assembly/av0012', meta
+            [Chamber, Date, Bill, Question] of the row
+
+        """
+
+        tab_id = votes_tab(text)
+        with timed('soup'):
+            tab = BeautifulSoup(text, 'lxml',
+                                parse_only = SoupStrainer('div',
+                                                          id = tab_id))
+        if tab.find('div', id = tab_id) is None:
+            warning('No Votes tab on official page, no votes read.', tab_id,
+                    official)
+            return []
+
+        votes = []
+        with timed('parse'):
+            for tr in tab.find_all(['tr', 'li']):
+                link = [a.get('href') for a in tr.find_all('a')
+                        if '/votes/' in (a.get('href') or '')]
+                if not link:
+                    continue
+                rollcall = urlparse.urlsplit(link[0]).path.strip('/')
+
+                cells = [td.get_text(' ', strip = True)
+                         for td in tr.find_all('td')] or \
+                        [tr.get_text(' ', strip = True)]
+                cells = rm_unicode_all(cells)
+                vote = [VOTES.get(c.lower(), NOT_VOTING) for c in cells
+                        if VOTE.match(c)]
+                if not vote:
+                    warning('No vote in roll call row, skipped.', cells)
+                    continue
+
+                chamber = [h for h in ('assembly', 'senate')
+                           if '/%s/' % h in '/%s/' % rollcall]
+                date = DATE.search(' '.join(cells))
+                bill = [a.get('href').rstrip('/').split('/')[-1]
+                        for a in tr.find_all('a')
+                        if '/proposals/' in (a.get('href') or '')]
+                # the longest cell that is not a vote, date or link, eg
+                # Passage
+                links = set(rm_unicode_all(a.get_text(' ', strip = True)
+                                           for a in tr.find_all('a')))
+                question = [c for c in cells if not VOTE.match(c) and
+                            not DATE.match(c) and c not in links]
+                question = max(question, key = len) if question else None
+
+                meta = [chamber[0].title() if chamber else None,
+                        date.group(0) if date else None,
+                        bill[0] if bill else None, question]
+                votes.append((rollcall, vote[0], meta))
+
+        return votes
+
+    def getvotes(self, legislators = 'legislators.csv', out = 'votes.npz',
+                 rollcalls = 'rollcalls.csv'):
+        """
+        Fetch and parse the Votes tab of each legislator
+
+        INPUT
+        legislators, str legislators.csv or sessions.csv
+        out, str file of the vote matrix, see VoteMatrix.save()
+
+        SAVE TO FILE rollcalls.csv
+        data, one row per roll call, in the order of the columns of the
+            matrix
+            [Rollcall, Chamber, Date, Bill, Question, Yes, No, Link]
+
+        OUTPUT
+        VoteMatrix
+
+        """
+
+        # a legislator of several sessions is one row, of their last party
+        legs = list(read_legislators(legislators))
+        pids, parties, rows = [], [], {}
+        for leg in legs:
+            if leg.PID not in rows:
+                rows[leg.PID] = len(pids)
+                pids.append(leg.PID)
+                parties.append('')
+            # no party parsed is saved as ''
+            parties[rows[leg.PID]] = leg.Party or ''
+
+        # roll call: column, its meta, and (row, column, vote)
+        columns, metas, cells = {}, [], []
+
+        # each official page fetched once, a window ahead
+        fetched = self.fetcher.imap(legs, lambda l: [l.OfficialWeb],
+                                    self.window)
+        for leg, pages in timed_iter('fetch', fetched):
+            text = pages.get(leg.OfficialWeb)
+            if text is None:
+                warning('Official page not fetched, skipped.', leg.PID)
+                continue
+
+            for rollcall, vote, meta in self.parse_votes(text,
+                                                         leg.OfficialWeb):
+                if rollcall not in columns:
+                    columns[rollcall] = len(metas)
+                    metas.append([rollcall] + meta)
+                else:
+                    # fill in what other rows of the roll call lacked
+                    old = metas[columns[rollcall]]
+                    old[1:] = [o or m for o, m in zip(old[1:], meta)]
+                cells.append((rows[leg.PID], columns[rollcall], vote))
+
+        matrix = VoteMatrix(pids, parties, [m[0] for m in metas])
+        for i, j, vote in cells:
+            matrix.votes[i * len(metas) + j] = vote
+        matrix.save(out)
+
+        header = ['Rollcall', 'Chamber', 'Date', 'Bill', 'Question',
+                  'Yes', 'No', 'Link']
+        sink = CSVSink(rollcalls, header, delimiter='|',
+                       quoting = csv.QUOTE_NONE, escapechar = '\\')
+        try:
+            for meta, (yes, no) in zip(metas, matrix.tallies()):
+                sink.write(meta + [yes, no, self.docs + '/' + meta[0]])
+        finally:
+            sink.close()
+
+        return matrix
+
+def votes_tab(text):
+    """Id of the Votes tab of an official page, from its link in the tabs"""
+
+    match = VOTES_LINK.search(text)
+    return match.group(1) if match else VOTES_TAB
+
+class VoteMatrix(object):
+    """
+    Votes of legislators x roll calls, int8 YES, NO or NOT_VOTING, in one
+    row-major array.array('b')
+
+
+    Example
+
+    from votes import VoteMatrix
+    votes = VoteMatrix.open('votes.npz')
+    votes.agreement('1533', '1638')
+    sorted(votes.party_unity().items(), key = lambda x: x[1])[:5]
+
+    import numpy as np              # if installed
+    m = np.load('votes.npz')['votes']
+
+    """
+
+    def __init__(self, pids, parties, rollcalls, votes = None):
+        """
+        INPUT
+        pids, list of str PID of the rows
+        parties, list of str party of the rows, eg 'R', None for unknown
+            is kept as ''
+        rollcalls, list of str roll call of the columns
+        votes, array.array('b'), None for all NOT_VOTING
+
+        """
+
+        self.pids = list(pids)
+        self.parties = [party or '' for party in parties]
+        self.rollcalls = list(rollcalls)
+        size = len(self.pids) * len(self.rollcalls)
+        if votes is None:
+            votes = array.array('b', [NOT_VOTING]) * size
+        if len(votes) != size:
+            raise ValueError('%d votes for %d x %d' %
+                             (len(votes), len(self.pids), len(self.rollcalls)))
+        self.votes = votes
+        self.rows = dict((p, i) for i, p in enumerate(self.pids))
+        self.columns = dict((r, j) for j, r in enumerate(self.rollcalls))
+
+    @classmethod
+    def open(cls, fn = 'votes.npz'):
+        """Matrix saved by save()"""
+
+        arrays = load_npz(fn)
+        return cls(arrays['pids'][0], arrays['parties'][0],
+                   arrays['rollcalls'][0], arrays['votes'][0])
+
+    def save(self, fn = 'votes.npz'):
+        """
+        Save the matrix, see npz.py
+
+        SAVE TO FILE votes.npz
+        votes, int8 legislators x roll calls
+        pids, parties, of the rows
+        rollcalls, of the columns
+
+        """
+
+        save_npz(fn, {'votes': self.votes, 'pids': self.pids,
+                      'parties': self.parties, 'rollcalls': self.rollcalls},
+                 {'votes': (len(self.pids), len(self.rollcalls))})
+
+    def row(self, pid):
+        """Votes of a PID, array.array('b') of one per roll call"""
+
+        n = len(self.rollcalls)
+        i = self.rows[pid]
+        return self.votes[i * n:(i + 1) * n]
+
+    def vote(self, pid, rollcall):
+        """YES, NO or NOT_VOTING"""
+
+        return self.votes[self.rows[pid] * len(self.rollcalls) +
+                          self.columns[rollcall]]
+
+    def tallies(self):
+        """(yes, no) of each roll call"""
+
+        n = len(self.rollcalls)
+        yes, no = [0] * n, [0] * n
+        for i in xrange(len(self.pids)):
+            for j, v in enumerate(self.votes[i * n:(i + 1) * n]):
+                if v == YES:
+                    yes[j] += 1
+                elif v == NO:
+                    no[j] += 1
+
+        return zip(yes, no)
+
+    def agreement(self, a, b):
+        """
+        Share of the roll calls both PIDs voted on where they voted alike,
+        None if there are none
+        """
+
+        both = [x == y for x, y in zip(self.row(a), self.row(b)) if x and y]
+        return float(sum(both)) / len(both) if both else None
+
+    def agreements(self, pid):
+        """agreement() of a PID with every other PID, dict of PID: share"""
+
+        return dict((other, self.agreement(pid, other))
+                    for other in self.pids if other != pid)
+
+    def party_positions(self):
+        """
+        Majority vote of each party on each roll call
+
+        OUTPUT
+        dict of party: list of YES, NO or NOT_VOTING on a tie or no votes
+
+        """
+
+        n = len(self.rollcalls)
+        sums = defaultdict(lambda: [0] * n)
+        for i, party in enumerate(self.parties):
+            total = sums[party]
+            for j, v in enumerate(self.votes[i * n:(i + 1) * n]):
+                total[j] += v
+
+        return dict((party, [YES if s > 0 else NO if s < 0 else NOT_VOTING
+                             for s in total])
+                    for party, total in sums.items())
+
+    def party_unity(self):
+        """
+        Party unity score of each PID, the share of party line votes, where
+        the majorities of the parties are opposed, on which the PID voted
+        with the majority of their party, None if there are none
+
+        OUTPUT
+        dict of PID: share
+
+        """
+
+        positions = self.party_positions()
+        n = len(self.rollcalls)
+        # roll calls where some two party majorities are opposed
+        line = [j for j in xrange(n)
+                if len(set(p[j] for p in positions.values()) -
+                       set([NOT_VOTING])) > 1]
+
+        scores = {}
+        for i, pid in enumerate(self.pids):
+            position = positions[self.parties[i]]
+            row = self.votes[i * n:(i + 1) * n]
+            voted = [row[j] == position[j] for j in line
+                     if row[j] and position[j]]
+            scores[pid] = float(sum(voted)) / len(voted) if voted else None
+
+        return scores
+
+    def to_numpy(self):
+        """The matrix as an int8 numpy array, numpy needs to be installed"""
+
+        import numpy
+        return numpy.frombuffer(self.votes.tostring(), numpy.int8).reshape(
+                   len(self.pids), len(self.rollcalls))